@@ -7,14 +7,21 @@ from pathlib import Path
 import os
 
 from config import config_manager
-from data_manager import DataManager
-from expense_manager import ExpenseManager
-from budget_calculator import BudgetCalculator
-from initial_data import get_erp_statistics_list, get_rcms_items_list
+from data_manager import create_data_manager
+from save_worker import get_save_worker, flush_save_worker
+from expense_manager import ExpenseManager, DEFAULT_PAGE_SIZE
+from budget_calculator import BudgetCalculator, budget_cache
+from portfolio import PortfolioManager
+from expense_schema import with_rcms_name
+from fingerprint import budget_fingerprints, changed_keys
+from reconciliation import reconcile, normalize_mapping, WARNING_REASONS
+from gap_analysis import explain_execution_gap, find_subset_sums, SUBSET_MAX_RESULTS, SUBSET_TIME_BUDGET, MITM_MAX_ROWS
+from initial_data import get_erp_statistics_list, get_rcms_items_list, get_rcms_code_by_name
 from utils import get_file_path, ensure_folder_exists, open_folder_in_explorer, format_currency, get_master_filename
 from ui_components import (
     display_file_info, display_expense_table, display_erp_budget_table,
-    display_rcms_budget_table, plot_erp_budget_chart, plot_rcms_budget_chart, show_summary_cards
+    display_rcms_budget_table, plot_erp_budget_chart, plot_rcms_budget_chart, show_summary_cards,
+    plot_monthly_execution_chart, display_reconciliation_table
 )
 # Streamlit Cloud에서는 tkinter 사용 불가
 try:
@@ -43,42 +50,103 @@ if 'rcms_budget_df' not in st.session_state:
     st.session_state.rcms_budget_df = pd.DataFrame()
 if 'mapping_df' not in st.session_state:
     st.session_state.mapping_df = pd.DataFrame()
+if 'sheets_pending' not in st.session_state:
+    st.session_state.sheets_pending = False
 if 'current_file_path' not in st.session_state:
     st.session_state.current_file_path = None
 if 'page' not in st.session_state:
     st.session_state.page = 'file_select'
+if 'portfolio' not in st.session_state:
+    st.session_state.portfolio = None
 
+# 지출내역 편집기에서 수정 가능한 컬럼과 필수 컬럼
+EXPENSE_EDITABLE_COLUMNS = ['통계목명', '사용일자', '지출결의명', '상세내역', '지출결의액', 'rcms_name', 'rcms_settled']
+EXPENSE_REQUIRED_COLUMNS = ['통계목명', '사용일자', '지출결의명', '지출결의액']
+# 지출내역 표 정렬 기준 (표시 이름 → 컬럼)과 페이지당 행 수 선택지
+EXPENSE_SORT_OPTIONS = {'ID': 'id', '사용일자': '사용일자', '지출결의액': '지출결의액', '통계목명': '통계목명', '지출결의명': '지출결의명'}
+EXPENSE_PAGE_SIZES = [50, 100, 200, 500]
 
-def has_data_changes(new_rows: list, updated_rows: list, deleted_ids: set,
-                     original_expense_df: pd.DataFrame, current_expense_df: pd.DataFrame,
-                     original_erp_budget: pd.DataFrame, current_erp_budget: pd.DataFrame,
-                     original_rcms_budget: pd.DataFrame, current_rcms_budget: pd.DataFrame) -> bool:
-    """변경사항이 있는지 확인"""
-    # 지출내역 변경 확인
-    if new_rows or updated_rows or deleted_ids:
-        return True
+
+def _is_blank(value) -> bool:
+    """편집기에서 비워 둔 값인지 여부"""
+    return value is None or (not isinstance(value, str) and pd.isna(value))
+
+
+def _editor_value(column: str, value):
+    """편집기 값을 지출내역 저장 형식으로 변환"""
+    if column == '사용일자':
+        use_date = pd.to_datetime(value, errors='coerce')
+        return use_date.strftime("%Y-%m-%d") if pd.notna(use_date) else None
+    if column == '지출결의액':
+        return int(float(str(value).replace(',', ''))) if not _is_blank(value) else 0
+    if column == 'rcms_settled':
+        return bool(value) if not _is_blank(value) else False
+    return str(value) if not _is_blank(value) else ""
+
+
+def _editor_row(values: dict) -> dict:
+    """편집기 행(바뀐 컬럼만 있을 수 있음)을 지출내역 행으로 변환 (rcms_name 선택 시 rcms_code 매핑)"""
+    row = {}
+    for column, value in values.items():
+        if column == 'rcms_name':
+            rcms_name = str(value).strip() if not _is_blank(value) else ""
+            row['rcms_code'] = (get_rcms_code_by_name(rcms_name) if rcms_name else None) or ""
+            row['rcms_name'] = rcms_name
+        elif column in EXPENSE_EDITABLE_COLUMNS:
+            row[column] = _editor_value(column, value)
+    return row
+
+
+def get_editor_changes(editor_state: dict, row_ids: list) -> tuple:
+    """data_editor 편집 상태(edited_rows/added_rows/deleted_rows)를 (추가 행, 수정 행, 삭제 id)로 변환
     
-    # ERP 예산 변경 확인 (실행예산만 비교, 집계 결과는 제외)
-    if not original_erp_budget.empty and not current_erp_budget.empty:
-        original_budget = original_erp_budget[['통계목명', '실행예산']].sort_values('통계목명').reset_index(drop=True)
-        current_budget = current_erp_budget[['통계목명', '실행예산']].sort_values('통계목명').reset_index(drop=True)
-        if not original_budget.equals(current_budget):
-            return True
+    편집 상태의 행 번호는 표시된(필터된) 표 기준이므로 row_ids(표시 순서의 id)로 실제 id를 찾는다.
+    필수값이 비어 있는 추가/수정 행은 반영하지 않는다.
+    """
+    editor_state = editor_state or {}
     
-    # RCMS 예산 변경 확인 (budget_amount만 비교, 집계 결과는 제외)
-    if not original_rcms_budget.empty and not current_rcms_budget.empty:
-        original_rcms = original_rcms_budget[['rcms_code', 'rcms_name', 'budget_amount']].sort_values('rcms_code').reset_index(drop=True)
-        current_rcms = current_rcms_budget[['rcms_code', 'rcms_name', 'budget_amount']].sort_values('rcms_code').reset_index(drop=True)
-        if not original_rcms.equals(current_rcms):
-            return True
+    deleted_positions = {int(position) for position in editor_state.get('deleted_rows', [])}
+    deleted_ids = {int(row_ids[position]) for position in deleted_positions if position < len(row_ids)}
     
-    return False
+    updated_rows = []
+    for position, values in editor_state.get('edited_rows', {}).items():
+        position = int(position)
+        if position >= len(row_ids) or position in deleted_positions:
+            continue
+        if any(column in values and _is_blank(values[column]) for column in EXPENSE_REQUIRED_COLUMNS):
+            continue
+        row = _editor_row(values)
+        if row:
+            row['id'] = int(row_ids[position])
+            updated_rows.append(row)
+    
+    new_rows = []
+    for values in editor_state.get('added_rows', []):
+        if any(_is_blank(values.get(column)) for column in EXPENSE_REQUIRED_COLUMNS):
+            continue
+        new_rows.append(_editor_row({column: values.get(column) for column in EXPENSE_EDITABLE_COLUMNS}))
+    
+    return new_rows, updated_rows, deleted_ids
+
+
+def record_budget_changes(sheet_name: str, key_column: str, value_column: str,
+                          keys: list, current_df: pd.DataFrame):
+    """변경된 예산 행(지문이 바뀐 키)의 값을 저널에 기록 (저장 중 비정상 종료 대비)"""
+    changed = current_df[current_df[key_column].astype(str).str.strip().isin(keys)]
+    for key, value in zip(changed[key_column].astype(str).str.strip(), changed[value_column]):
+        st.session_state.data_manager.record_budget_change(
+            sheet_name, key_column, key, value_column, int(value) if pd.notna(value) else 0
+        )
 
 
-def load_data(file_path: str):
-    """데이터 로드"""
+def load_data(file_path: str, backend: str = None):
+    """데이터 로드 (backend를 지정하면 해당 과제 폴더의 저장 방식으로 기록)"""
     try:
-        data_manager = DataManager(file_path)
+        # 같은 파일의 저장이 진행 중이면 끝난 뒤 읽음
+        flush_save_worker(file_path)
+        if backend:
+            config_manager.set_project_backend(str(Path(file_path).parent), backend)
+        data_manager = create_data_manager(file_path, backend)
         
         # 파일이 없으면 생성
         if not data_manager.file_exists():
@@ -86,8 +154,8 @@ def load_data(file_path: str):
                 st.error("초기 파일 생성에 실패했습니다.")
                 return False
         
-        # 데이터 로드
-        data = data_manager.load_all()
+        # 데이터 로드 (첫 화면에 필요한 EXPENSE만, 예산/매핑 시트는 화면 표시 후 백그라운드에서)
+        data = data_manager.load_expense_first()
         
         if not data:
             st.error("데이터 로드에 실패했습니다.")
@@ -96,9 +164,12 @@ def load_data(file_path: str):
         # 세션 상태에 저장
         st.session_state.data_manager = data_manager
         st.session_state.expense_manager = ExpenseManager(data.get('EXPENSE', pd.DataFrame()))
-        st.session_state.erp_budget_df = data.get('ERP_BUDGET', pd.DataFrame())
-        st.session_state.rcms_budget_df = data.get('RCMS_BUDGET', pd.DataFrame())
-        st.session_state.mapping_df = data.get('MAPPING_ERP_RCMS', pd.DataFrame())
+        # 지출내역 추가/수정/삭제를 저장소에 연결 (SQLite: 행 단위 반영, 엑셀: 변경 저널 기록)
+        data_manager.bind_expense_manager(st.session_state.expense_manager)
+        st.session_state.erp_budget_df = pd.DataFrame()
+        st.session_state.rcms_budget_df = pd.DataFrame()
+        st.session_state.mapping_df = pd.DataFrame()
+        st.session_state.sheets_pending = True
         st.session_state.current_file_path = file_path
         
         # last_work_folder 업데이트
@@ -110,21 +181,61 @@ def load_data(file_path: str):
         return False
 
 
+def fill_remaining_sheets() -> bool:
+    """load_data에서 미룬 예산/매핑 시트를 세션 상태에 채움 (백그라운드 로드 중이면 끝날 때까지 대기)"""
+    if not st.session_state.sheets_pending:
+        return True
+    remaining = st.session_state.data_manager.load_remaining()
+    if not remaining:
+        st.error("예산 데이터 로드에 실패했습니다.")
+        return False
+    st.session_state.erp_budget_df = remaining.get('ERP_BUDGET', pd.DataFrame())
+    st.session_state.rcms_budget_df = remaining.get('RCMS_BUDGET', pd.DataFrame())
+    st.session_state.mapping_df = remaining.get('MAPPING_ERP_RCMS', pd.DataFrame())
+    st.session_state.sheets_pending = False
+    return True
+
+
+def submit_save(data: dict, dirty_sheets: list = None):
+    """백그라운드 저장 요청 (화면은 저장 완료를 기다리지 않음)"""
+    try:
+        get_save_worker(st.session_state.data_manager).submit(data, dirty_sheets=dirty_sheets)
+        return True, None
+    except Exception as e:
+        return False, f"저장 요청 오류: {e}"
+
+
+def show_save_status():
+    """백그라운드 저장 상태 표시"""
+    if not st.session_state.data_manager:
+        return
+    status = get_save_worker(st.session_state.data_manager).get_status()
+    if status['state'] in ('pending', 'saving'):
+        st.caption("💾 저장 중...")
+    elif status['state'] == 'failed':
+        st.error(f"저장 실패: {status['error']}")
+    elif status['saved_at']:
+        st.caption(f"✅ 저장됨 ({status['saved_at'].strftime('%H:%M:%S')})")
+
+
 def save_data():
     """데이터 저장"""
     if not st.session_state.data_manager:
         st.error("파일이 선택되지 않았습니다.")
         return False
+    # 예산/매핑 시트가 아직 로드 중이면 빈 시트를 저장하지 않도록 먼저 채움
+    if not fill_remaining_sheets():
+        return False
     
     try:
         data = {
-            'EXPENSE': st.session_state.expense_manager.get_all(),
+            'EXPENSE': st.session_state.expense_manager.snapshot(),
             'ERP_BUDGET': st.session_state.erp_budget_df,
             'RCMS_BUDGET': st.session_state.rcms_budget_df,
             'MAPPING_ERP_RCMS': st.session_state.mapping_df
         }
         
-        success, error_msg = st.session_state.data_manager.save_all(data)
+        success, error_msg = submit_save(data)
         if success:
             st.success("저장되었습니다.")
             return True
@@ -136,6 +247,65 @@ def save_data():
         return False
 
 
+def show_download_button(key: str, use_container_width: bool = False):
+    """엑셀 파일 다운로드 버튼 (SQLite 저장소는 내보내기 후 다운로드)"""
+    data_manager = st.session_state.data_manager
+    if not data_manager:
+        return
+    # 진행 중인 저장이 끝난 뒤 내보내기/다운로드
+    flush_save_worker(data_manager.file_path)
+    
+    if data_manager.backend == "sqlite" and not st.session_state.get(f"{key}_exported", False):
+        if st.button("📤 엑셀로 내보내기", key=f"{key}_export", use_container_width=use_container_width):
+            data_manager.export_xlsx()
+            st.session_state[f"{key}_exported"] = True
+            st.rerun()
+        return
+    
+    file_path = data_manager.file_path
+    with open(file_path, "rb") as f:
+        file_bytes = f.read()
+    if st.download_button(
+        label="📥 파일 다운로드",
+        data=file_bytes,
+        file_name=file_path.name,
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key=key,
+        use_container_width=use_container_width
+    ):
+        st.session_state[f"{key}_exported"] = False
+
+
+def show_backup_section():
+    """백업 버전 목록 및 복원"""
+    data_manager = st.session_state.data_manager
+    if not data_manager or data_manager.backend != "xlsx":
+        return
+    
+    versions = data_manager.list_backups()
+    with st.expander(f"🗂️ 백업 버전 ({len(versions)}개)", expanded=False):
+        if not versions:
+            st.caption("저장된 백업이 없습니다.")
+            return
+        labels = {v['version']: f"{v['created_at'].strftime('%Y-%m-%d %H:%M:%S')} ({v['size']:,} bytes)" for v in versions}
+        selected_version = st.selectbox("복원할 버전", list(labels.keys()), format_func=lambda v: labels[v], key="backup_version")
+        if st.button("♻️ 선택한 버전 복원", key="restore_backup_btn"):
+            flush_save_worker(data_manager.file_path)
+            restored_path = data_manager.restore_backup(selected_version)
+            if restored_path:
+                st.success(f"복원 파일이 생성되었습니다: {restored_path.name}")
+                with open(restored_path, "rb") as f:
+                    st.download_button(
+                        label="📥 복원 파일 다운로드",
+                        data=f.read(),
+                        file_name=restored_path.name,
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        key="download_restored_btn"
+                    )
+            else:
+                st.error("백업 복원에 실패했습니다.")
+
+
 def show_file_select_page():
     """파일 선택 페이지"""
     st.title("📊 연구비 예산관리 시스템")
@@ -143,6 +313,20 @@ def show_file_select_page():
     
     st.header("작업 파일 선택")
     
+    # 저장 방식 선택 (기본값으로 기억하고, 파일을 열 때 해당 과제 폴더에 기록)
+    backend_labels = {"xlsx": "엑셀 파일 (master.xlsx)", "sqlite": "SQLite DB (대용량 권장)"}
+    current_backend = config_manager.get("storage_backend", "xlsx")
+    selected_backend = st.radio(
+        "저장 방식",
+        list(backend_labels.keys()),
+        index=list(backend_labels.keys()).index(current_backend) if current_backend in backend_labels else 0,
+        format_func=lambda b: backend_labels[b],
+        horizontal=True,
+        key="storage_backend"
+    )
+    if selected_backend != current_backend:
+        config_manager.set("storage_backend", selected_backend)
+    
     st.markdown("---")
     
     # 파일 선택 옵션
@@ -158,7 +342,7 @@ def show_file_select_page():
             ensure_folder_exists("temp")
             with open(temp_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
-            if load_data(str(temp_path)):
+            if load_data(str(temp_path), backend=selected_backend):
                 st.session_state.page = 'main'
                 st.rerun()
     
@@ -169,9 +353,30 @@ def show_file_select_page():
             # 임시 파일 경로 사용 (Streamlit Cloud 호환)
             temp_path = Path("temp") / "master.xlsx"
             ensure_folder_exists("temp")
-            if load_data(str(temp_path)):
+            if load_data(str(temp_path), backend=selected_backend):
                 st.session_state.page = 'main'
                 st.rerun()
+    
+    st.markdown("---")
+    
+    # 여러 과제 통합 조회
+    st.subheader("📁 포트폴리오 보기")
+    st.write("상위 폴더 아래의 모든 과제 master 파일을 불러와 집행 결과를 합쳐서 봅니다.")
+    root_folder = st.text_input(
+        "과제 상위 폴더",
+        value=str(Path(config_manager.get("last_work_folder", "") or ".").parent),
+        key="portfolio_root"
+    )
+    if st.button("📊 포트폴리오 불러오기", key="portfolio_btn"):
+        portfolio = PortfolioManager(root_folder)
+        with st.spinner("과제 파일을 불러오는 중..."):
+            success, error_msg = portfolio.load()
+        if success:
+            st.session_state.portfolio = portfolio
+            st.session_state.page = 'portfolio'
+            st.rerun()
+        else:
+            st.error(error_msg)
 
 
 def show_main_page():
@@ -187,8 +392,11 @@ def show_main_page():
         col1, col2, col3 = st.columns([3, 1, 1])
         with col1:
             display_file_info(str(file_path), str(folder_path))
+            show_save_status()
         with col2:
             if st.button("🔄 파일 변경", key="change_file_btn"):
+                # 남은 저장을 마친 뒤 파일 변경
+                flush_save_worker(st.session_state.current_file_path)
                 st.session_state.page = 'file_select'
                 st.rerun()
         with col3:
@@ -214,6 +422,10 @@ def show_main_page():
         show_expense_page()
     elif menu == "집행 결과":
         show_execution_result_page()
+    
+    # 첫 화면을 그린 뒤 미룬 예산/매핑 시트 로드와 캐시 저장을 백그라운드에서 시작
+    if st.session_state.sheets_pending and st.session_state.data_manager:
+        st.session_state.data_manager.start_loading_remaining()
 
 
 def show_expense_page():
@@ -235,7 +447,7 @@ def show_expense_page():
             start_date = st.date_input("시작일", key="filter_start_date")
             end_date = st.date_input("종료일", key="filter_end_date")
         with col2:
-            search_keyword = st.text_input("지출결의명 검색", key="filter_keyword")
+            search_keyword = st.text_input("검색 (지출결의명·상세내역)", key="filter_keyword", help="공백으로 나눈 단어를 모두 포함하는 내역을 관련도 순으로 보여줍니다.")
             settled_filter = st.selectbox("RCMS 정산 여부", ["전체", "정산 완료", "미정산"], key="filter_settled")
         
         col_btn1, col_btn2 = st.columns(2)
@@ -247,8 +459,8 @@ def show_expense_page():
                 st.session_state.filter_applied = False
     
     # 필터링 적용
+    filters = {}
     if st.session_state.get('filter_applied', False):
-        filters = {}
         if selected_stat:
             filters['통계목명'] = selected_stat
         if start_date:
@@ -256,40 +468,60 @@ def show_expense_page():
         if end_date:
             filters['종료일'] = end_date.strftime("%Y-%m-%d")
         if search_keyword:
-            filters['지출결의명'] = search_keyword
+            filters['검색어'] = search_keyword
         if settled_filter == "정산 완료":
             filters['rcms_settled'] = True
         elif settled_filter == "미정산":
             filters['rcms_settled'] = False
-        
-        filtered_df = expense_manager.filter(filters)
-    else:
-        filtered_df = expense_manager.get_all()
     
     # 데이터 테이블 - 직접 편집 가능
     st.subheader("지출내역 (표에서 직접 입력/수정 가능)")
     st.caption("💡 **안내**: 표에서 직접 데이터를 입력/수정할 수 있습니다. ID는 자동으로 할당됩니다. 금액은 숫자만 입력하세요 (예: 1000000).")
     
+    # 정렬/페이지 선택 (표에는 한 페이지만 보내고, 편집 내용은 id 기준으로 반영)
+    sort_options = dict(EXPENSE_SORT_OPTIONS)
+    if filters.get('검색어'):
+        sort_options = {'관련도': None, **sort_options}
+    col_sort, col_order, col_size = st.columns(3)
+    with col_sort:
+        sort_label = st.selectbox("정렬", list(sort_options.keys()), key="expense_sort")
+    with col_order:
+        ascending = st.radio("순서", ["내림차순", "오름차순"], horizontal=True, key="expense_sort_order") == "오름차순"
+    with col_size:
+        page_size = st.selectbox("페이지당 행 수", EXPENSE_PAGE_SIZES,
+                                 index=EXPENSE_PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key="expense_page_size")
+    sort_by = sort_options[sort_label]
+    
+    # 페이지 번호는 조건에 맞는 행 수에 맞춰 보정 (필터를 바꿔 페이지 수가 줄어든 경우)
+    page = int(st.session_state.get('expense_page', 1))
+    filtered_df, total = expense_manager.get_page(filters, sort_by, ascending, (page - 1) * page_size, page_size)
+    page_count = max(1, -(-total // page_size))
+    if page > page_count:
+        page = page_count
+        filtered_df, total = expense_manager.get_page(filters, sort_by, ascending, (page - 1) * page_size, page_size)
+    st.session_state.expense_page = page
+    
+    col_page, col_count = st.columns([1, 3])
+    with col_page:
+        st.number_input("페이지", min_value=1, max_value=page_count, step=1, key="expense_page")
+    with col_count:
+        first_row = (page - 1) * page_size + 1 if total else 0
+        last_row = first_row + len(filtered_df) - 1 if total else 0
+        st.caption(f"조건에 맞는 {total:,}건 중 {first_row:,}–{last_row:,}번째 ({page}/{page_count} 페이지). "
+                   "페이지나 정렬을 바꾸기 전에 💾 반영저장을 눌러야 편집 내용이 유지됩니다.")
+    
     # 편집 가능한 컬럼만 선택 (rcms_code는 숨기고 rcms_name만 표시, ID는 표시만)
-    editable_columns = ['통계목명', '사용일자', '지출결의명', '상세내역', '지출결의액', 'rcms_name', 'rcms_settled']
-    display_columns = ['id'] + editable_columns
+    display_columns = ['id'] + EXPENSE_EDITABLE_COLUMNS
     
     # RCMS 옵션 준비
     rcms_items = get_rcms_items_list()
     rcms_name_options = [""] + [item['rcms_name'] for item in rcms_items]
     
-    # ID 자동 증가를 위한 최대값 계산
-    if not filtered_df.empty and 'id' in filtered_df.columns:
-        max_id = int(filtered_df['id'].max()) if pd.notna(filtered_df['id'].max()) else 0
-    else:
-        max_id = 0
-    
-    # expense_manager에서도 최대 ID 가져오기 (더 정확함)
-    if st.session_state.expense_manager:
-        expense_all = st.session_state.expense_manager.get_all()
-        if not expense_all.empty and 'id' in expense_all.columns:
-            manager_max_id = int(expense_all['id'].max()) if pd.notna(expense_all['id'].max()) else 0
-            max_id = max(max_id, manager_max_id)
+    # 편집 상태는 표시된 행 번호 기준이므로, 데이터(버전)나 필터/정렬/페이지가 바뀌면 새 편집기로 시작
+    view_state = (sorted(filters.items()), sort_by, ascending, page, page_size)
+    editor_key = f"expense_editor_{expense_manager.version}_{abs(hash(repr(view_state)))}"
+    # 편집기 행 번호 → 지출내역 id
+    row_ids = filtered_df['id'].tolist() if 'id' in filtered_df.columns else []
     
     # 기존 데이터가 있으면 표시, 없으면 빈 DataFrame 생성
     if filtered_df.empty:
@@ -299,7 +531,7 @@ def show_expense_page():
             empty_df,
             use_container_width=True,
             num_rows="dynamic",
-            key="expense_editor",
+            key=editor_key,
             column_config={
                 "id": st.column_config.NumberColumn("ID", disabled=True, help="자동 할당됩니다"),
                 "통계목명": st.column_config.SelectboxColumn("통계목명", options=get_erp_statistics_list(), required=True),
@@ -312,8 +544,9 @@ def show_expense_page():
             }
         )
     else:
-        # 기존 데이터 표시 및 편집
-        display_df = filtered_df[display_columns].copy()
+        # 기존 데이터 표시 및 편집 (rcms_name은 rcms_code에서 계산, category는 선택 상자용 문자열로)
+        display_df = with_rcms_name(filtered_df)[display_columns].copy()
+        display_df['통계목명'] = display_df['통계목명'].astype(object)
         # 날짜 형식 변환 (문자열을 날짜로)
         if '사용일자' in display_df.columns:
             display_df['사용일자'] = pd.to_datetime(display_df['사용일자'], errors='coerce')
@@ -322,7 +555,7 @@ def show_expense_page():
             display_df,
             use_container_width=True,
             num_rows="dynamic",
-            key="expense_editor",
+            key=editor_key,
             column_config={
                 "id": st.column_config.NumberColumn("ID", disabled=True, help="자동 할당됩니다"),
                 "통계목명": st.column_config.SelectboxColumn("통계목명", options=get_erp_statistics_list(), required=True),
@@ -347,10 +580,6 @@ def show_expense_page():
             st.caption("💡 **참고**: 지출결의액은 천단위 구분 쉼표로 표시됩니다. 편집 시에는 숫자만 입력하세요.")
     
     
-    # 편집된 데이터를 세션에 저장 (저장 버튼을 눌러야 반영됨)
-    st.session_state.edited_expense_df = edited_df
-    st.session_state.max_id_for_new_rows = max_id
-    
     # 요약 정보
     summary = expense_manager.get_summary()
     st.markdown("---")
@@ -364,156 +593,44 @@ def show_expense_page():
     st.markdown("---")
     if st.button("💾 반영저장", key="save_expense_btn", type="primary", use_container_width=True):
         # 지출내역 저장 및 ERP/RCMS 집계 자동 실행
-        if 'edited_expense_df' in st.session_state and st.session_state.expense_manager:
-            edited_df = st.session_state.edited_expense_df
+        if st.session_state.expense_manager:
             expense_manager = st.session_state.expense_manager
-            current_df = expense_manager.get_all()
-            
-            if not current_df.empty:
-                existing_ids = set(current_df['id'].astype(int))
-            else:
-                existing_ids = set()
-            
-            new_rows = []
-            updated_rows = []
-            deleted_ids = set()  # 삭제된 ID 초기화
-            
-            # ID 자동 할당을 위한 최대값 가져오기
-            if 'max_id_for_new_rows' in st.session_state:
-                current_max_id = st.session_state.max_id_for_new_rows
-            else:
-                if not current_df.empty and 'id' in current_df.columns:
-                    current_max_id = int(current_df['id'].max()) if pd.notna(current_df['id'].max()) else 0
-                else:
-                    current_max_id = 0
-            
-            for idx, row in edited_df.iterrows():
-                if pd.isna(row.get('통계목명')) or pd.isna(row.get('사용일자')) or pd.isna(row.get('지출결의명')) or pd.isna(row.get('지출결의액')):
-                    continue
-                
-                # ID 처리: 없거나 0이면 자동 할당
-                row_id = None
-                if pd.notna(row.get('id')) and str(row['id']).strip() != '':
-                    try:
-                        row_id_val = int(float(row['id']))
-                        if row_id_val > 0:
-                            row_id = row_id_val
-                    except (ValueError, TypeError):
-                        row_id = None
-                
-                # ID가 없거나 0이면 자동 할당
-                if row_id is None or row_id == 0:
-                    current_max_id += 1
-                    row_id = current_max_id
-                
-                use_date = row['사용일자']
-                if isinstance(use_date, str):
-                    from datetime import datetime
-                    try:
-                        use_date = datetime.strptime(use_date, "%Y-%m-%d")
-                    except:
-                        use_date = pd.to_datetime(use_date, errors='coerce')
-                date_str = use_date.strftime("%Y-%m-%d") if hasattr(use_date, 'strftime') else str(use_date)
-                
-                # rcms_name만 표시되므로, rcms_name을 선택하면 rcms_code 자동 매핑
-                rcms_name = str(row['rcms_name']).strip() if pd.notna(row['rcms_name']) else ""
-                rcms_code = ""
-                
-                # rcms_name이 있으면 rcms_code 자동 찾기
-                if rcms_name:
-                    for item in get_rcms_items_list():
-                        if item['rcms_name'] == rcms_name:
-                            rcms_code = item['rcms_code']
-                            break
-                
-                if row_id is None or row_id not in existing_ids:
-                    new_row = {
-                        '통계목명': str(row['통계목명']),
-                        '사용일자': date_str,
-                        '지출결의명': str(row['지출결의명']),
-                        '상세내역': str(row['상세내역']) if pd.notna(row['상세내역']) else "",
-                        '지출결의액': int(float(str(row['지출결의액']).replace(',', ''))) if pd.notna(row['지출결의액']) else 0,
-                        'rcms_code': rcms_code,
-                        'rcms_name': rcms_name,
-                        'rcms_settled': bool(row['rcms_settled']) if pd.notna(row['rcms_settled']) else False
-                    }
-                    new_rows.append(new_row)
-                else:
-                    updated_row = {
-                        'id': row_id,
-                        '통계목명': str(row['통계목명']),
-                        '사용일자': date_str,
-                        '지출결의명': str(row['지출결의명']),
-                        '상세내역': str(row['상세내역']) if pd.notna(row['상세내역']) else "",
-                        '지출결의액': int(float(str(row['지출결의액']).replace(',', ''))) if pd.notna(row['지출결의액']) else 0,
-                        'rcms_code': rcms_code,
-                        'rcms_name': rcms_name,
-                        'rcms_settled': bool(row['rcms_settled']) if pd.notna(row['rcms_settled']) else False
-                    }
-                    updated_rows.append(updated_row)
-            
-            for new_row in new_rows:
-                expense_manager.add_row(new_row)
+            version_before = expense_manager.version
             
-            for updated_row in updated_rows:
-                expense_manager.update_row(updated_row['id'], updated_row)
+            # 편집기에서 바뀐 행만 반영 (표 크기와 무관하게 편집 건수만큼만 처리, 새 행 id는 자동 할당)
+            new_rows, updated_rows, deleted_ids = get_editor_changes(st.session_state.get(editor_key), row_ids)
             
-            # 삭제된 행 처리 (테이블에서 삭제된 행 자동 감지)
-            if not current_df.empty:
-                # edited_df에서 유효한 ID 추출
-                edited_ids = set()
-                for idx, row in edited_df.iterrows():
-                    if pd.notna(row.get('id')):
-                        try:
-                            edited_ids.add(int(float(row['id'])))
-                        except (ValueError, TypeError):
-                            pass
-                
-                # 삭제된 ID 찾기 (기존 ID 중에서 edited_df에 없는 것)
-                deleted_ids = existing_ids - edited_ids
-                for deleted_id in deleted_ids:
-                    expense_manager.delete_row(int(deleted_id))
+            # 추가/수정/삭제를 한 번에 반영 (값이 바뀐 행만 수정됨)
+            success, error_msg = expense_manager.apply_changes(new_rows, updated_rows, deleted_ids)
+            if not success:
+                st.error(f"지출내역 반영 실패: {error_msg}")
+                return
             
-            # 변경사항 확인을 위해 원본 데이터 백업
-            original_expense_df = current_df.copy()
-            original_erp_budget = st.session_state.erp_budget_df.copy()
-            original_rcms_budget = st.session_state.rcms_budget_df.copy()
+            # 값이 실제로 바뀐 행이 없으면(행 지문 동일) 버전이 그대로이므로 집계/저장 생략
+            if expense_manager.version == version_before:
+                st.info("ℹ️ 변경사항이 없습니다.")
+                return
             
-            # ERP/RCMS 집계 자동 실행
-            expense_df = expense_manager.get_all()
-            st.session_state.erp_budget_df = BudgetCalculator.calculate_erp_budget(
-                expense_df, st.session_state.erp_budget_df
-            )
-            st.session_state.rcms_budget_df, _ = BudgetCalculator.calculate_rcms_budget(
-                expense_df, st.session_state.rcms_budget_df
+            # ERP/RCMS 집계 자동 실행 (예산 시트가 아직 로드 중이면 끝날 때까지 대기)
+            if not fill_remaining_sheets():
+                return
+            st.session_state.erp_budget_df = budget_cache.calculate_erp_budget(
+                expense_manager, st.session_state.erp_budget_df
             )
-            
-            # 변경사항 확인
-            has_changes = has_data_changes(
-                new_rows, updated_rows, deleted_ids,
-                original_expense_df, expense_df,
-                original_erp_budget, st.session_state.erp_budget_df,
-                original_rcms_budget, st.session_state.rcms_budget_df
+            st.session_state.rcms_budget_df, _ = budget_cache.calculate_rcms_budget(
+                expense_manager, st.session_state.rcms_budget_df
             )
             
-            if not has_changes:
-                if 'edited_expense_df' in st.session_state:
-                    del st.session_state.edited_expense_df
-                st.info("ℹ️ 변경사항이 없습니다.")
-                return
-            
             # 모든 데이터 저장
             data = {
-                'EXPENSE': expense_manager.get_all(),
+                'EXPENSE': expense_manager.snapshot(),
                 'ERP_BUDGET': st.session_state.erp_budget_df,
                 'RCMS_BUDGET': st.session_state.rcms_budget_df,
                 'MAPPING_ERP_RCMS': st.session_state.mapping_df
             }
             
-            success, error_msg = st.session_state.data_manager.save_all(data)
+            success, error_msg = submit_save(data)
             if success:
-                if 'edited_expense_df' in st.session_state:
-                    del st.session_state.edited_expense_df
                 st.success("✅ 지출내역이 저장되었고, ERP/RCMS 예산이 자동으로 집계되었습니다!")
                 st.rerun()
             else:
@@ -524,6 +641,8 @@ def show_erp_budget_page():
     """ERP 예산 현황 페이지"""
     st.header("📈 ERP 예산 현황")
     
+    if not fill_remaining_sheets():
+        return
     if st.session_state.erp_budget_df.empty:
         st.warning("ERP 예산 데이터가 없습니다.")
         return
@@ -555,8 +674,10 @@ def show_erp_budget_page():
         col_save_erp1, col_save_erp2 = st.columns(2)
         with col_save_erp1:
             if st.button("💾 저장", key="save_erp_edit_btn", type="primary"):
-                # 변경사항 확인을 위해 원본 백업
-                original_erp_budget = st.session_state.erp_budget_df.copy()
+                # 변경사항 확인을 위해 수정 전 행 지문 보관
+                original_fingerprints = budget_fingerprints('ERP_BUDGET', st.session_state.erp_budget_df)
+                # 저장 대기 중인 스냅샷과 같은 객체를 수정하지 않도록 새 DataFrame에서 수정 (예산 시트는 수십 행)
+                st.session_state.erp_budget_df = st.session_state.erp_budget_df.copy()
                 
                 # "총액"을 제외한 항목들의 실행예산 업데이트
                 other_items_mask = edited_df['통계목명'] != '총액'
@@ -568,44 +689,36 @@ def show_erp_budget_page():
                 if len(total_row_idx) > 0:
                     st.session_state.erp_budget_df.loc[total_row_idx[0], '실행예산'] = total_budget
                 
-                # 변경사항 확인 (실행예산만 비교)
-                original_budget = original_erp_budget[['통계목명', '실행예산']].sort_values('통계목명').reset_index(drop=True)
-                current_budget = st.session_state.erp_budget_df[['통계목명', '실행예산']].sort_values('통계목명').reset_index(drop=True)
-                has_changes = not original_budget.equals(current_budget)
+                # 변경사항 확인 (실행예산 지문 비교)
+                changed = changed_keys(original_fingerprints, budget_fingerprints('ERP_BUDGET', st.session_state.erp_budget_df))
                 
-                if not has_changes:
+                if not changed:
                     st.info("ℹ️ 변경사항이 없습니다.")
                     st.session_state.edit_erp_budget = False
                     st.rerun()
                     return
                 
                 st.session_state.edit_erp_budget = False
+                record_budget_changes('ERP_BUDGET', '통계목명', '실행예산',
+                                      changed, st.session_state.erp_budget_df)
                 # ERP 집계 다시 실행
                 if st.session_state.expense_manager:
-                    expense_df = st.session_state.expense_manager.get_all()
-                    st.session_state.erp_budget_df = BudgetCalculator.calculate_erp_budget(
-                        expense_df, st.session_state.erp_budget_df
+                    st.session_state.erp_budget_df = budget_cache.calculate_erp_budget(
+                        st.session_state.expense_manager, st.session_state.erp_budget_df
                     )
                 # 저장
                 data = {
-                    'EXPENSE': st.session_state.expense_manager.get_all(),
+                    'EXPENSE': st.session_state.expense_manager.snapshot(),
                     'ERP_BUDGET': st.session_state.erp_budget_df,
                     'RCMS_BUDGET': st.session_state.rcms_budget_df,
                     'MAPPING_ERP_RCMS': st.session_state.mapping_df
                 }
-                success, error_msg = st.session_state.data_manager.save_all(data)
+                # ERP 예산만 변경되었으므로 해당 시트만 다시 씀
+                success, error_msg = submit_save(data, dirty_sheets=['ERP_BUDGET'])
                 if success:
                     st.success("✅ 예산이 저장되었습니다!")
                     # 파일 다운로드 버튼 추가
-                    with open(st.session_state.data_manager.file_path, "rb") as f:
-                        file_bytes = f.read()
-                        st.download_button(
-                            label="📥 파일 다운로드",
-                            data=file_bytes,
-                            file_name=st.session_state.data_manager.file_path.name,
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key="download_erp_btn"
-                        )
+                    show_download_button("download_erp_btn")
                     st.rerun()
                 else:
                     st.error(f"저장 실패: {error_msg}")
@@ -616,9 +729,8 @@ def show_erp_budget_page():
     else:
         # 집계 자동 실행 (지출내역 저장 시 자동으로 집계됨)
         if st.session_state.expense_manager:
-            expense_df = st.session_state.expense_manager.get_all()
-            st.session_state.erp_budget_df = BudgetCalculator.calculate_erp_budget(
-                expense_df, st.session_state.erp_budget_df
+            st.session_state.erp_budget_df = budget_cache.calculate_erp_budget(
+                st.session_state.expense_manager, st.session_state.erp_budget_df
             )
         
         # 테이블 표시
@@ -639,6 +751,9 @@ def show_execution_result_page():
     """집행 결과 통합 페이지 (ERP-RCMS 비교)"""
     st.header("📊 집행 결과")
     
+    if not fill_remaining_sheets():
+        return
+    
     # 데이터 검증
     if st.session_state.erp_budget_df.empty or st.session_state.rcms_budget_df.empty:
         st.warning("예산 데이터가 없습니다. 지출내역을 먼저 입력해주세요.")
@@ -648,22 +763,18 @@ def show_execution_result_page():
     # 예산 수정 모드가 아닐 때만 집계 실행 (수정 모드에서는 저장 시 집계됨)
     if not st.session_state.get('edit_erp_budget', False) and not st.session_state.get('edit_rcms_budget', False):
         if st.session_state.expense_manager:
-            expense_df = st.session_state.expense_manager.get_all()
-            st.session_state.erp_budget_df = BudgetCalculator.calculate_erp_budget(
-                expense_df, st.session_state.erp_budget_df
+            st.session_state.erp_budget_df = budget_cache.calculate_erp_budget(
+                st.session_state.expense_manager, st.session_state.erp_budget_df
             )
-            st.session_state.rcms_budget_df, unsettled_info = BudgetCalculator.calculate_rcms_budget(
-                expense_df, st.session_state.rcms_budget_df
+            st.session_state.rcms_budget_df, unsettled_info = budget_cache.calculate_rcms_budget(
+                st.session_state.expense_manager, st.session_state.rcms_budget_df
             )
         else:
             unsettled_info = {"미정산_금액": 0, "미정산_건수": 0, "미정산_ID_목록": []}
     else:
         # 예산 수정 모드일 때는 미정산 정보만 계산
         if st.session_state.expense_manager:
-            expense_df = st.session_state.expense_manager.get_all()
-            _, unsettled_info = BudgetCalculator.calculate_rcms_budget(
-                expense_df, st.session_state.rcms_budget_df
-            )
+            unsettled_info = st.session_state.expense_manager.get_totals().get_unsettled_info()
         else:
             unsettled_info = {"미정산_금액": 0, "미정산_건수": 0, "미정산_ID_목록": []}
     
@@ -718,6 +829,10 @@ def show_execution_result_page():
             st.write(f"**미정산 항목 ID**: {', '.join(map(str, sorted(unsettled_ids)))}")
             st.caption("💡 **안내**: 위 ID의 항목들은 RCMS 정산 여부 체크가 안 되어 있어 RCMS 집행액에 포함되지 않습니다.")
     
+    # 집행액 불일치 원인 분석
+    if not is_executed_valid and st.session_state.expense_manager:
+        show_gap_drilldown(st.session_state.expense_manager, erp_total_executed - rcms_total_executed)
+    
     st.caption("💡 **참고**: ERP는 모든 항목을 집계하고, RCMS는 정산 완료된 항목만 집계합니다. 집행액은 동일 금액이므로 일치해야 합니다. 실행예산은 ERP와 RCMS 분류 기준이 다르므로 차이가 있을 수 있습니다.")
     
     st.markdown("---")
@@ -753,8 +868,10 @@ def show_execution_result_page():
         col_save_erp1, col_save_erp2 = st.columns(2)
         with col_save_erp1:
             if st.button("💾 저장", key="save_erp_edit_btn_unified", type="primary"):
-                # 변경사항 확인을 위해 원본 백업
-                original_erp_budget = st.session_state.erp_budget_df.copy()
+                # 변경사항 확인을 위해 수정 전 행 지문 보관
+                original_fingerprints = budget_fingerprints('ERP_BUDGET', st.session_state.erp_budget_df)
+                # 저장 대기 중인 스냅샷과 같은 객체를 수정하지 않도록 새 DataFrame에서 수정 (예산 시트는 수십 행)
+                st.session_state.erp_budget_df = st.session_state.erp_budget_df.copy()
                 
                 # "총액"을 제외한 항목들의 실행예산 업데이트
                 other_items_mask = edited_df['통계목명'] != '총액'
@@ -766,44 +883,36 @@ def show_execution_result_page():
                 if len(total_row_idx) > 0:
                     st.session_state.erp_budget_df.loc[total_row_idx[0], '실행예산'] = total_budget
                 
-                # 변경사항 확인 (실행예산만 비교)
-                original_budget = original_erp_budget[['통계목명', '실행예산']].sort_values('통계목명').reset_index(drop=True)
-                current_budget = st.session_state.erp_budget_df[['통계목명', '실행예산']].sort_values('통계목명').reset_index(drop=True)
-                has_changes = not original_budget.equals(current_budget)
+                # 변경사항 확인 (실행예산 지문 비교)
+                changed = changed_keys(original_fingerprints, budget_fingerprints('ERP_BUDGET', st.session_state.erp_budget_df))
                 
-                if not has_changes:
+                if not changed:
                     st.info("ℹ️ 변경사항이 없습니다.")
                     st.session_state.edit_erp_budget = False
                     st.rerun()
                     return
                 
                 st.session_state.edit_erp_budget = False
+                record_budget_changes('ERP_BUDGET', '통계목명', '실행예산',
+                                      changed, st.session_state.erp_budget_df)
                 # ERP 집계 다시 실행
                 if st.session_state.expense_manager:
-                    expense_df = st.session_state.expense_manager.get_all()
-                    st.session_state.erp_budget_df = BudgetCalculator.calculate_erp_budget(
-                        expense_df, st.session_state.erp_budget_df
+                    st.session_state.erp_budget_df = budget_cache.calculate_erp_budget(
+                        st.session_state.expense_manager, st.session_state.erp_budget_df
                     )
                 # 저장
                 data = {
-                    'EXPENSE': st.session_state.expense_manager.get_all(),
+                    'EXPENSE': st.session_state.expense_manager.snapshot(),
                     'ERP_BUDGET': st.session_state.erp_budget_df,
                     'RCMS_BUDGET': st.session_state.rcms_budget_df,
                     'MAPPING_ERP_RCMS': st.session_state.mapping_df
                 }
-                success, error_msg = st.session_state.data_manager.save_all(data)
+                # ERP 예산만 변경되었으므로 해당 시트만 다시 씀
+                success, error_msg = submit_save(data, dirty_sheets=['ERP_BUDGET'])
                 if success:
                     st.success("✅ 예산이 저장되었습니다!")
                     # 파일 다운로드 버튼 추가
-                    with open(st.session_state.data_manager.file_path, "rb") as f:
-                        file_bytes = f.read()
-                        st.download_button(
-                            label="📥 파일 다운로드",
-                            data=file_bytes,
-                            file_name=st.session_state.data_manager.file_path.name,
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key="download_erp_btn"
-                        )
+                    show_download_button("download_erp_btn")
                     st.rerun()
                 else:
                     st.error(f"저장 실패: {error_msg}")
@@ -835,8 +944,10 @@ def show_execution_result_page():
         col_save_rcms1, col_save_rcms2 = st.columns(2)
         with col_save_rcms1:
             if st.button("💾 저장", key="save_rcms_edit_btn", type="primary"):
-                # 변경사항 확인을 위해 원본 백업
-                original_rcms_budget = st.session_state.rcms_budget_df.copy()
+                # 변경사항 확인을 위해 수정 전 행 지문 보관
+                original_fingerprints = budget_fingerprints('RCMS_BUDGET', st.session_state.rcms_budget_df)
+                # 저장 대기 중인 스냅샷과 같은 객체를 수정하지 않도록 새 DataFrame에서 수정 (예산 시트는 수십 행)
+                st.session_state.rcms_budget_df = st.session_state.rcms_budget_df.copy()
                 
                 # rcms_code를 기준으로 budget_amount 업데이트
                 for idx, row in edited_df.iterrows():
@@ -848,32 +959,32 @@ def show_execution_result_page():
                     if mask.any():
                         st.session_state.rcms_budget_df.loc[mask, 'budget_amount'] = budget_amount
                 
-                # 변경사항 확인 (budget_amount만 비교)
-                original_rcms = original_rcms_budget[['rcms_code', 'rcms_name', 'budget_amount']].sort_values('rcms_code').reset_index(drop=True)
-                current_rcms = st.session_state.rcms_budget_df[['rcms_code', 'rcms_name', 'budget_amount']].sort_values('rcms_code').reset_index(drop=True)
-                has_changes = not original_rcms.equals(current_rcms)
+                # 변경사항 확인 (budget_amount 지문 비교)
+                changed = changed_keys(original_fingerprints, budget_fingerprints('RCMS_BUDGET', st.session_state.rcms_budget_df))
                 
-                if not has_changes:
+                if not changed:
                     st.info("ℹ️ 변경사항이 없습니다.")
                     st.session_state.edit_rcms_budget = False
                     st.rerun()
                     return
                 
                 st.session_state.edit_rcms_budget = False
+                record_budget_changes('RCMS_BUDGET', 'rcms_code', 'budget_amount',
+                                      changed, st.session_state.rcms_budget_df)
                 # RCMS 집계 다시 실행
                 if st.session_state.expense_manager:
-                    expense_df = st.session_state.expense_manager.get_all()
-                    st.session_state.rcms_budget_df, _ = BudgetCalculator.calculate_rcms_budget(
-                        expense_df, st.session_state.rcms_budget_df
+                    st.session_state.rcms_budget_df, _ = budget_cache.calculate_rcms_budget(
+                        st.session_state.expense_manager, st.session_state.rcms_budget_df
                     )
                 # 저장
                 data = {
-                    'EXPENSE': st.session_state.expense_manager.get_all(),
+                    'EXPENSE': st.session_state.expense_manager.snapshot(),
                     'ERP_BUDGET': st.session_state.erp_budget_df,
                     'RCMS_BUDGET': st.session_state.rcms_budget_df,
                     'MAPPING_ERP_RCMS': st.session_state.mapping_df
                 }
-                success, error_msg = st.session_state.data_manager.save_all(data)
+                # RCMS 예산만 변경되었으므로 해당 시트만 다시 씀
+                success, error_msg = submit_save(data, dirty_sheets=['RCMS_BUDGET'])
                 if success:
                     st.success("✅ 예산이 저장되었습니다!")
                     st.rerun()
@@ -931,10 +1042,7 @@ def show_execution_result_page():
         
         # 미정산 정보
         if st.session_state.expense_manager:
-            expense_df = st.session_state.expense_manager.get_all()
-            _, unsettled_info = BudgetCalculator.calculate_rcms_budget(
-                expense_df, st.session_state.rcms_budget_df
-            )
+            unsettled_info = st.session_state.expense_manager.get_totals().get_unsettled_info()
             st.markdown("---")
             st.markdown("#### 미정산 정보")
             col_un1, col_un2 = st.columns(2)
@@ -943,6 +1051,11 @@ def show_execution_result_page():
             with col_un2:
                 st.metric("미정산 건수", unsettled_info['미정산_건수'])
     
+    # ERP-RCMS 대사 (매핑 기준)
+    if st.session_state.expense_manager:
+        st.markdown("---")
+        show_reconciliation_section(st.session_state.expense_manager)
+    
     # 시각화 섹션
     st.markdown("---")
     st.subheader("📈 집행 결과 시각화")
@@ -955,30 +1068,196 @@ def show_execution_result_page():
     st.markdown("#### RCMS 항목별 집행률")
     plot_rcms_budget_chart(st.session_state.rcms_budget_df)
     
+    # 기준일 집행 현황
+    if st.session_state.expense_manager:
+        st.markdown("---")
+        show_as_of_section(st.session_state.expense_manager)
+    
     # 파일 다운로드 버튼 (예산 수정 모드가 아닐 때만 표시)
     if not st.session_state.get('edit_erp_budget', False) and not st.session_state.get('edit_rcms_budget', False):
         st.markdown("---")
         st.subheader("📥 파일 다운로드")
         if st.session_state.data_manager and st.session_state.data_manager.file_path:
-            with open(st.session_state.data_manager.file_path, "rb") as f:
-                file_bytes = f.read()
-                st.download_button(
-                    label="📥 파일 다운로드",
-                    data=file_bytes,
-                    file_name=st.session_state.data_manager.file_path.name,
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="download_all_btn",
-                    use_container_width=True
-                )
+            show_download_button("download_all_btn", use_container_width=True)
+            show_backup_section()
+
+
+
+
+
+# 불일치 원인 행 표시 상한
+GAP_DISPLAY_ROWS = 500
+
+
+def show_gap_drilldown(expense_manager: ExpenseManager, gap: int):
+    """집행액 불일치 원인 분석 (차이를 만든 행, 합계가 차이와 같은 행 조합)"""
+    with st.expander("🔍 불일치 원인 분석", expanded=True):
+        analysis = explain_execution_gap(expense_manager.snapshot(), st.session_state.erp_budget_df,
+                                         st.session_state.rcms_budget_df)
+        rows_df = analysis['rows']
+        unexplained = gap - analysis['설명된_차이']
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("집행액 차이 (ERP - RCMS)", format_currency(gap))
+        with col2:
+            st.metric("원인 행으로 설명된 차이", format_currency(analysis['설명된_차이']))
+        with col3:
+            st.metric("설명되지 않은 차이", format_currency(unexplained))
+        if unexplained != 0:
+            st.caption("💡 설명되지 않은 차이가 있으면 예산 집계가 최신이 아닐 수 있습니다. 지출내역을 저장하거나 페이지를 새로고침하세요.")
+        
+        display_reconciliation_table(analysis['사유별'], ['차이_기여'])
+        if len(rows_df) > GAP_DISPLAY_ROWS:
+            st.caption(f"차이 기여가 큰 상위 {GAP_DISPLAY_ROWS}건만 표시합니다 (전체 {len(rows_df)}건).")
+        display_reconciliation_table(rows_df.head(GAP_DISPLAY_ROWS), ['지출결의액', '차이_기여'])
+        
+        # 합계가 지정 금액과 같은 행 조합
+        st.markdown("#### 합계가 일치하는 행 조합")
+        target = st.number_input("찾을 금액", value=int(gap), step=1000, key="gap_subset_target")
+        scope = st.radio("탐색 대상", ["원인 후보 행", "전체 지출내역"], horizontal=True, key="gap_subset_scope")
+        if st.button("🔎 조합 찾기", key="gap_subset_btn"):
+            if scope == "원인 후보 행":
+                candidates = rows_df[rows_df['차이_기여'] != 0]
+                ids, amounts = candidates['id'], candidates['차이_기여']
+            else:
+                snapshot = expense_manager.snapshot()
+                ids, amounts = snapshot['id'], snapshot['지출결의액']
+            combos, complete = find_subset_sums(ids, amounts, int(target))
+            if combos:
+                for combo in combos:
+                    st.write(f"- **ID** {', '.join(map(str, combo))} ({len(combo)}건)")
+            else:
+                st.info("합계가 일치하는 조합을 찾지 못했습니다.")
+            if not complete:
+                st.caption(f"💡 탐색 제한: 최대 {SUBSET_MAX_RESULTS}개 조합, {SUBSET_TIME_BUDGET:g}초, "
+                           f"3건 이상 조합은 앞쪽 후보 {MITM_MAX_ROWS}행에서만 찾습니다.")
+
 
+def show_reconciliation_section(expense_manager: ExpenseManager):
+    """ERP-RCMS 대사 (MAPPING_ERP_RCMS 시트 기준 통계목명별 차이와 매핑 위반 쌍)"""
+    st.subheader("🔗 ERP-RCMS 대사 (매핑 기준)")
+    if normalize_mapping(st.session_state.mapping_df).empty:
+        st.info("MAPPING_ERP_RCMS 시트에 매핑(ERP_통계목명, rcms_code, priority)을 입력하면 통계목명별 대사 결과가 표시됩니다.")
+        return
+    
+    summary_df, pairs_df = reconcile(expense_manager.get_crosstab(), st.session_state.mapping_df)
+    is_warning = pairs_df['사유'].isin(WARNING_REASONS)
+    violations_df = pairs_df[~is_warning]
+    warnings_df = pairs_df[is_warning]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("매핑 위반", f"{len(violations_df)}쌍 / {int(violations_df['건수'].sum())}건")
+    with col2:
+        st.metric("매핑 위반 금액", format_currency(int(violations_df['금액'].sum())))
+    with col3:
+        st.metric("우선순위 주의", f"{len(warnings_df)}쌍 / {int(warnings_df['건수'].sum())}건")
+    
+    display_reconciliation_table(summary_df, ['ERP 집행액', 'RCMS 정산액', '차이', '미정산액', '매핑 외 정산액'])
+    st.caption("💡 **참고**: 차이 = ERP 집행액 - 매핑된 rcms_code의 정산액 = 미정산액 + 매핑 외 정산액. "
+               "priority는 숫자가 작을수록 우선합니다.")
+    
+    if not violations_df.empty:
+        with st.expander(f"⚠️ 매핑 위반 ({len(violations_df)}쌍)"):
+            display_reconciliation_table(violations_df, ['금액', '정산액'])
+    if not warnings_df.empty:
+        with st.expander(f"ℹ️ 우선순위가 가장 높은 코드가 아닌 쌍 ({len(warnings_df)}쌍)"):
+            display_reconciliation_table(warnings_df, ['금액', '정산액'])
+
+
+def show_as_of_section(expense_manager: ExpenseManager):
+    """기준일 집행 현황 (기준일까지 사용된 지출만 집계, 정산 여부는 현재 값 기준)"""
+    st.subheader("📅 기준일 집행 현황")
+    timeline = expense_manager.get_timeline()
+    as_of = st.date_input("기준일", value=pd.Timestamp.today().date(), key="as_of_date")
+    
+    totals = timeline.totals_as_of(as_of)
+    erp_df = BudgetCalculator.calculate_erp_budget_from_totals(totals, st.session_state.erp_budget_df)
+    rcms_df, unsettled_info = BudgetCalculator.calculate_rcms_budget_from_totals(totals, st.session_state.rcms_budget_df)
+    erp_summary = BudgetCalculator.get_erp_summary(erp_df)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("ERP 집행액", format_currency(erp_summary['총_집행액']))
+    with col2:
+        st.metric("ERP 집행률", f"{erp_summary['총_집행률']:.2f}%")
+    with col3:
+        st.metric("RCMS 집행액", format_currency(int(rcms_df['used_amount'].sum())))
+    with col4:
+        st.metric("미정산", f"{unsettled_info['미정산_건수']}건 / {format_currency(unsettled_info['미정산_금액'])}")
+    st.caption(f"💡 **참고**: {as_of.strftime('%Y-%m-%d')}까지의 사용일자 기준 집계입니다. "
+               "RCMS 정산 여부는 현재 값을 따르며, 사용일자가 없는 항목은 제외됩니다.")
+    
+    with st.expander("기준일 ERP/RCMS 집계표"):
+        display_erp_budget_table(erp_df)
+        display_rcms_budget_table(rcms_df)
+    
+    plot_monthly_execution_chart(timeline.monthly_series('ERP'), erp_summary['총_예산'])
 
 
+def show_portfolio_page():
+    """포트폴리오 페이지 (여러 과제 통합 집행 결과)"""
+    st.title("📁 포트폴리오")
+    portfolio = st.session_state.portfolio
+    
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.info(f"**상위 폴더**: `{portfolio.root_folder}` · 과제 {len(portfolio.summary_df)}개")
+    with col2:
+        if st.button("🔄 다시 불러오기", key="portfolio_reload_btn"):
+            with st.spinner("과제 파일을 불러오는 중..."):
+                portfolio.discover()
+                portfolio.load()
+            st.rerun()
+        if st.button("← 돌아가기", key="portfolio_back_btn"):
+            st.session_state.page = 'file_select'
+            st.rerun()
+    
+    if portfolio.errors:
+        with st.expander(f"⚠️ 불러오지 못한 과제 {len(portfolio.errors)}개"):
+            for name, error in portfolio.errors.items():
+                st.write(f"- **{name}**: {error}")
+    
+    if portfolio.summary_df.empty:
+        st.warning("불러온 과제가 없습니다.")
+        return
+    
+    # 과제별 요약
+    st.markdown("#### 과제별 요약")
+    summary_df = portfolio.summary_df.copy()
+    for col in ['실행예산', '집행액', '잔액', '미정산_금액']:
+        summary_df[col] = summary_df[col].apply(lambda x: format_currency(int(x)))
+    summary_df['집행률'] = summary_df['집행률'].apply(lambda x: f"{x:.2f}%")
+    st.dataframe(summary_df, use_container_width=True, hide_index=True)
+    
+    # 전체 합계
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### ERP 기준 합계")
+        display_erp_budget_table(portfolio.get_erp_totals())
+    with col2:
+        st.markdown("#### RCMS 기준 합계")
+        display_rcms_budget_table(portfolio.get_rcms_totals())
+    
+    # 과제 × 항목 상세
+    with st.expander("과제별 상세 (ERP)"):
+        st.dataframe(portfolio.erp_df.drop(columns=['updated_at'], errors='ignore'),
+                     use_container_width=True, hide_index=True)
+    with st.expander("과제별 상세 (RCMS)"):
+        st.dataframe(portfolio.rcms_df.drop(columns=['updated_at'], errors='ignore'),
+                     use_container_width=True, hide_index=True)
 
 
 # 메인 실행
 if __name__ == "__main__":
     if st.session_state.page == 'file_select':
         show_file_select_page()
+    elif st.session_state.page == 'portfolio':
+        if st.session_state.portfolio is None:
+            st.session_state.page = 'file_select'
+            st.rerun()
+        show_portfolio_page()
     else:
         if not st.session_state.current_file_path:
             st.session_state.page = 'file_select'
@@ -0,0 +1,182 @@
+"""
+백업 저장소 모듈
+master.xlsx의 zip 파트(시트별 XML 등)를 내용 해시로 한 번만 저장하고,
+버전별 목록(manifest)으로 언제든 전체 엑셀 파일을 복원
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, List, Set
+import hashlib
+import json
+import os
+import zipfile
+import zlib
+
+from xlsx_patch import read_raw_member, RawZipWriter
+
+
+BACKUP_FOLDER_NAME = ".backups"
+
+# 보존 정책: 최근 N개 + 최근 며칠은 하루 1개 + 그 이전은 한 달에 1개
+KEEP_RECENT = 10
+KEEP_DAILY_DAYS = 30
+
+VERSION_FORMAT = "%Y%m%d_%H%M%S_%f"
+
+
+class BackupStore:
+    """내용 주소 기반(content-addressed) 백업 저장소 클래스"""
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        self.root = self.file_path.parent / BACKUP_FOLDER_NAME / self.file_path.stem
+        self.blob_dir = self.root / "blobs"
+        self.version_dir = self.root / "versions"
+
+    def _blob_path(self, digest: str) -> Path:
+        """blob 파일 경로 (해시 앞 2자리로 하위 폴더 분산)"""
+        return self.blob_dir / digest[:2] / digest
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        """blob 저장 (이미 있으면 생략)"""
+        path = self._blob_path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def snapshot(self, source_path: Optional[Path] = None) -> Optional[str]:
+        """엑셀 파일(기본: 현재 파일)을 백업하고 버전 ID 반환
+
+        zip 멤버의 압축된 바이트를 그대로 해시하므로, 부분 저장으로 바뀌지 않은
+        시트는 새 blob을 만들지 않는다. 비압축 멤버만 zlib으로 압축하여 저장한다.
+        """
+        source_path = Path(source_path) if source_path else self.file_path
+        if not source_path.exists():
+            return None
+
+        members = []
+        with zipfile.ZipFile(source_path, "r") as zf, open(source_path, "rb") as raw_file:
+            for info in zf.infolist():
+                raw = read_raw_member(raw_file, info)
+                digest = hashlib.sha256(raw).hexdigest()
+                if info.compress_type == zipfile.ZIP_STORED:
+                    blob, encoding = zlib.compress(raw), "zlib"
+                else:
+                    blob, encoding = raw, "raw"
+                self._write_blob(digest, blob)
+                members.append({
+                    "name": info.filename,
+                    "hash": digest,
+                    "encoding": encoding,
+                    "compress_type": info.compress_type,
+                    "crc": info.CRC,
+                    "file_size": info.file_size,
+                    "compress_size": info.compress_size,
+                    "date_time": list(info.date_time),
+                })
+
+        version_id = datetime.now().strftime(VERSION_FORMAT)
+        manifest = {
+            "version": version_id,
+            "created_at": datetime.now().isoformat(),
+            "source": self.file_path.name,
+            "size": source_path.stat().st_size,
+            "members": members,
+        }
+        self.version_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.version_dir / f"{version_id}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(temp_path, self.version_dir / f"{version_id}.json")
+        return version_id
+
+    def list_versions(self) -> List[Dict]:
+        """백업 버전 목록 (최신순)"""
+        if not self.version_dir.exists():
+            return []
+        versions = []
+        for path in sorted(self.version_dir.glob("*.json"), reverse=True):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                continue
+            versions.append({
+                "version": manifest["version"],
+                "created_at": datetime.fromisoformat(manifest["created_at"]),
+                "size": manifest.get("size", 0),
+            })
+        return versions
+
+    def _load_manifest(self, version_id: str) -> Dict:
+        """버전 manifest 읽기"""
+        with open(self.version_dir / f"{version_id}.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def restore(self, version_id: str, dst_path: Path) -> Path:
+        """지정 버전을 전체 엑셀 파일로 복원"""
+        manifest = self._load_manifest(version_id)
+        dst_path = Path(dst_path)
+        temp_path = dst_path.with_name(f".{dst_path.name}.tmp")
+        with open(temp_path, "wb") as dst_file:
+            dst = RawZipWriter(dst_file)
+            for member in manifest["members"]:
+                with open(self._blob_path(member["hash"]), "rb") as f:
+                    blob = f.read()
+                raw = zlib.decompress(blob) if member["encoding"] == "zlib" else blob
+                info = zipfile.ZipInfo(member["name"], date_time=tuple(member["date_time"]))
+                info.compress_type = member["compress_type"]
+                info.CRC = member["crc"]
+                info.file_size = member["file_size"]
+                info.compress_size = member["compress_size"]
+                dst.write_raw(info, raw)
+            dst.close()
+        os.replace(temp_path, dst_path)
+        return dst_path
+
+    def prune(self, keep_recent: int = KEEP_RECENT, keep_daily_days: int = KEEP_DAILY_DAYS,
+              now: Optional[datetime] = None) -> int:
+        """보존 정책에 따라 오래된 버전 정리 후 참조되지 않는 blob 삭제 (삭제한 버전 수 반환)"""
+        versions = self.list_versions()
+        if not versions:
+            return 0
+        now = now or datetime.now()
+        daily_cutoff = now - timedelta(days=keep_daily_days)
+
+        keep: Set[str] = {v["version"] for v in versions[:keep_recent]}
+        seen_periods: Set[str] = set()
+        # 최신순으로 순회하며 기간(일/월)마다 가장 최근 버전 하나만 유지
+        for v in versions:
+            created_at = v["created_at"]
+            if created_at >= daily_cutoff:
+                period = created_at.strftime("D%Y-%m-%d")
+            else:
+                period = created_at.strftime("M%Y-%m")
+            if period not in seen_periods:
+                seen_periods.add(period)
+                keep.add(v["version"])
+
+        removed = 0
+        for v in versions:
+            if v["version"] not in keep:
+                (self.version_dir / f"{v['version']}.json").unlink()
+                removed += 1
+        if removed:
+            self._collect_garbage()
+        return removed
+
+    def _collect_garbage(self) -> None:
+        """어떤 버전에서도 참조하지 않는 blob 삭제"""
+        referenced = set()
+        for v in self.list_versions():
+            manifest = self._load_manifest(v["version"])
+            referenced.update(m["hash"] for m in manifest["members"])
+        if not self.blob_dir.exists():
+            return
+        for path in self.blob_dir.glob("*/*"):
+            if path.name not in referenced:
+                path.unlink()
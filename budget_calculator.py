@@ -1,21 +1,56 @@
 """
 예산 집계 계산 모듈
 ERP 기준 및 RCMS 기준 집계 계산
+- BudgetCache: (지출내역 버전, 예산 입력값 지문)을 키로 집계 결과를 재사용하는 LRU 캐시
 """
-from typing import Dict, Tuple
+from collections import OrderedDict
+import threading
+from typing import Dict, Tuple, Callable, Hashable
 import pandas as pd
-import numpy as np
+
+from expense_totals import ExpenseTotals
+from fingerprint import row_fingerprints
+
+
+# 집계 결과로 채워지는 컬럼 (캐시 키의 예산 입력값에서 제외)
+ERP_OUTPUT_COLUMNS = ['집행액', '잔액', '집행률', 'updated_at']
+RCMS_OUTPUT_COLUMNS = ['used_amount', 'balance', 'rate', 'updated_at']
+
+# 캐시에 보관하는 최대 결과 수
+BUDGET_CACHE_SIZE = 16
 
 
 class BudgetCalculator:
-    """예산 집계 계산 클래스"""
+    """예산 집계 계산 클래스
+    
+    expense_df는 expense_schema의 타입 계약(로드 시 적용)을 따른다고 가정한다.
+    (통계목명/rcms_code는 category, 지출결의액은 int64, rcms_settled는 bool)
+    *_from_totals는 ExpenseManager.get_totals()의 누적 합계로 같은 결과를 통계목/RCMS 항목 수만큼의 계산으로 만든다.
+    """
     
     @staticmethod
     def calculate_erp_budget(expense_df: pd.DataFrame, erp_budget_df: pd.DataFrame) -> pd.DataFrame:
         """ERP 기준 집계 계산"""
+        return BudgetCalculator.calculate_erp_budget_from_totals(ExpenseTotals.from_frame(expense_df), erp_budget_df)
+    
+    @staticmethod
+    def calculate_budgets(expense_df: pd.DataFrame, erp_budget_df: pd.DataFrame,
+                          rcms_budget_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+        """ERP/RCMS 기준 집계를 지출내역 한 번 집계로 계산 (calculate_erp_budget, calculate_rcms_budget과 같은 결과)"""
+        totals = ExpenseTotals.from_frame(expense_df)
+        erp_df = BudgetCalculator.calculate_erp_budget_from_totals(totals, erp_budget_df)
+        rcms_df, unsettled_info = BudgetCalculator.calculate_rcms_budget_from_totals(totals, rcms_budget_df)
+        return erp_df, rcms_df, unsettled_info
+    
+    @staticmethod
+    def calculate_erp_budget_from_totals(totals: ExpenseTotals, erp_budget_df: pd.DataFrame) -> pd.DataFrame:
+        """ERP 기준 집계 계산 (누적 합계 사용)"""
         result_df = erp_budget_df.copy()
+        # 엑셀에서 0으로 읽힌 집행률은 정수 컬럼이 되므로 실수로 맞춤
+        if '집행률' in result_df.columns:
+            result_df['집행률'] = result_df['집행률'].astype(float)
         
-        if expense_df.empty:
+        if totals.row_count == 0:
             # 지출내역이 없으면 집행액, 잔액, 집행률을 0으로 설정
             result_df['집행액'] = 0
             result_df['잔액'] = result_df['실행예산']
@@ -23,16 +58,8 @@ class BudgetCalculator:
             return result_df
         
         # ERP는 모든 항목을 집계 (ERP는 무조건 정산된 것으로 봄)
-        # 통계목명별 지출결의액 합계 ("총액" 제외)
-        expense_summary = expense_df.groupby('통계목명')['지출결의액'].sum().reset_index()
-        expense_summary.columns = ['통계목명', '집행액']
-        
-        # ERP_BUDGET과 조인 ("총액" 제외)
-        result_df = result_df.merge(expense_summary, on='통계목명', how='left', suffixes=('', '_new'))
-        
-        # 집행액 업데이트 (없는 경우 0)
-        result_df['집행액'] = result_df['집행액_new'].fillna(0).astype(int)
-        result_df = result_df.drop(columns=['집행액_new'], errors='ignore')
+        # 통계목명별 지출결의액 합계 (없는 경우 0, "총액"은 아래에서 계산)
+        result_df['집행액'] = result_df['통계목명'].map(totals.executed).fillna(0).astype(int)
         
         # "총액" 행은 다른 항목들의 합계로 계산
         total_row_idx = result_df[result_df['통계목명'] == '총액'].index
@@ -69,9 +96,16 @@ class BudgetCalculator:
     @staticmethod
     def calculate_rcms_budget(expense_df: pd.DataFrame, rcms_budget_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
         """RCMS 기준 집계 계산"""
+        return BudgetCalculator.calculate_rcms_budget_from_totals(ExpenseTotals.from_frame(expense_df), rcms_budget_df)
+    
+    @staticmethod
+    def calculate_rcms_budget_from_totals(totals: ExpenseTotals, rcms_budget_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        """RCMS 기준 집계 계산 (누적 합계 사용)"""
         result_df = rcms_budget_df.copy()
+        if 'rate' in result_df.columns:
+            result_df['rate'] = result_df['rate'].astype(float)
         
-        if expense_df.empty:
+        if totals.row_count == 0:
             # 지출내역이 없으면 모든 값을 0으로 설정
             result_df['used_amount'] = 0
             result_df['balance'] = result_df['budget_amount']
@@ -83,31 +117,8 @@ class BudgetCalculator:
                 "미정산_ID_목록": []
             }
         
-        # 정산 완료된 항목만 집계 (rcms_settled == True)
-        # 데이터 타입 안전성을 위해 boolean으로 변환 후 비교
-        expense_df = expense_df.copy()  # 원본 데이터 보호
-        if 'rcms_settled' in expense_df.columns:
-            # NaN, None, 문자열 등을 boolean으로 안전하게 변환
-            # 먼저 문자열로 변환 후 boolean으로 변환 (더 안전)
-            expense_df['rcms_settled'] = expense_df['rcms_settled'].fillna(False)
-            # 숫자나 문자열도 처리
-            expense_df['rcms_settled'] = expense_df['rcms_settled'].astype(str).str.lower().isin(['true', '1', 'yes', 'y', 't']).astype(bool)
-        settled_expense_df = expense_df[expense_df['rcms_settled'] == True].copy()
-        
-        # rcms_code별 지출결의액 합계
-        if settled_expense_df.empty:
-            # 정산 완료된 항목이 없으면 모든 used_amount를 0으로 설정
-            result_df['used_amount'] = 0
-        else:
-            expense_summary = settled_expense_df.groupby('rcms_code')['지출결의액'].sum().reset_index()
-            expense_summary.columns = ['rcms_code', 'used_amount']
-            
-            # RCMS_BUDGET과 조인
-            result_df = result_df.merge(expense_summary, on='rcms_code', how='left', suffixes=('', '_new'))
-            
-            # used_amount 업데이트 (없는 경우 0)
-            result_df['used_amount'] = result_df['used_amount_new'].fillna(0).astype(int)
-            result_df = result_df.drop(columns=['used_amount_new'], errors='ignore')
+        # 정산 완료된 항목만 rcms_code별로 집계 (없는 경우 0)
+        result_df['used_amount'] = result_df['rcms_code'].map(totals.settled).fillna(0).astype(int)
         
         # balance 계산
         result_df['balance'] = result_df['budget_amount'] - result_df['used_amount']
@@ -117,26 +128,12 @@ class BudgetCalculator:
         result_df.loc[mask, 'rate'] = (result_df.loc[mask, 'used_amount'] / result_df.loc[mask, 'budget_amount']) * 100
         result_df.loc[~mask, 'rate'] = 0.0
         
-        # 미정산 금액 계산
-        # expense_df는 이미 위에서 복사본으로 처리되었으므로 다시 복사할 필요 없음
-        # 하지만 안전성을 위해 다시 확인
-        if 'rcms_settled' in expense_df.columns:
-            expense_df['rcms_settled'] = expense_df['rcms_settled'].fillna(False)
-            expense_df['rcms_settled'] = expense_df['rcms_settled'].astype(str).str.lower().isin(['true', '1', 'yes', 'y', 't']).astype(bool)
-        unsettled_df = expense_df[expense_df['rcms_settled'] == False]
-        unsettled_amount = int(unsettled_df['지출결의액'].sum()) if not unsettled_df.empty else 0
-        unsettled_count = len(unsettled_df)
-        unsettled_ids = unsettled_df['id'].tolist() if not unsettled_df.empty and 'id' in unsettled_df.columns else []
-        
         # updated_at 업데이트
         from datetime import datetime
         result_df['updated_at'] = datetime.now()
         
-        return result_df, {
-            "미정산_금액": unsettled_amount,
-            "미정산_건수": unsettled_count,
-            "미정산_ID_목록": unsettled_ids
-        }
+        # 미정산 금액/건수/id 목록
+        return result_df, totals.get_unsettled_info()
     
     @staticmethod
     def get_erp_summary(erp_budget_df: pd.DataFrame) -> Dict:
@@ -172,3 +169,81 @@ class BudgetCalculator:
             "총_집행률": round(total_rate, 2)
         }
 
+
+class BudgetCache:
+    """BudgetCalculator 결과 캐시 (LRU, 적중/실패 횟수 기록)
+    
+    키는 (시트, ExpenseManager.cache_key, 예산 입력값 지문)이므로 지출내역이나 예산이 바뀌면 새로 계산한다.
+    반환값은 복사본이라 호출한 쪽에서 수정해도 캐시에 영향이 없다.
+    Streamlit 세션 스레드가 전역 인스턴스를 함께 쓰므로 항목과 횟수는 잠금 안에서만 읽고 바꾼다.
+    """
+    
+    def __init__(self, max_entries: int = BUDGET_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _lookup(self, key: Hashable, compute: Callable[[], object]) -> object:
+        """캐시 조회 (없으면 계산 후 저장, 오래된 항목부터 제거)
+        
+        계산은 잠금 밖에서 하므로 다른 세션의 조회를 막지 않는다. 같은 키를 동시에 계산하면 먼저 저장된 결과를 쓴다.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            self._entries[key] = value
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+    
+    @staticmethod
+    def _budget_key(budget_df: pd.DataFrame, output_columns: list) -> Tuple:
+        """예산 입력값 지문 (집계 결과 컬럼 제외)"""
+        columns = [c for c in budget_df.columns if c not in output_columns]
+        return tuple(columns), tuple(row_fingerprints(budget_df, columns).tolist())
+    
+    def calculate_erp_budget(self, expense_manager, erp_budget_df: pd.DataFrame) -> pd.DataFrame:
+        """ERP 기준 집계 (BudgetCalculator.calculate_erp_budget_from_totals 결과 재사용)"""
+        key = ('ERP_BUDGET', expense_manager.cache_key, self._budget_key(erp_budget_df, ERP_OUTPUT_COLUMNS))
+        result = self._lookup(key, lambda: BudgetCalculator.calculate_erp_budget_from_totals(
+            expense_manager.get_totals(), erp_budget_df))
+        return result.copy()
+    
+    def calculate_rcms_budget(self, expense_manager, rcms_budget_df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        """RCMS 기준 집계 (BudgetCalculator.calculate_rcms_budget_from_totals 결과 재사용)"""
+        key = ('RCMS_BUDGET', expense_manager.cache_key, self._budget_key(rcms_budget_df, RCMS_OUTPUT_COLUMNS))
+        result_df, unsettled_info = self._lookup(key, lambda: BudgetCalculator.calculate_rcms_budget_from_totals(
+            expense_manager.get_totals(), rcms_budget_df))
+        return result_df.copy(), dict(unsettled_info)
+    
+    def get_stats(self) -> Dict:
+        """적중/실패 횟수와 보관 중인 결과 수"""
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self._entries)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total * 100, 2) if total else 0.0,
+            "entries": entries
+        }
+    
+    def clear(self) -> None:
+        """보관 중인 결과와 횟수 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 전역 집계 캐시 (키에 ExpenseManager 인스턴스 번호가 들어가므로 세션/파일 간에 섞이지 않음)
+budget_cache = BudgetCache()
@@ -0,0 +1,249 @@
+"""
+변경 저널 모듈
+지출내역 추가/수정/삭제와 예산 변경을 master 파일 옆 JSONL 파일에 한 줄씩 기록하고,
+로드 시 마지막 엑셀 스냅샷 위에 다시 적용(replay)
+"""
+from datetime import datetime, date
+from pathlib import Path
+from typing import Optional, Dict, List, Set, Tuple, Callable, Any
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from expense_schema import apply_expense_schema, union_categories
+
+
+# 저널이 이 크기를 넘으면 엑셀 파일로 압축(compaction)
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# 지출내역 변경 op (EXPENSE 시트에 적용)
+EXPENSE_OPS = ("add", "update", "delete")
+
+def get_journal_path(file_path: Path) -> Path:
+    """master 파일에 대응하는 저널 파일 경로"""
+    return file_path.parent / f"{file_path.stem}.journal.jsonl"
+
+
+def _json_default(value: Any) -> Any:
+    """JSON 직렬화 보조 (날짜, NumPy 값)"""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+class ChangeJournal:
+    """append-only 변경 저널 클래스 (ExpenseManager 리스너로 등록 가능)"""
+
+    def __init__(self, file_path: Path, compact_bytes: int = JOURNAL_COMPACT_BYTES):
+        self.path = get_journal_path(Path(file_path))
+        self.compact_bytes = compact_bytes
+        # 크기 임계값을 넘었을 때 호출 (DataManager.compact)
+        self.on_threshold: Optional[Callable[[], Any]] = None
+        # 기록과 비우기가 서로 다른 스레드에서 일어날 수 있음 (백그라운드 저장)
+        self._lock = threading.RLock()
+
+    def exists(self) -> bool:
+        """기록된 변경이 있는지 확인"""
+        return self.path.exists() and self.path.stat().st_size > 0
+
+    def size_bytes(self) -> int:
+        """저널 파일 크기"""
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def append(self, entry: Dict) -> None:
+        """변경 1건 기록 (fsync까지 수행하여 비정상 종료에도 보존)"""
+        self.append_many([entry])
+
+    def append_many(self, entries: List[Dict]) -> None:
+        """변경 여러 건을 한 번의 쓰기/fsync로 기록"""
+        if not entries:
+            return
+        ts = datetime.now().isoformat()
+        lines = "".join(
+            json.dumps({"ts": ts, **entry}, ensure_ascii=False, default=_json_default) + "\n"
+            for entry in entries
+        )
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+        if self.on_threshold and self.size_bytes() >= self.compact_bytes:
+            self.on_threshold()
+
+    def read_entries(self, offset: Optional[int] = None) -> List[Dict]:
+        """기록된 변경 목록 (마지막 줄이 잘린 경우 무시, offset을 지정하면 그 위치까지만)"""
+        if not self.path.exists():
+            return []
+        with self._lock:
+            with open(self.path, "rb") as f:
+                content = f.read() if offset is None else f.read(offset)
+        entries = []
+        for line in content.decode("utf-8", errors="replace").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 기록 도중 중단된 마지막 줄
+                break
+        return entries
+
+    def pending_sheets(self, offset: Optional[int] = None) -> Set[str]:
+        """저널(offset까지)에 아직 엑셀 파일로 반영되지 않은 변경이 있는 시트 이름"""
+        sheets = set()
+        for entry in self.read_entries(offset):
+            if entry.get("op") in EXPENSE_OPS:
+                sheets.add("EXPENSE")
+            elif entry.get("op") == "budget" and entry.get("sheet"):
+                sheets.add(entry["sheet"])
+        return sheets
+
+    def clear(self, offset: Optional[int] = None) -> None:
+        """저널 비우기 (엑셀 파일에 반영된 뒤 호출)
+
+        offset을 지정하면 그 위치까지의 기록만 지우고 이후에 추가된 기록은 남긴다.
+        """
+        with self._lock:
+            try:
+                if not self.path.exists():
+                    return
+                if offset is None or offset >= self.size_bytes():
+                    self.path.unlink()
+                    return
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    remaining = f.read()
+                temp_path = self.path.with_suffix(".tmp")
+                with open(temp_path, "wb") as f:
+                    f.write(remaining)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"저널 삭제 오류: {e}")
+
+    # ExpenseManager 변경 리스너
+    def on_add(self, row: Dict) -> None:
+        self.append({"op": "add", "row": row})
+
+    def on_update(self, row_id: int, changes: Dict) -> None:
+        self.append({"op": "update", "id": int(row_id), "changes": changes})
+
+    def on_delete(self, row_ids: List[int]) -> None:
+        self.append({"op": "delete", "ids": [int(i) for i in row_ids]})
+
+    def on_changes(self, added: List[Dict], updated: List[Tuple[int, Dict]], deleted_ids: List[int]) -> None:
+        """ExpenseManager.apply_changes 결과를 한 번에 기록"""
+        entries = [{"op": "update", "id": int(row_id), "changes": changes} for row_id, changes in updated]
+        if deleted_ids:
+            entries.append({"op": "delete", "ids": [int(i) for i in deleted_ids]})
+        entries.extend({"op": "add", "row": row} for row in added)
+        self.append_many(entries)
+
+    def record_budget_change(self, sheet_name: str, key_column: str, key: Any,
+                             column: str, value: Any) -> None:
+        """예산 시트 셀 변경 기록"""
+        self.append({"op": "budget", "sheet": sheet_name, "key_column": key_column,
+                     "key": key, "column": column, "value": value})
+
+    def replay(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """엑셀 스냅샷 위에 기록된 변경 적용 (같은 변경을 여러 번 적용해도 결과가 같음)"""
+        entries = self.read_entries()
+        if not entries:
+            return data
+
+        data = dict(data)
+        expense_ops = [e for e in entries if e.get("op") in EXPENSE_OPS]
+        if expense_ops and 'EXPENSE' in data:
+            data['EXPENSE'] = self._replay_expense(data['EXPENSE'], expense_ops)
+
+        for entry in entries:
+            if entry.get("op") != "budget" or entry.get("sheet") not in data:
+                continue
+            sheet_name = entry["sheet"]
+            df = data[sheet_name].copy()
+            mask = df[entry["key_column"]].astype(str) == str(entry["key"])
+            if mask.any():
+                df.loc[mask, entry["column"]] = entry["value"]
+            data[sheet_name] = df
+        return data
+
+    def _replay_expense(self, expense_df: pd.DataFrame, entries: List[Dict]) -> pd.DataFrame:
+        """지출내역 변경 적용 (id 기준 upsert/수정/삭제)
+
+        변경을 먼저 id별 최종 상태로 합친 뒤, 바뀌지 않은 행은 그대로 두고
+        변경된 행만 새로 만들어 원래 위치(새 행은 끝)에 끼워 넣는다.
+        """
+        columns = list(expense_df.columns)
+        if not expense_df["id"].is_unique:
+            expense_df = expense_df.drop_duplicates("id", keep="last")
+        ids = pd.Index(expense_df["id"])
+        base_ids = set(ids)
+        # 파일의 행 중 삭제된 id / 수정할 값, 새로 만들 행 (기존 id를 다시 추가한 경우 포함)
+        deleted: Set[int] = set()
+        changes: Dict[int, Dict] = {}
+        rows: Dict[int, Dict] = {}
+        for entry in entries:
+            op = entry["op"]
+            if op == "add":
+                row_id = int(entry["row"]["id"])
+                rows[row_id] = {**{c: None for c in columns}, **entry["row"]}
+                changes.pop(row_id, None)
+            elif op == "update":
+                row_id = entry["id"]
+                if row_id in rows:
+                    rows[row_id].update(entry["changes"])
+                elif row_id in base_ids and row_id not in deleted:
+                    changes.setdefault(row_id, {}).update(entry["changes"])
+            elif op == "delete":
+                for row_id in entry["ids"]:
+                    rows.pop(row_id, None)
+                    changes.pop(row_id, None)
+                    if row_id in base_ids:
+                        deleted.add(row_id)
+
+        # 파일에 있던 행을 그대로 다시 추가한 경우는 제자리 교체, 삭제 뒤 다시 추가한 경우는 끝에 추가
+        replaced = {row_id: row for row_id, row in rows.items() if row_id in base_ids and row_id not in deleted}
+        touched = set(changes) | set(replaced)
+        if changes:
+            updated_ids = list(changes)
+            records = expense_df.iloc[ids.get_indexer(updated_ids)].to_dict("records")
+            for row_id, record in zip(updated_ids, records):
+                replaced[row_id] = {**record, **changes[row_id]}
+
+        drop = deleted | touched
+        keep = ~ids.isin(list(drop)) if drop else np.ones(len(ids), dtype=bool)
+        kept = expense_df[keep]
+        appended = [row for row_id, row in rows.items() if row_id not in replaced]
+        if not touched and not appended:
+            return kept.reset_index(drop=True)
+
+        # 원래 위치 순서 키: 남은 행/교체한 행은 원래 위치, 새 행은 끝
+        replaced_ids = list(replaced)
+        order = np.concatenate([
+            np.flatnonzero(keep),
+            ids.get_indexer(replaced_ids),
+            len(ids) + np.arange(len(appended)),
+        ])
+        new_rows = pd.DataFrame([replaced[i] for i in replaced_ids] + appended)
+        new_rows = new_rows[columns + [c for c in new_rows.columns if c not in columns]]
+        new_rows = apply_expense_schema(new_rows)
+        if kept.empty:
+            return new_rows.iloc[np.argsort(order, kind="stable")].reset_index(drop=True)
+        kept, new_rows = union_categories([kept, new_rows])
+        result = pd.concat([kept, new_rows], ignore_index=True)
+        return apply_expense_schema(result.iloc[np.argsort(order, kind="stable")].reset_index(drop=True))
@@ -16,7 +16,10 @@ class ConfigManager:
         self.default_config = {
             "last_work_folder": "",
             "date_format": "YYYY-MM-DD",
-            "currency_format": "ko_KR"
+            "currency_format": "ko_KR",
+            # 저장 방식 기본값 ('xlsx' 또는 'sqlite')와 과제 폴더별 지정값
+            "storage_backend": "xlsx",
+            "project_backends": {}
         }
     
     def load(self) -> Dict[str, Any]:
@@ -62,6 +65,21 @@ class ConfigManager:
         """마지막 작업 폴더 업데이트"""
         return self.set("last_work_folder", folder_path)
 
+    
+    def get_project_backend(self, folder_path: str) -> str:
+        """과제 폴더의 저장 방식 반환 (지정값이 없으면 기본값)"""
+        config = self.load()
+        key = str(Path(folder_path).resolve())
+        return config.get("project_backends", {}).get(key, config.get("storage_backend", "xlsx"))
+    
+    def set_project_backend(self, folder_path: str, backend: str) -> bool:
+        """과제 폴더의 저장 방식 설정"""
+        config = self.load()
+        backends = dict(config.get("project_backends", {}))
+        backends[str(Path(folder_path).resolve())] = backend
+        config["project_backends"] = backends
+        return self.save(config)
+
 
 # 전역 설정 관리자 인스턴스
 config_manager = ConfigManager()
@@ -1,27 +1,172 @@
 """
 데이터 로드/저장 관리 모듈
 master.xlsx 파일 읽기/쓰기, 백업 관리
+저장은 임시 파일에 쓴 뒤 교체하므로 저장 도중 종료되어도 master 파일이 깨지지 않음
 """
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, Iterable, Set, Any, List, Callable
+import atexit
+import threading
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
-import shutil
 
 from initial_data import (
     create_expense_df, create_erp_budget_df, 
     create_rcms_budget_df, create_mapping_df
 )
-from utils import get_backup_filename, ensure_folder_exists
+from utils import ensure_folder_exists, atomic_write, get_rollback_path
+from expense_schema import apply_expense_schema, combine_expense_chunks, to_storage_frame
+from xlsx_patch import patch_workbook
+from sheet_cache import SheetCache
+from change_journal import ChangeJournal
+from backup_store import BackupStore
+
+
+SHEET_NAMES = ['EXPENSE', 'ERP_BUDGET', 'RCMS_BUDGET', 'MAPPING_ERP_RCMS']
+
+# 파일에 시트가 없을 때 사용할 빈 DataFrame 생성 함수
+SHEET_FACTORIES = {
+    'EXPENSE': create_expense_df,
+    'ERP_BUDGET': create_erp_budget_df,
+    'RCMS_BUDGET': create_rcms_budget_df,
+    'MAPPING_ERP_RCMS': create_mapping_df,
+}
+
+# 스트리밍 로드 설정 (파일이 이 크기 이상이면 EXPENSE를 청크 단위로 읽음)
+STREAMING_THRESHOLD_BYTES = 5 * 1024 * 1024
+EXPENSE_CHUNK_SIZE = 5000
+
+
+def get_sheet_signature(df: pd.DataFrame) -> Optional[Tuple]:
+    """시트 내용 서명 (컬럼, 크기, 행 해시 합계) - 변경 여부 판단용"""
+    try:
+        row_hash = int(pd.util.hash_pandas_object(df, index=False).sum()) if not df.empty else 0
+    except (TypeError, ValueError):
+        # 해시할 수 없는 값이 섞여 있으면 항상 변경된 것으로 간주
+        return None
+    return (tuple(map(str, df.columns)), df.shape, row_hash)
+
+
+def normalize_sheet(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """엑셀에서 읽은 시트 값 정규화 (EXPENSE는 expense_schema의 타입 계약 적용)"""
+    if sheet_name == 'EXPENSE':
+        return apply_expense_schema(df)
+    return df
+
+
+def to_storage_sheet(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """파일에 쓸 시트 값 (EXPENSE는 rcms_name을 붙이고 사용일자를 문자열로)"""
+    if sheet_name == 'EXPENSE':
+        return to_storage_frame(df)
+    return df
+
+
+def _header_columns(header: tuple) -> List[str]:
+    """헤더 행 → 컬럼명 (뒤쪽 빈 셀 제외, 빈 셀/중복 이름은 pd.read_excel과 같은 규칙)"""
+    header = list(header)
+    while header and header[-1] is None:
+        header.pop()
+    columns: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, value in enumerate(header):
+        name = str(value) if value is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        columns.append(name)
+    return columns
+
+
+def _expense_chunk(columns: List[str], rows: List[tuple]) -> Tuple[pd.DataFrame, np.ndarray]:
+    """iter_rows 값 묶음 → (타입 계약을 적용한 청크, 원래 id가 없던 행 표시)"""
+    raw = pd.DataFrame.from_records(rows, columns=columns)
+    missing_ids = (pd.to_numeric(raw["id"], errors="coerce").isna().to_numpy()
+                   if "id" in raw.columns else np.ones(len(raw), dtype=bool))
+    return apply_expense_schema(raw), missing_ids
+
+
+def read_expense_streaming(file_path: Path, chunk_size: int = EXPENSE_CHUNK_SIZE) -> Optional[pd.DataFrame]:
+    """EXPENSE 시트를 read-only 모드로 청크 단위 로드 (시트가 없으면 None)
+
+    iter_rows(values_only=True)로 값만 순회하고 chunk_size 행마다 타입 계약(category/int64/datetime64/bool)을
+    적용하므로, 파이썬 셀 값은 한 청크 분량만 메모리에 남는다. 결과는 pd.read_excel + apply_expense_schema와 같다.
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        if 'EXPENSE' not in workbook.sheetnames:
+            return None
+        rows_iter = workbook['EXPENSE'].iter_rows(values_only=True)
+        header = next(rows_iter, None)
+        columns = _header_columns(header) if header is not None else []
+        if not columns:
+            return apply_expense_schema(create_expense_df())
+        n_cols = len(columns)
+
+        chunks, missing = [], []
+        buffer: List[tuple] = []
+        for row in rows_iter:
+            row = row[:n_cols]
+            if all(value is None for value in row):
+                continue
+            if len(row) < n_cols:
+                row = tuple(row) + (None,) * (n_cols - len(row))
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                chunk, missing_ids = _expense_chunk(columns, buffer)
+                chunks.append(chunk)
+                missing.append(missing_ids)
+                buffer = []
+        if buffer or not chunks:
+            chunk, missing_ids = _expense_chunk(columns, buffer)
+            chunks.append(chunk)
+            missing.append(missing_ids)
+        return combine_expense_chunks(chunks, np.concatenate(missing))
+    finally:
+        workbook.close()
+
+
+def write_workbook(file_path: Path, data: Dict[str, pd.DataFrame]) -> None:
+    """모든 시트를 엑셀 파일로 쓰기"""
+    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
+        for sheet_name, df in data.items():
+            to_storage_sheet(sheet_name, df).to_excel(writer, sheet_name=sheet_name, index=False)
 
 
 class DataManager:
     """데이터 파일 관리 클래스"""
     
-    def __init__(self, file_path: str):
+    backend = "xlsx"
+    
+    def __init__(self, file_path: str, use_cache: bool = True, streaming: Optional[bool] = None):
         self.file_path = Path(file_path)
         self.folder_path = self.file_path.parent
+        # EXPENSE 스트리밍 로드 여부 (None이면 파일 크기로 자동 결정)
+        self.streaming = streaming
+        # 백업 저장소 (.backups 폴더, 시트 단위 중복 제거)
+        self.backup_store = BackupStore(self.file_path)
+        # 시트 캐시 (엑셀 파싱 생략용, .cache 폴더)
+        self.cache = SheetCache(self.file_path) if use_cache else None
+        # 마지막으로 로드/저장한 시트별 서명 (변경된 시트만 다시 쓰기 위해 추적)
+        self._sheet_signatures: Dict[str, Optional[Tuple]] = {}
+        # 엑셀 파일에 실제로 기록된 시트 내용 (저널 적용 전, 캐시에 저장하는 값)
+        self._workbook_frames: Dict[str, pd.DataFrame] = {}
+        # 명시적으로 변경 표시된 시트
+        self._dirty_sheets: Set[str] = set()
+        # 변경 저널 (저장 전 변경사항 보존, 크기 초과/종료 시 엑셀로 압축)
+        self.journal = ChangeJournal(self.file_path)
+        self.journal.on_threshold = self.compact_in_background
+        self._compact_on_exit = False
+        self._compact_thread: Optional[threading.Thread] = None
+        # 백그라운드 저장/저널 압축이 동시에 파일을 쓰지 않도록 직렬화
+        self._save_lock = threading.RLock()
+        # load_expense_first에서 첫 화면 뒤로 미룬 로드 작업과 그 결과 (EXPENSE 외 시트)
+        self._deferred_load: Optional[Callable[[], Dict[str, pd.DataFrame]]] = None
+        self._deferred_thread: Optional[threading.Thread] = None
+        self._deferred_lock = threading.Lock()
+        self._remaining: Dict[str, pd.DataFrame] = {}
     
     def file_exists(self) -> bool:
         """파일 존재 여부 확인"""
@@ -34,100 +179,377 @@ class DataManager:
             ensure_folder_exists(str(self.folder_path))
             
             # 각 시트의 초기 DataFrame 생성
-            expense_df = create_expense_df()
-            erp_budget_df = create_erp_budget_df()
-            rcms_budget_df = create_rcms_budget_df()
-            mapping_df = create_mapping_df()
+            data = {
+                'EXPENSE': create_expense_df(),
+                'ERP_BUDGET': create_erp_budget_df(),
+                'RCMS_BUDGET': create_rcms_budget_df(),
+                'MAPPING_ERP_RCMS': create_mapping_df(),
+            }
             
             # 엑셀 파일로 저장
-            with pd.ExcelWriter(self.file_path, engine='openpyxl') as writer:
-                expense_df.to_excel(writer, sheet_name='EXPENSE', index=False)
-                erp_budget_df.to_excel(writer, sheet_name='ERP_BUDGET', index=False)
-                rcms_budget_df.to_excel(writer, sheet_name='RCMS_BUDGET', index=False)
-                mapping_df.to_excel(writer, sheet_name='MAPPING_ERP_RCMS', index=False)
+            atomic_write(self.file_path, lambda path: write_workbook(path, data))
             
+            self._sheet_signatures = {}
+            self._dirty_sheets.clear()
+            self._workbook_frames = {name: normalize_sheet(name, df) for name, df in data.items()}
             return True
         except Exception as e:
             print(f"초기 파일 생성 오류: {e}")
             return False
     
     def load_all(self) -> Dict[str, pd.DataFrame]:
-        """모든 시트 로드"""
+        """모든 시트 로드 (캐시가 유효하면 엑셀 파싱 생략)"""
+        # load_expense_first 이후 미뤄 둔 로드가 있으면 끝낸 뒤 다시 읽음 (상태가 섞이지 않도록)
+        self.load_remaining()
         if not self.file_exists():
             return {}
         
+        if self.cache:
+            cached = self.cache.load()
+            if cached is not None and all(name in cached for name in SHEET_NAMES):
+                self._remember_signatures(cached)
+                self._workbook_frames = dict(cached)
+                return self.journal.replay(cached)
+        
         try:
-            data = {}
-            excel_file = pd.ExcelFile(self.file_path)
-            
-            # 각 시트 읽기
-            sheet_names = ['EXPENSE', 'ERP_BUDGET', 'RCMS_BUDGET', 'MAPPING_ERP_RCMS']
-            for sheet_name in sheet_names:
-                if sheet_name in excel_file.sheet_names:
-                    df = pd.read_excel(excel_file, sheet_name=sheet_name)
-                    
-                    # EXPENSE 시트의 경우 rcms_settled 컬럼을 boolean으로 변환
-                    if sheet_name == 'EXPENSE' and 'rcms_settled' in df.columns:
-                        # Excel에서 불러온 값이 문자열, 숫자, NaN 등일 수 있으므로 안전하게 변환
-                        df['rcms_settled'] = df['rcms_settled'].fillna(False)
-                        # 문자열 'True', 'False', 숫자 1, 0 등을 boolean으로 변환
-                        df['rcms_settled'] = df['rcms_settled'].astype(str).str.lower().isin(['true', '1', 'yes', 'y', 't']).astype(bool)
-                    
-                    data[sheet_name] = df
-                else:
-                    # 시트가 없으면 빈 DataFrame 생성
-                    if sheet_name == 'EXPENSE':
-                        data[sheet_name] = create_expense_df()
-                    elif sheet_name == 'ERP_BUDGET':
-                        data[sheet_name] = create_erp_budget_df()
-                    elif sheet_name == 'RCMS_BUDGET':
-                        data[sheet_name] = create_rcms_budget_df()
-                    elif sheet_name == 'MAPPING_ERP_RCMS':
-                        data[sheet_name] = create_mapping_df()
-            
-            return data
+            data = self._read_workbook(self.file_path)
         except Exception as e:
             print(f"파일 로드 오류: {e}")
+            data = self._read_rollback()
+            if data is None:
+                return {}
+        
+        if self.cache:
+            self.cache.store(data)
+        self._workbook_frames = dict(data)
+        # 서명은 엑셀 스냅샷 기준으로 기록하여 저널 변경분이 다음 저장 때 반영되도록 함
+        self._remember_signatures(data)
+        return self.journal.replay(data)
+    
+    def load_expense_first(self) -> Dict[str, pd.DataFrame]:
+        """EXPENSE 시트만 먼저 로드 (지출내역 관리 첫 화면용)
+        
+        예산/매핑 시트 파싱, 캐시 저장(파일 해시 포함), 시트 서명 계산은 load_remaining으로 미룬다.
+        캐시가 유효하면 모든 시트를 한 번에 읽고 서명 계산만 미룬다.
+        파일이 없거나 읽을 수 없으면 빈 dict, 롤백 파일로 로드한 경우 나머지 시트도 이미 로드된 상태.
+        """
+        self.load_remaining()
+        if not self.file_exists():
             return {}
+        
+        if self.cache:
+            cached = self.cache.load()
+            if cached is not None and all(name in cached for name in SHEET_NAMES):
+                self._workbook_frames = dict(cached)
+                data = self.journal.replay(cached)
+                self._defer_load(lambda: self._finish_cached_load(cached, data))
+                return {'EXPENSE': data['EXPENSE']}
+        
+        excel_file = None
+        try:
+            excel_file = pd.ExcelFile(self.file_path)
+            available = list(excel_file.sheet_names)
+            expense = self._read_sheet(self.file_path, 'EXPENSE', available, excel_file)
+        except Exception as e:
+            if excel_file is not None:
+                excel_file.close()
+            # 파일 손상 등은 전체 로드 경로(롤백 파일 복구 포함)로 처리
+            print(f"파일 로드 오류: {e}")
+            data = self.load_all()
+            self._remaining = {name: df for name, df in data.items() if name != 'EXPENSE'}
+            return {'EXPENSE': data['EXPENSE']} if data else {}
+        
+        self._defer_load(lambda: self._finish_workbook_load(excel_file, available, expense))
+        return self.journal.replay({'EXPENSE': expense})
+    
+    def start_loading_remaining(self) -> None:
+        """load_expense_first에서 미룬 로드를 백그라운드 스레드에서 시작 (없거나 이미 시작했으면 무시)
+        
+        첫 화면을 그린 뒤 호출하여, 화면 표시와 같은 시점에 CPU를 나눠 쓰지 않게 한다.
+        """
+        with self._deferred_lock:
+            if self._deferred_load is None or self._deferred_thread is not None:
+                return
+            self._deferred_thread = threading.Thread(target=self._run_deferred_load,
+                                                     name="sheet-deferred-load", daemon=True)
+            self._deferred_thread.start()
     
-    def save_all(self, data: Dict[str, pd.DataFrame]) -> Tuple[bool, Optional[str]]:
-        """모든 시트 저장"""
+    def load_remaining(self) -> Dict[str, pd.DataFrame]:
+        """load_expense_first에서 미룬 EXPENSE 외 시트 (백그라운드 로드 중이면 끝날 때까지 대기)
+        
+        읽지 못했으면 빈 dict. 저장/다시 로드 전에도 호출되어 미룬 캐시 저장과 서명 기록을 마친다.
+        """
+        self.start_loading_remaining()
+        thread = self._deferred_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        return self._remaining
+    
+    def _defer_load(self, job: Callable[[], Dict[str, pd.DataFrame]]) -> None:
+        """첫 화면 뒤로 미룰 로드 작업 등록"""
+        with self._deferred_lock:
+            self._deferred_load = job
+            self._deferred_thread = None
+            self._remaining = {}
+    
+    def _run_deferred_load(self) -> None:
+        """미룬 로드 작업 실행 (실패하면 load_remaining이 빈 dict 반환)"""
         try:
-            # 백업 생성 (파일이 존재하는 경우에만)
-            if self.file_exists():
-                backup_path = self._create_backup()
-                if not backup_path:
-                    # 백업 실패해도 저장은 진행 (경고만)
-                    print("경고: 백업 생성에 실패했지만 저장은 진행합니다.")
+            self._remaining = self._deferred_load()
+        except Exception as e:
+            print(f"시트 로드 오류: {e}")
+            self._remaining = {}
+        finally:
+            self._deferred_load = None
+    
+    def _finish_workbook_load(self, excel_file: pd.ExcelFile, available: List[str],
+                              expense: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """나머지 시트를 읽고 캐시 저장/서명 기록 (load_all과 같은 상태로 마무리)"""
+        try:
+            data = {name: (expense if name == 'EXPENSE' else
+                           self._read_sheet(self.file_path, name, available, excel_file))
+                    for name in SHEET_NAMES}
+        finally:
+            excel_file.close()
+        if self.cache:
+            self.cache.store(data)
+        self._workbook_frames = dict(data)
+        self._remember_signatures(data)
+        return self.journal.replay({name: df for name, df in data.items() if name != 'EXPENSE'})
+    
+    def _finish_cached_load(self, cached: Dict[str, pd.DataFrame],
+                            data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """캐시로 읽은 시트의 서명 기록 (시트는 이미 로드됨)"""
+        self._remember_signatures(cached)
+        return {name: df for name, df in data.items() if name != 'EXPENSE'}
+    
+    def _read_rollback(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """master 파일을 읽을 수 없을 때 직전 저장본(롤백 파일)에서 로드"""
+        rollback_path = get_rollback_path(self.file_path)
+        if not rollback_path.exists():
+            return None
+        try:
+            data = self._read_workbook(rollback_path)
+            print(f"경고: 직전 저장본으로 로드했습니다: {rollback_path.name}")
+            return data
+        except Exception as e:
+            print(f"롤백 파일 로드 오류: {e}")
+            return None
+    
+    def _read_workbook(self, file_path: Path) -> Dict[str, pd.DataFrame]:
+        """엑셀 파일에서 모든 시트 읽기 (없는 시트는 빈 DataFrame)"""
+        excel_file = pd.ExcelFile(file_path)
+        try:
+            available = list(excel_file.sheet_names)
+            return {name: self._read_sheet(file_path, name, available, excel_file) for name in SHEET_NAMES}
+        finally:
+            excel_file.close()
+    
+    def _read_sheet(self, file_path: Path, sheet_name: str, available: List[str],
+                    excel_file: Optional[pd.ExcelFile] = None) -> pd.DataFrame:
+        """시트 1개 읽기 (파일에 없는 시트는 빈 DataFrame 생성)"""
+        if sheet_name not in available:
+            return normalize_sheet(sheet_name, SHEET_FACTORIES[sheet_name]())
+        if sheet_name == 'EXPENSE' and self._use_streaming(file_path):
+            return read_expense_streaming(file_path)
+        df = pd.read_excel(excel_file if excel_file is not None else file_path, sheet_name=sheet_name)
+        return normalize_sheet(sheet_name, df)
+    
+    def _use_streaming(self, file_path: Path) -> bool:
+        """EXPENSE 스트리밍 로드 사용 여부"""
+        if self.streaming is not None:
+            return self.streaming
+        return file_path.stat().st_size >= STREAMING_THRESHOLD_BYTES
+    
+    def mark_dirty(self, *sheet_names: str) -> None:
+        """시트를 변경됨으로 표시 (다음 저장 시 반드시 다시 씀)"""
+        self._dirty_sheets.update(sheet_names)
+    
+    def get_dirty_sheets(self, data: Dict[str, pd.DataFrame]) -> Set[str]:
+        """마지막 로드/저장 이후 변경된 시트 목록"""
+        dirty = {name for name in data if name in self._dirty_sheets}
+        for sheet_name, df in data.items():
+            if sheet_name in dirty:
+                continue
+            signature = self._sheet_signatures.get(sheet_name)
+            if signature is None or signature != get_sheet_signature(df):
+                dirty.add(sheet_name)
+        return dirty
+    
+    def _remember_signatures(self, data: Dict[str, pd.DataFrame],
+                             sheet_names: Optional[Iterable[str]] = None) -> None:
+        """저장/로드 직후의 시트 서명 기록"""
+        for sheet_name in (sheet_names if sheet_names is not None else data.keys()):
+            self._sheet_signatures[sheet_name] = get_sheet_signature(data[sheet_name])
+            self._dirty_sheets.discard(sheet_name)
+    
+    def save_all(self, data: Dict[str, pd.DataFrame],
+                 dirty_sheets: Optional[Iterable[str]] = None,
+                 journal_offset: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        """모든 시트 저장 (변경된 시트만 다시 씀)
+        
+        dirty_sheets를 지정하면 해당 시트(및 mark_dirty로 표시된 시트)만 변경된 것으로 보고,
+        지정하지 않으면 마지막 로드/저장 시점의 시트 서명과 비교하여 자동으로 판단한다.
+        journal_offset은 data 스냅샷 시점의 저널 크기로, 그 이후 기록은 저장 후에도 남긴다.
+        """
+        if journal_offset is None:
+            journal_offset = self.journal.size_bytes()
+        # 미룬 로드가 끝나야 쓰지 않은 시트의 파일 내용(캐시)과 서명을 알 수 있음
+        self.load_remaining()
+        with self._save_lock:
+            return self._save_all(data, dirty_sheets, journal_offset)
+    
+    def _save_all(self, data: Dict[str, pd.DataFrame],
+                  dirty_sheets: Optional[Iterable[str]],
+                  journal_offset: int) -> Tuple[bool, Optional[str]]:
+        """save_all 본체 (저장 잠금 안에서 호출)"""
+        try:
+            if dirty_sheets is not None:
+                dirty = {name for name in data if name in set(dirty_sheets) | self._dirty_sheets}
+            else:
+                dirty = self.get_dirty_sheets(data)
+            # 저널에만 있는 변경도 파일에 써야 저널을 비울 수 있음
+            pending = self.journal.pending_sheets(journal_offset)
+            dirty |= pending & set(data)
+            # data에 없는 시트의 변경은 파일에 반영되지 않으므로 저널을 남김
+            clear_journal = pending <= set(data)
+            
+            if self.file_exists() and not dirty:
+                # 변경된 시트가 없으면 파일을 건드리지 않음
+                if clear_journal:
+                    self.journal.clear(journal_offset)
+                return True, None
+            
+            had_file = self.file_exists()
             
             # 폴더 생성
             ensure_folder_exists(str(self.folder_path))
             
-            # 엑셀 파일로 저장
-            with pd.ExcelWriter(self.file_path, engine='openpyxl') as writer:
-                for sheet_name, df in data.items():
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+            if self.file_exists() and len(dirty) < len(data):
+                saved = self._save_dirty_sheets(data, dirty)
+            else:
+                saved = False
+            
+            if not saved:
+                # 엑셀 파일로 저장 (전체 다시 쓰기, 임시 파일에 쓴 뒤 교체)
+                atomic_write(self.file_path, lambda path: write_workbook(path, data))
+                self._sheet_signatures = {}
+                self._workbook_frames = {}
+                dirty = set(data.keys())
             
+            self._remember_signatures(data, dirty)
+            # 스냅샷까지의 변경은 엑셀 파일에 반영되었으므로 저널에서 제거
+            if clear_journal:
+                self.journal.clear(journal_offset)
+            # 저장된 파일 기준으로 캐시 갱신 (다음 로드 시 엑셀 파싱 생략)
+            self._update_cache(data, dirty)
+            
+            # 백업은 저장이 끝난 뒤 직전 저장본(롤백 파일)으로 생성
+            if had_file and not self._create_backup():
+                # 백업 실패해도 저장은 완료됨 (경고만)
+                print("경고: 백업 생성에 실패했습니다. 저장은 완료되었습니다.")
             return True, None
         except Exception as e:
             error_msg = f"파일 저장 오류: {e}"
             print(error_msg)
             return False, error_msg
     
-    def _create_backup(self) -> Optional[Path]:
-        """백업 파일 생성 (최종 저장 시 자동 생성)"""
-        if not self.file_exists():
+    def _update_cache(self, data: Dict[str, pd.DataFrame], written: Set[str]) -> None:
+        """실제로 쓴 시트만 새 값으로 바꿔 캐시 저장 (쓰지 않은 시트는 마지막 로드/저장 시점의 파일 내용 유지)
+        
+        쓰지 않은 시트의 파일 내용을 모르면(로드 없이 저장) 캐시를 지워 다음 로드 때 엑셀에서 읽게 한다.
+        """
+        # 얕은 복사: 호출한 쪽이 같은 객체를 수정해도 copy-on-write로 분리됨
+        for name in written:
+            self._workbook_frames[name] = normalize_sheet(name, data[name].copy(deep=False))
+        if not self.cache:
+            return
+        if all(name in self._workbook_frames for name in SHEET_NAMES):
+            self.cache.store({name: self._workbook_frames[name] for name in SHEET_NAMES})
+        else:
+            self.cache.invalidate()
+    
+    def _save_dirty_sheets(self, data: Dict[str, pd.DataFrame], dirty: Set[str]) -> bool:
+        """변경된 시트의 XML 파트만 교체하여 저장 (실패 시 False → 전체 저장으로 대체)"""
+        sheets = {name: to_storage_sheet(name, data[name]) for name in dirty}
+        try:
+            atomic_write(self.file_path, lambda path: patch_workbook(self.file_path, path, sheets))
+            return True
+        except Exception as e:
+            print(f"부분 저장 실패, 전체 저장으로 대체합니다: {e}")
+            return False
+    
+    def bind_expense_manager(self, expense_manager) -> None:
+        """지출내역 추가/수정/삭제를 변경 저널에 기록하도록 연결 (프로그램 종료 시 압축)"""
+        expense_manager.add_listener(self.journal)
+        if not self._compact_on_exit:
+            atexit.register(self.compact)
+            self._compact_on_exit = True
+    
+    def record_budget_change(self, sheet_name: str, key_column: str, key: Any,
+                             column: str, value: Any) -> None:
+        """예산 변경을 저널에 기록"""
+        self.journal.record_budget_change(sheet_name, key_column, key, column, value)
+    
+    def compact(self) -> bool:
+        """저널에 쌓인 변경을 엑셀 파일로 반영하고 저널 비우기
+        
+        마지막 엑셀 스냅샷(캐시)에 저널을 적용한 결과를 저장하므로 앱 상태 없이 동작한다.
+        """
+        with self._save_lock:
+            if not self.journal.exists() or not self.file_exists():
+                return False
+            # 로드 이후에 기록된 변경은 저장 후에도 남도록 로드 전 저널 크기까지만 비움
+            journal_offset = self.journal.size_bytes()
+            data = self.load_all()
+            if not data:
+                return False
+            success, _ = self.save_all(data, journal_offset=journal_offset)
+            return success
+    
+    def compact_in_background(self) -> None:
+        """저널 압축을 백그라운드 스레드에서 실행 (이미 실행 중이면 생략)
+        
+        저널 크기 임계값 도달 시 호출되며, 변경 기록(리스너)이 엑셀 저장을 기다리지 않게 한다.
+        """
+        thread = self._compact_thread
+        if thread is not None and thread.is_alive():
+            return
+        self._compact_thread = threading.Thread(target=self.compact, name="journal-compact", daemon=True)
+        self._compact_thread.start()
+    
+    def export_xlsx(self) -> Path:
+        """엑셀 파일 경로 반환 (엑셀 저장소는 별도 내보내기 불필요)"""
+        return self.file_path
+    
+    def _create_backup(self) -> Optional[str]:
+        """백업 버전 생성 (저장 후 직전 저장본으로 자동 생성, 바뀌지 않은 시트는 한 번만 보관)"""
+        rollback_path = get_rollback_path(self.file_path)
+        if not rollback_path.exists():
             return None
         
         try:
-            backup_filename = get_backup_filename(self.file_path.name)
-            backup_path = self.folder_path / backup_filename
-            shutil.copy2(self.file_path, backup_path)
-            return backup_path
+            version_id = self.backup_store.snapshot(rollback_path)
+            self.backup_store.prune()
+            return version_id
         except Exception as e:
             print(f"백업 생성 오류: {e}")
             return None
     
+    def list_backups(self) -> List[Dict]:
+        """백업 버전 목록 (최신순)"""
+        return self.backup_store.list_versions()
+    
+    def restore_backup(self, version_id: str, dst_path: Optional[Path] = None) -> Optional[Path]:
+        """백업 버전을 엑셀 파일로 복원 (기본: 폴더에 *_restored_<버전>.xlsx)"""
+        if dst_path is None:
+            dst_path = self.folder_path / f"{self.file_path.stem}_restored_{version_id}.xlsx"
+        try:
+            return self.backup_store.restore(version_id, dst_path)
+        except Exception as e:
+            print(f"백업 복원 오류: {e}")
+            return None
+    
     def get_file_info(self) -> Dict[str, str]:
         """파일 정보 반환"""
         if not self.file_exists():
@@ -146,3 +568,13 @@ class DataManager:
             "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
         }
 
+
+def create_data_manager(file_path: str, backend: Optional[str] = None):
+    """저장 방식에 맞는 데이터 관리자 생성 ('xlsx' 또는 'sqlite')"""
+    if backend is None:
+        from config import config_manager
+        backend = config_manager.get_project_backend(str(Path(file_path).parent))
+    if backend == "sqlite":
+        from sqlite_manager import SQLiteDataManager
+        return SQLiteDataManager(file_path)
+    return DataManager(file_path)
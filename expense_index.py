@@ -0,0 +1,448 @@
+"""
+지출내역 인덱스 모듈
+- ExpenseIndex: 지출내역 스냅샷 1개 버전에 대한 조회용 인덱스
+  (사용일자/지출결의액 정렬 인덱스, 통계목명/rcms_settled 위치 목록, 페이지 조회용 정렬 순서)
+  각 구조는 해당 조건이 처음 쓰일 때 만들고, 데이터가 바뀌면 새 버전으로 다시 만든다.
+- TextSearchIndex: 지출결의명/상세내역 글자 2-gram 위치 색인 (추가/수정/삭제 시 증분 반영)
+"""
+from typing import Optional, Dict, List, Tuple, Callable, Iterable
+import numpy as np
+import pandas as pd
+
+
+# (예상 행 수, 후보 위치 계산, 후보 위치 검사)
+Predicate = Tuple[int, Callable[[], np.ndarray], Callable[[np.ndarray], np.ndarray]]
+
+# 검색 대상 컬럼과 일치 시 점수 (앞 컬럼일수록 높음)
+SEARCH_COLUMNS = {"지출결의명": 2, "상세내역": 1}
+
+# 문서 사이에 넣는 구분 문자 (단어가 두 문서에 걸쳐 일치하지 않도록)
+DOC_START = "\x01"
+DOC_CODE = ord(DOC_START)
+# 2-gram 키(글자 번호 2개)와 위치를 uint64 하나로 묶어 정렬할 수 있는 범위
+# (키 = 앞 글자 번호 * 글자 종류 수 + 뒤 글자 번호, 구분 문자 2-gram용 키 1개까지 32비트에 들어가야 함)
+POSITION_BITS = 32
+PACKED_POSITION_LIMIT = (1 << POSITION_BITS) - 1
+PACKED_ALPHABET_LIMIT = (1 << 16) - 1
+# 증분 반영분이 이 비율(또는 최소 개수)을 넘으면 다음 검색 때 전체 다시 생성
+REBUILD_RATIO = 0.1
+REBUILD_MIN_DOCS = 1000
+
+
+class ExpenseIndex:
+    """지출내역 조회 인덱스 클래스 (expense_schema 타입 계약을 따르는 스냅샷 기준)"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._structures: Dict[str, object] = {}
+
+    def _get(self, name: str, build: Callable[[], object]) -> object:
+        """구조를 처음 요청될 때 생성"""
+        if name not in self._structures:
+            self._structures[name] = build()
+        return self._structures[name]
+
+    def _sorted_index(self, column: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(정렬 순서, 정렬된 값, 원래 값) - 결측값은 정렬 순서에서 제외"""
+        def build():
+            series = self.df[column]
+            if pd.api.types.is_datetime64_dtype(series):
+                values = series.to_numpy(dtype="datetime64[ns]")
+                valid = np.flatnonzero(~np.isnat(values))
+            else:
+                values = series.to_numpy()
+                valid = np.flatnonzero(series.notna().to_numpy())
+            order = valid[np.argsort(values[valid], kind="stable")]
+            return order, values[order], values
+        return self._get(f"sorted:{column}", build)
+
+    def _sort_order(self, column: str, ascending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """(전체 행 정렬 순서, 행 위치별 순위) - 결측값은 방향과 관계없이 맨 뒤"""
+        def build():
+            order, _, _ = self._sorted_index(column)
+            if not ascending:
+                order = order[::-1]
+            missing = np.ones(len(self.df), dtype=bool)
+            missing[order] = False
+            order = np.concatenate([order, np.flatnonzero(missing)])
+            rank = np.empty(len(order), dtype=np.intp)
+            rank[order] = np.arange(len(order))
+            return order, rank
+        return self._get(f"order:{column}:{ascending}", build)
+
+    def window(self, positions: Optional[np.ndarray], sort_by: str, ascending: bool,
+               offset: int, limit: int) -> np.ndarray:
+        """행 위치(None이면 전체)를 sort_by 순서로 정렬했을 때 offset부터 limit개
+
+        전체 정렬 순서는 버전마다 한 번만 만들고, 조건에 맞는 행은 순위로 앞부분만 골라 정렬한다.
+        """
+        order, rank = self._sort_order(sort_by, ascending)
+        end = offset + limit
+        if positions is None:
+            return order[offset:end]
+        ranks = rank[positions]
+        if end < len(positions):
+            head = np.argpartition(ranks, end - 1)[:end]
+            head = head[np.argsort(ranks[head])]
+        else:
+            head = np.argsort(ranks)
+        return positions[head[offset:end]]
+
+    def _postings(self, column: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, pd.Index]:
+        """category 컬럼의 값별 위치 목록 (정렬 순서, 시작 오프셋, 코드, 범주)"""
+        def build():
+            categorical = self.df[column].astype("category")
+            codes = categorical.cat.codes.to_numpy()
+            # 코드 -1(결측값)은 0번 칸으로 밀어서 함께 정렬
+            order = np.argsort(codes, kind="stable")
+            counts = np.bincount(codes + 1, minlength=len(categorical.cat.categories) + 1)
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            return order, offsets, codes, categorical.cat.categories
+        return self._get(f"postings:{column}", build)
+
+    def _lowered(self, column: str) -> Tuple[pd.Series, np.ndarray]:
+        """소문자로 바꾼 문자열 컬럼 (결측값은 빈 문자열) 및 그 배열"""
+        def build():
+            lowered = self.df[column].fillna("").astype(str).str.lower().reset_index(drop=True)
+            return lowered, lowered.to_numpy(dtype=object)
+        return self._get(f"lower:{column}", build)
+
+    def _category_predicate(self, column: str, value) -> Predicate:
+        """값 일치 조건 (위치 목록 사용)"""
+        order, offsets, codes, categories = self._postings(column)
+        if value not in categories:
+            return 0, lambda: np.empty(0, dtype=np.intp), lambda pos: np.zeros(len(pos), dtype=bool)
+        code = categories.get_loc(value)
+        start, end = offsets[code + 1], offsets[code + 2]
+        return int(end - start), lambda: order[start:end], lambda pos: codes[pos] == code
+
+    def _bool_predicate(self, column: str, value: bool) -> Predicate:
+        """참/거짓 조건 (위치 목록 사용)"""
+        def build():
+            values = self.df[column].to_numpy(dtype=bool)
+            return values, np.flatnonzero(values), np.flatnonzero(~values)
+        values, true_positions, false_positions = self._get(f"bool:{column}", build)
+        positions = true_positions if value else false_positions
+        return len(positions), lambda: positions, lambda pos: values[pos] == value
+
+    def _range_predicate(self, column: str, low, high) -> Predicate:
+        """범위 조건 (정렬 인덱스에 searchsorted)"""
+        order, sorted_values, values = self._sorted_index(column)
+        lo = np.searchsorted(sorted_values, low, side="left") if low is not None else 0
+        hi = np.searchsorted(sorted_values, high, side="right") if high is not None else len(sorted_values)
+        hi = max(lo, hi)
+
+        def check(pos: np.ndarray) -> np.ndarray:
+            selected = values[pos]
+            mask = np.ones(len(pos), dtype=bool)
+            if low is not None:
+                mask &= selected >= low
+            if high is not None:
+                mask &= selected <= high
+            return mask
+        return int(hi - lo), lambda: order[lo:hi], check
+
+    def _keyword_predicate(self, column: str, keyword: str) -> Predicate:
+        """부분 문자열 조건 (예상 행 수를 알 수 없으므로 마지막에 후보만 검사)"""
+        lowered, texts = self._lowered(column)
+
+        def positions() -> np.ndarray:
+            return np.flatnonzero(lowered.str.contains(keyword, regex=False).to_numpy())
+
+        def check(pos: np.ndarray) -> np.ndarray:
+            return np.fromiter((keyword in text for text in texts[pos]), dtype=bool, count=len(pos))
+        return len(self.df), positions, check
+
+    def _predicates(self, filters: Dict) -> List[Predicate]:
+        """필터 조건 → 조건 목록 (ExpenseManager.filter와 같은 키)"""
+        predicates = []
+        if filters.get('통계목명'):
+            predicates.append(self._category_predicate('통계목명', filters['통계목명']))
+        start, end = filters.get('시작일'), filters.get('종료일')
+        if start or end:
+            low = pd.Timestamp(start).to_datetime64().astype("datetime64[ns]") if start else None
+            high = pd.Timestamp(end).to_datetime64().astype("datetime64[ns]") if end else None
+            predicates.append(self._range_predicate('사용일자', low, high))
+        if filters.get('지출결의명'):
+            keyword = str(filters['지출결의명']).strip().lower()
+            if keyword:
+                predicates.append(self._keyword_predicate('지출결의명', keyword))
+        if filters.get('rcms_settled') is not None:
+            predicates.append(self._bool_predicate('rcms_settled', bool(filters['rcms_settled'])))
+        low, high = filters.get('최소금액'), filters.get('최대금액')
+        if low is not None or high is not None:
+            predicates.append(self._range_predicate('지출결의액', low, high))
+        return predicates
+
+    def query(self, filters: Dict, candidates: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """조건을 모두 만족하는 행 위치 (오름차순, 조건이 없으면 None = 전체)
+
+        예상 행 수가 가장 적은 조건으로 후보를 만든 뒤, 나머지 조건은 후보 위치만 검사한다.
+        candidates는 외부에서 구한 행 위치 조건 (예: 전문 검색 결과)이다.
+        """
+        predicates = self._predicates(filters)
+        if candidates is not None:
+            allowed = np.unique(candidates)
+            predicates.append((len(allowed), lambda: allowed,
+                               lambda pos: np.isin(pos, allowed, assume_unique=True)))
+        if not predicates:
+            return None
+        predicates.sort(key=lambda predicate: predicate[0])
+        positions = np.sort(predicates[0][1]())
+        for _, _, check in predicates[1:]:
+            if positions.size == 0:
+                break
+            positions = positions[check(positions)]
+        return positions
+
+
+def _dedupe_sorted(values: np.ndarray) -> np.ndarray:
+    """이미 정렬된 배열의 중복 제거"""
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _term_codes(text: str) -> np.ndarray:
+    """문자열 → 코드 포인트 배열"""
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def _bigram_postings(codes: np.ndarray, alphabet: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """코드 포인트 배열 → 2-gram 위치 색인 (정렬된 2-gram 키, 키별 시작 오프셋, 키별로 정렬된 위치)
+
+    글자를 alphabet 번호로 바꾼 2-gram 키(32비트)와 위치(32비트)를 uint64 하나로 묶어 한 번 정렬한다.
+    문서 구분 문자가 들어간 2-gram은 가장 큰 키로 바꿔 정렬 후 잘라낸다.
+    """
+    size = len(alphabet)
+    if size > PACKED_ALPHABET_LIMIT or len(codes) > PACKED_POSITION_LIMIT:
+        # 글자 종류나 글자 수가 너무 많으면 64비트 키로 안정 정렬 (일반적인 데이터에서는 쓰이지 않음)
+        dense = np.searchsorted(alphabet, codes).astype(np.uint64)
+        valid = np.flatnonzero((codes[:-1] != DOC_CODE) & (codes[1:] != DOC_CODE))
+        keys = dense[valid] * np.uint64(size) + dense[valid + 1]
+        order = np.argsort(keys, kind="stable")
+        keys, positions = keys[order], valid[order]
+    else:
+        lookup = np.zeros(int(alphabet[-1]) + 1, dtype=np.uint32)
+        lookup[alphabet] = np.arange(size, dtype=np.uint32)
+        dense = lookup[codes]
+        keys = dense[:-1] * np.uint32(size) + dense[1:]
+        boundary = (codes[:-1] == DOC_CODE) | (codes[1:] == DOC_CODE)
+        keys[boundary] = np.uint32(size * size)
+        packed = keys.astype(np.uint64)
+        packed <<= np.uint64(POSITION_BITS)
+        packed |= np.arange(len(keys), dtype=np.uint64)
+        packed.sort()
+        packed = packed[:len(keys) - int(np.count_nonzero(boundary))]
+        positions = packed.astype(np.uint32)
+        keys = (packed >> np.uint64(POSITION_BITS)).astype(np.uint32)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else np.empty(0, dtype=np.int64)
+    return keys[starts], np.append(starts, len(keys)), positions
+
+
+def _split_terms(query: str) -> List[str]:
+    """검색어 → 소문자 단어 목록 (공백 기준, 모든 단어를 포함해야 일치)"""
+    return [term for term in str(query).lower().split() if term]
+
+
+class _ColumnPostings:
+    """컬럼 1개의 2-gram 위치 색인
+
+    모든 문서를 구분 문자로 이어 붙인 코드 포인트 배열 하나와, 2-gram별 위치/문서 번호 목록(위치 오름차순)을 보관한다.
+    단어 검색은 가장 드문 2-gram의 위치에서 나머지 글자를 배열로 한 번에 비교한다.
+    """
+
+    def __init__(self, texts: List[str]):
+        # 맨 앞/문서 사이/맨 끝에 구분 문자 (단어가 문서 경계를 넘어 일치하지 않음)
+        self.codes = _term_codes(DOC_START + DOC_START.join(texts) + DOC_START)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        self.lengths = lengths
+        self.starts = np.cumsum(lengths + 1) - lengths
+        self.alphabet = np.unique(self.codes)
+        self.keys, self.offsets, self.positions = _bigram_postings(self.codes, self.alphabet)
+        # 위치별 문서 번호 (맨 앞 구분 문자는 -1)
+        doc_of_code = np.repeat(np.arange(-1, len(texts), dtype=np.int32), np.append(1, lengths + 1))
+        self.docs = doc_of_code[self.positions]
+
+    def _gram_slices(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """단어의 2-gram별 (위치 목록 시작, 끝) (색인에 없는 글자나 2-gram이 있으면 None)"""
+        codes = _term_codes(term)
+        dense = np.searchsorted(self.alphabet, codes)
+        if (dense >= len(self.alphabet)).any() or (self.alphabet[np.minimum(dense, len(self.alphabet) - 1)] != codes).any():
+            return None
+        dense = dense.astype(np.uint64)
+        keys = (dense[:-1] * np.uint64(len(self.alphabet)) + dense[1:]).astype(self.keys.dtype)
+        k = np.searchsorted(self.keys, keys)
+        if (k >= len(self.keys)).any() or (self.keys[np.minimum(k, len(self.keys) - 1)] != keys).any():
+            return None
+        return self.offsets[k], self.offsets[k + 1]
+
+    def estimate(self, term: str) -> int:
+        """단어 검색 시 확인할 위치 수 (가장 드문 2-gram 기준, 1글자는 전체 글자 수)"""
+        if len(term) == 1:
+            return len(self.codes)
+        slices = self._gram_slices(term)
+        return 0 if slices is None else int((slices[1] - slices[0]).min())
+
+    def match(self, term: str, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """단어를 포함하는 문서 번호 (오름차순, allowed가 있으면 그 표시가 된 문서에서만)"""
+        if len(term) == 1:
+            return self._match_char(ord(term), allowed)
+        else:
+            slices = self._gram_slices(term)
+            if slices is None:
+                return np.empty(0, dtype=np.int32)
+            # 가장 드문 2-gram 위치에서 단어 시작 위치를 구하고 나머지 글자를 비교
+            j = int(np.argmin(slices[1] - slices[0]))
+            positions = self.positions[slices[0][j]:slices[1][j]].astype(np.int64) - j
+            docs = self.docs[slices[0][j]:slices[1][j]]
+            if allowed is not None:
+                keep = allowed[docs]
+                positions, docs = positions[keep], docs[keep]
+            if len(term) > 2:
+                for i, code in enumerate(_term_codes(term)):
+                    if i in (j, j + 1):
+                        continue
+                    # 구분 문자가 앞뒤에 있으므로 범위를 벗어나는 위치는 문서 밖 (불일치)
+                    inside = (positions + i >= 0) & (positions + i < len(self.codes))
+                    same = np.zeros(len(positions), dtype=bool)
+                    same[inside] = self.codes[positions[inside] + i] == code
+                    positions, docs = positions[same], docs[same]
+        # 위치가 오름차순이므로 문서 번호도 오름차순
+        return _dedupe_sorted(docs)
+
+    def _match_char(self, code: int, allowed: Optional[np.ndarray]) -> np.ndarray:
+        """글자 1개를 포함하는 문서 번호 (후보 문서가 적으면 그 문서의 글자만 비교)"""
+        candidates = np.flatnonzero(allowed) if allowed is not None else None
+        if candidates is None or 4 * int(self.lengths[candidates].sum()) >= len(self.codes):
+            positions = np.flatnonzero(self.codes == code)
+            docs = _dedupe_sorted(np.searchsorted(self.starts, positions, side="right") - 1)
+            return docs if allowed is None else docs[allowed[docs]]
+        # 후보 문서의 글자 위치를 이어 붙여 한 번에 비교
+        lengths = self.lengths[candidates]
+        owner = np.repeat(np.arange(len(candidates)), lengths)
+        offsets = np.arange(len(owner)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        hit = self.codes[self.starts[candidates][owner] + offsets] == code
+        return candidates[_dedupe_sorted(owner[hit])]
+
+
+class TextSearchIndex:
+    """지출결의명/상세내역 전문 검색 인덱스 클래스
+
+    전체 데이터로 만든 2-gram 위치 색인(base)에, 이후 추가/수정된 행(delta)과 삭제/수정으로
+    무효가 된 base 문서 표시를 더해 증분 반영한다. 증분이 커지면 다음 검색 때 source에서 다시 만든다.
+    """
+
+    def __init__(self, source: Callable[[], pd.DataFrame], columns: Optional[Dict[str, int]] = None):
+        self.source = source
+        self.columns = dict(columns or SEARCH_COLUMNS)
+        self._built = False
+        self._postings: Dict[str, _ColumnPostings] = {}
+        self._doc_ids = np.empty(0, dtype=np.int64)
+        self._doc_of_id = pd.Index([], dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        # id → 컬럼별 소문자 텍스트 (base 이후 추가/수정된 행)
+        self._delta: Dict[int, Dict[str, str]] = {}
+
+    @property
+    def is_built(self) -> bool:
+        """base 색인 생성 여부"""
+        return self._built
+
+    def rebuild(self, df: Optional[pd.DataFrame] = None) -> None:
+        """전체 데이터로 다시 생성"""
+        df = self.source() if df is None else df
+        self._doc_ids = df['id'].to_numpy(dtype=np.int64)
+        self._doc_of_id = pd.Index(self._doc_ids)
+        self._alive = np.ones(len(df), dtype=bool)
+        self._postings = {}
+        for column in self.columns:
+            values = df[column] if column in df.columns else pd.Series("", index=df.index)
+            texts = values.fillna("").astype(str).str.lower().tolist()
+            self._postings[column] = _ColumnPostings(texts)
+        self._delta = {}
+        self._built = True
+
+    def _needs_rebuild(self) -> bool:
+        """증분 반영분이 커져서 다시 생성하는 편이 나은지 여부"""
+        changed = len(self._delta) + int((~self._alive).sum())
+        return changed > max(REBUILD_MIN_DOCS, REBUILD_RATIO * len(self._doc_ids))
+
+    def _retire(self, ids: Iterable[int]) -> None:
+        """base 문서 무효 처리"""
+        positions = self._doc_of_id.get_indexer(list(ids))
+        self._alive[positions[positions >= 0]] = False
+
+    def upsert(self, rows: Iterable[Dict]) -> None:
+        """행 추가/수정 반영 (각 행은 id와 검색 대상 컬럼 값을 포함)"""
+        if not self._built:
+            return
+        rows = list(rows)
+        self._retire(int(row['id']) for row in rows)
+        for row in rows:
+            self._delta[int(row['id'])] = {
+                column: str(row.get(column)).lower() if pd.notna(row.get(column)) else ""
+                for column in self.columns
+            }
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """행 삭제 반영"""
+        if not self._built:
+            return
+        ids = [int(row_id) for row_id in ids]
+        self._retire(ids)
+        for row_id in ids:
+            self._delta.pop(row_id, None)
+
+    def invalidate(self) -> None:
+        """다음 검색 때 전체 다시 생성"""
+        self._built = False
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """검색어의 모든 단어를 (어느 컬럼에서든) 포함하는 행 id 목록 (점수 높은 순, 같으면 최근 id 순)
+
+        단어가 지출결의명에 있으면 2점, 상세내역에 있으면 1점을 더한다.
+        """
+        terms = _split_terms(query)
+        if not terms:
+            return []
+        if not self._built or self._needs_rebuild():
+            self.rebuild()
+
+        # base 문서: 확인할 위치가 적은 단어부터 찾고, 이후 단어는 앞 단어를 모두 포함한 문서에서만 찾음
+        ordered = sorted(terms, key=lambda term: sum(postings.estimate(term) for postings in self._postings.values()))
+        allowed: Optional[np.ndarray] = None
+        score = np.zeros(len(self._doc_ids), dtype=np.int64)
+        for term in ordered:
+            term_mask = np.zeros(len(self._doc_ids), dtype=bool)
+            for column, weight in self.columns.items():
+                column_docs = self._postings[column].match(term, allowed)
+                term_mask[column_docs] = True
+                score[column_docs] += weight
+            allowed = term_mask
+            if not allowed.any():
+                break
+        docs = np.flatnonzero(allowed & self._alive)
+        score = score[docs]
+        ids = self._doc_ids[docs]
+
+        # 증분 반영된 문서
+        extra_ids, extra_scores = [], []
+        for row_id, texts in self._delta.items():
+            total = 0
+            for term in terms:
+                term_score = sum(weight for column, weight in self.columns.items() if term in texts[column])
+                if not term_score:
+                    break
+                total += term_score
+            else:
+                extra_ids.append(row_id)
+                extra_scores.append(total)
+        if extra_ids:
+            ids = np.concatenate([ids, np.array(extra_ids, dtype=np.int64)])
+            score = np.concatenate([score, np.array(extra_scores, dtype=np.int64)])
+
+        order = np.lexsort((-ids, -score))
+        if limit is not None:
+            order = order[:limit]
+        return ids[order].tolist()
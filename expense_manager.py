@@ -3,32 +3,208 @@
 지출내역 CRUD 작업, 필터링, 검색
 """
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from itertools import count
+from typing import Optional, Dict, List, Tuple, Iterable
+import numpy as np
 import pandas as pd
 
-from initial_data import get_rcms_code_by_name, get_rcms_name_by_code
+from initial_data import get_rcms_code_by_name, create_expense_df
 from validators import validate_expense_row
+from expense_schema import (
+    apply_expense_schema, coerce_expense_value, coerce_expense_values, union_categories, DERIVED_COLUMN
+)
+from expense_index import ExpenseIndex, TextSearchIndex, SEARCH_COLUMNS
+from expense_totals import ExpenseTotals, TOTAL_COLUMNS
+from expense_timeline import ExpenseTimeline
+from reconciliation import ExpenseCrosstab
+from fingerprint import EXPENSE_FINGERPRINT_COLUMNS, hash_column, missing_hash, combine_hashes
+
+
+# Copy-on-Write가 켜져 있으면(pandas 3은 항상) 얕은 복사만으로 스냅샷이 원본 변경과 분리됨
+COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+# 지출내역 편집 화면 한 페이지의 기본 행 수
+DEFAULT_PAGE_SIZE = 100
+
+
+def _same_value(old, new) -> bool:
+    """수정 전/후 값이 같은지 (결측값끼리는 같음, 행 지문과 같은 기준)"""
+    old_missing = old is None or (not isinstance(old, str) and bool(pd.isna(old)))
+    new_missing = new is None or (not isinstance(new, str) and bool(pd.isna(new)))
+    if old_missing or new_missing:
+        return old_missing and new_missing
+    return bool(old == new)
 
 
 class ExpenseManager:
     """지출내역 관리 클래스"""
     
+    # 인스턴스 번호 (파일을 다시 열어 버전이 0부터 시작해도 캐시 키가 겹치지 않도록)
+    _instance_numbers = count(1)
+    
     def __init__(self, expense_df: pd.DataFrame):
-        self.df = expense_df.copy() if not expense_df.empty else self._create_empty_df()
+        self._instance_number = next(ExpenseManager._instance_numbers)
+        # 추가된 행 버퍼 (다음 조회 시 한 번의 concat으로 반영)
+        self._pending_rows: List[Dict] = []
+        # 변경할 때마다 증가하는 버전과 그 버전의 읽기 전용 스냅샷
+        self._version = 0
+        self._snapshot: Optional[pd.DataFrame] = None
+        self._snapshot_version = -1
+        # 스냅샷 버전별 조회 인덱스
+        self._index: Optional[ExpenseIndex] = None
+        # 예산 집계용 누적 합계 (처음 요청될 때 계산, 이후 변경은 증감분만 반영)
+        self._totals: Optional[ExpenseTotals] = None
+        # 스냅샷 버전별 기준일 집계 (기준일 조회 때 생성)
+        self._timeline: Optional[ExpenseTimeline] = None
+        # 스냅샷 버전별 통계목명 × rcms_code 교차 집계 (ERP-RCMS 대사 때 생성)
+        self._crosstab: Optional[ExpenseCrosstab] = None
+        # 지출결의명/상세내역 전문 검색 인덱스 (첫 검색 때 생성, 이후 변경은 증분 반영)
+        self._search = TextSearchIndex(self.snapshot)
+        # 로드 시 이미 타입 계약이 적용된 DataFrame이면 변환 없이 사용
+        self.df = apply_expense_schema(expense_df.reset_index(drop=True)) if not expense_df.empty else self._create_empty_df()
         # id 자동 증가를 위한 최대값 추적
-        if not self.df.empty and 'id' in self.df.columns:
-            self._max_id = self.df['id'].max() if pd.notna(self.df['id'].max()) else 0
-        else:
-            self._max_id = 0
+        self._max_id = int(self.df['id'].max()) if not self.df.empty else 0
+        # id → 행 위치 해시 인덱스 (df는 항상 0부터 시작하는 RangeIndex 유지)
+        self._id_index = pd.Index([])
+        self._rebuild_index()
+        # 변경 리스너 (on_add/on_update/on_delete를 구현한 객체, 예: SQLite 저장소)
+        self._listeners = []
+    
+    @property
+    def df(self) -> pd.DataFrame:
+        """지출내역 DataFrame (버퍼에 쌓인 추가 행은 이때 한 번에 반영)"""
+        if self._pending_rows:
+            self._flush_pending()
+        return self._df
+    
+    @df.setter
+    def df(self, value: pd.DataFrame) -> None:
+        self._df = value
+        self._version += 1
+        # 통째로 바뀐 데이터는 누적 집계를 다음 요청 때 새로 계산
+        self._totals = None
+    
+    @property
+    def version(self) -> int:
+        """데이터 버전 (추가/수정/삭제 시 증가, 집계 결과 캐시 키로 사용)"""
+        return self._version
+    
+    @property
+    def cache_key(self) -> Tuple[int, int]:
+        """집계 결과 캐시 키 (인스턴스 번호, 데이터 버전)"""
+        return self._instance_number, self._version
+    
+    def snapshot(self) -> pd.DataFrame:
+        """현재 버전의 읽기 전용 스냅샷 (다음 변경 전까지 같은 객체를 공유하므로 수정 금지)
+        
+        Copy-on-Write 환경에서는 데이터를 복사하지 않고, 이후 변경은 원본 쪽에서만 복사가 일어난다.
+        """
+        df = self.df
+        if self._snapshot is None or self._snapshot_version != self._version:
+            self._snapshot = df.copy(deep=not COPY_ON_WRITE)
+            self._snapshot_version = self._version
+        return self._snapshot
+    
+    def _flush_pending(self) -> None:
+        """추가 행 버퍼를 DataFrame에 반영 (N행 추가가 concat 한 번으로 끝남)"""
+        rows, self._pending_rows = self._pending_rows, []
+        new_df = apply_expense_schema(pd.DataFrame(rows))
+        # category 범주를 맞춰야 concat 결과도 category로 유지됨
+        self._df = pd.concat(union_categories([self._df, new_df]), ignore_index=True)
+        if self._totals is not None:
+            self._totals.add(new_df)
+        self._rebuild_index()
+    
+    def _keep_rows(self, keep: np.ndarray) -> None:
+        """keep이 False인 행 삭제 (누적 집계에서 빼고, 위치가 바뀌므로 id 인덱스 재생성)"""
+        totals = self._totals
+        if totals is not None:
+            totals.subtract(self.df[~keep])
+        self.df = self.df[keep].reset_index(drop=True)
+        self._totals = totals
+        self._rebuild_index()
+    
+    def _rebuild_index(self) -> None:
+        """id → 행 위치 인덱스 재생성 (행 추가/삭제로 위치가 바뀐 뒤 호출)
+        
+        해시 테이블은 첫 조회 때 C 코드로 한 번 만들어진다.
+        """
+        if self.df.empty or 'id' not in self.df.columns:
+            self._id_index = pd.Index([])
+            return
+        ids = self.df['id']
+        if not pd.api.types.is_numeric_dtype(ids):
+            ids = pd.to_numeric(ids, errors='coerce')
+        self._id_index = pd.Index(ids.to_numpy())
+    
+    def _position(self, row_id: int) -> Optional[int]:
+        """id에 해당하는 행 위치 (없으면 None, 중복 id면 첫 행)"""
+        if self._pending_rows:
+            self._flush_pending()
+        try:
+            loc = self._id_index.get_loc(int(row_id))
+        except (KeyError, TypeError, ValueError):
+            return None
+        if isinstance(loc, slice):
+            return loc.start
+        if not isinstance(loc, (int, np.integer)):
+            return int(np.flatnonzero(loc)[0])
+        return int(loc)
+    
+    def add_listener(self, listener) -> None:
+        """행 추가/수정/삭제 시 호출될 리스너 등록"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+    
+    def _notify(self, event: str, *args) -> None:
+        """리스너에 변경 알림"""
+        for listener in self._listeners:
+            getattr(listener, event)(*args)
+    
+    def _notify_changes(self, added: List[Dict], updated: List[Tuple[int, Dict]], deleted_ids: List[int]) -> None:
+        """여러 변경을 한 번에 알림 (on_changes가 없는 리스너는 건별 호출)"""
+        for listener in self._listeners:
+            if hasattr(listener, 'on_changes'):
+                listener.on_changes(added, updated, deleted_ids)
+                continue
+            for row in added:
+                listener.on_add(row)
+            for row_id, changes in updated:
+                listener.on_update(row_id, changes)
+            if deleted_ids:
+                listener.on_delete(deleted_ids)
     
     def _create_empty_df(self) -> pd.DataFrame:
         """빈 DataFrame 생성"""
-        columns = [
-            "id", "통계목명", "사용일자", "지출결의명", "상세내역",
-            "지출결의액", "rcms_code", "rcms_name", "rcms_settled",
-            "created_at", "updated_at"
-        ]
-        return pd.DataFrame(columns=columns)
+        return apply_expense_schema(create_expense_df())
+    
+    def _prepare_row(self, row_data: Dict) -> Dict:
+        """입력 행 정리 (rcms_name은 저장하지 않고 rcms_code가 없을 때 코드로 변환)"""
+        rcms_name = row_data.pop(DERIVED_COLUMN, None)
+        if rcms_name and not row_data.get('rcms_code'):
+            rcms_code = get_rcms_code_by_name(rcms_name)
+            if rcms_code:
+                row_data['rcms_code'] = rcms_code
+        return row_data
+    
+    def _assign(self, column: str, target, values) -> None:
+        """지정 위치의 컬럼 값 반영 (계약된 타입 유지, category는 새 값을 범주에 추가)"""
+        values = coerce_expense_values(column, pd.Series(list(values)))
+        if column not in self.df.columns:
+            self.df[column] = None
+        series = self.df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            new_categories = [v for v in pd.unique(values.dropna()) if v not in series.cat.categories]
+            series = series.cat.add_categories(new_categories) if new_categories else series.copy()
+        else:
+            series = series.copy()
+        try:
+            series.iloc[target] = values.to_numpy()
+        except (TypeError, ValueError):
+            # 계약에 없는 컬럼에 타입이 맞지 않는 값이면 object로 바꿔서 반영
+            series = series.astype(object)
+            series.iloc[target] = values.to_numpy(dtype=object)
+        self.df[column] = series
     
     def add_row(self, row_data: Dict) -> Tuple[bool, Optional[str]]:
         """새 행 추가"""
@@ -41,103 +217,316 @@ class ExpenseManager:
         row_data['created_at'] = now
         row_data['updated_at'] = now
         
-        # rcms_code가 있으면 rcms_name 자동 채움
-        if row_data.get('rcms_code') and not row_data.get('rcms_name'):
-            rcms_name = get_rcms_name_by_code(row_data['rcms_code'])
-            if rcms_name:
-                row_data['rcms_name'] = rcms_name
-        
         # rcms_settled 기본값
         if 'rcms_settled' not in row_data or row_data['rcms_settled'] is None:
             row_data['rcms_settled'] = False
         
-        # DataFrame에 추가
-        new_row = pd.DataFrame([row_data])
-        self.df = pd.concat([self.df, new_row], ignore_index=True)
+        # rcms_name은 rcms_code로 변환 (조회 시 코드에서 계산)
+        row = self._prepare_row(dict(row_data))
         
+        # 버퍼에 추가 (DataFrame에는 다음 조회 시 반영)
+        self._pending_rows.append(row)
+        self._version += 1
+        self._search.upsert([row])
+        
+        self._notify('on_add', dict(row))
         return True, None
     
     def update_row(self, row_id: int, row_data: Dict) -> Tuple[bool, Optional[str]]:
-        """행 수정"""
-        idx = self.df[self.df['id'] == row_id].index
-        if len(idx) == 0:
+        """행 수정 (값이 실제로 바뀐 경우에만 반영하고 updated_at 갱신)
+        
+        행 1개만 바뀌므로 DataFrame을 만들지 않고 넘어온 값만 변환해 제자리에 쓴다 (apply_changes와 같은 결과).
+        """
+        position = self._position(row_id)
+        if position is None:
             return False, f"ID {row_id}에 해당하는 행을 찾을 수 없습니다."
         
         # id는 변경하지 않음
-        row_data.pop('id', None)
+        changes = {column: coerce_expense_value(column, value)
+                   for column, value in self._prepare_changes(row_data).items()}
+        current = self._row_values(position, list(changes))
+        if all(_same_value(current[column], value) for column, value in changes.items()):
+            return True, None
+        changes['updated_at'] = pd.Timestamp(datetime.now())
         
-        # updated_at 업데이트
-        row_data['updated_at'] = datetime.now()
-        
-        # rcms_code가 변경되면 rcms_name 자동 업데이트
-        if 'rcms_code' in row_data and row_data['rcms_code']:
-            rcms_name = get_rcms_name_by_code(row_data['rcms_code'])
-            if rcms_name:
-                row_data['rcms_name'] = rcms_name
-        
-        # 데이터 업데이트
-        for key, value in row_data.items():
-            self.df.at[idx[0], key] = value
+        # 누적 집계는 수정 전 값을 빼고 수정 후 값을 더함
+        totals = self._totals if any(c in TOTAL_COLUMNS for c in changes) else None
+        if totals is not None:
+            totals.subtract_row(self._row_values(position, TOTAL_COLUMNS))
+        for column, value in changes.items():
+            self._set_value(position, column, value)
+        self._version += 1
+        if totals is not None:
+            totals.add_row(self._row_values(position, TOTAL_COLUMNS))
         
+        if any(column in SEARCH_COLUMNS for column in changes):
+            self._search.upsert([self._row_values(position, ['id'] + list(SEARCH_COLUMNS))])
+        self._notify('on_update', int(row_id), changes)
         return True, None
     
+    def _prepare_changes(self, row_data: Dict) -> Dict:
+        """수정 값 정리 (id 제외, rcms_name은 rcms_code가 없을 때만 코드로 변환 - _apply_updates와 동일)"""
+        changes = {column: value for column, value in row_data.items() if column != 'id'}
+        if DERIVED_COLUMN in changes:
+            name = changes.pop(DERIVED_COLUMN)
+            code = get_rcms_code_by_name(name) if name else None
+            if 'rcms_code' in changes:
+                current = changes['rcms_code']
+                if current is None or current == '' or (not isinstance(current, str) and pd.isna(current)):
+                    changes['rcms_code'] = code
+            elif code is not None:
+                changes['rcms_code'] = code
+        return changes
+    
+    def _row_values(self, position: int, columns: List[str]) -> Dict:
+        """행 1개의 컬럼 값 (없는 컬럼은 None)"""
+        df = self.df
+        return {column: df[column].iat[position] if column in df.columns else None for column in columns}
+    
+    def _set_value(self, position: int, column: str, value) -> None:
+        """값 1개를 제자리에 쓰기 (새 category 값, 없는 컬럼, 타입이 맞지 않는 값은 _assign으로 처리)"""
+        df = self.df
+        if column in df.columns:
+            dtype = df[column].dtype
+            if (not isinstance(dtype, pd.CategoricalDtype) or value is None
+                    or value in dtype.categories):
+                try:
+                    df.iat[position, df.columns.get_loc(column)] = value
+                    return
+                except (TypeError, ValueError):
+                    pass
+        self._assign(column, [position], [value])
+    
     def delete_row(self, row_id: int) -> Tuple[bool, Optional[str]]:
         """행 삭제"""
-        idx = self.df[self.df['id'] == row_id].index
-        if len(idx) == 0:
+        position = self._position(row_id)
+        if position is None:
             return False, f"ID {row_id}에 해당하는 행을 찾을 수 없습니다."
         
-        self.df = self.df.drop(idx).reset_index(drop=True)
+        keep = np.ones(len(self.df), dtype=bool)
+        keep[position] = False
+        self._keep_rows(keep)
+        self._search.remove([row_id])
+        self._notify('on_delete', [row_id])
         return True, None
     
     def delete_rows(self, row_ids: List[int]) -> Tuple[bool, Optional[str]]:
         """여러 행 삭제"""
-        self.df = self.df[~self.df['id'].isin(row_ids)].reset_index(drop=True)
+        mask = self.df['id'].isin(row_ids).to_numpy()
+        deleted_ids = self.df.loc[mask, 'id'].tolist()
+        self._keep_rows(~mask)
+        self._search.remove(deleted_ids)
+        self._notify('on_delete', deleted_ids)
         return True, None
     
+    def apply_changes(self, added: Optional[List[Dict]] = None,
+                      updated: Optional[List[Dict]] = None,
+                      deleted_ids: Optional[Iterable[int]] = None) -> Tuple[bool, Optional[str]]:
+        """편집 내용(추가/수정/삭제)을 한 번에 반영
+        
+        updated의 각 행은 'id'를 포함해야 하며, 값이 실제로 바뀐 행만 수정(updated_at 갱신)한다.
+        수정 대상 id가 하나라도 없으면 아무것도 반영하지 않는다.
+        """
+        added = added or []
+        updated = updated or []
+        deleted = set()
+        for row_id in (deleted_ids if deleted_ids is not None else []):
+            if self._position(row_id) is not None:
+                deleted.add(int(row_id))
+        
+        positions = [self._position(row.get('id')) for row in updated]
+        missing = [row.get('id') for row, pos in zip(updated, positions) if pos is None]
+        if missing:
+            return False, f"ID {missing}에 해당하는 행을 찾을 수 없습니다."
+        
+        now = datetime.now()
+        update_events = self._apply_updates(updated, positions, now)
+        
+        if deleted:
+            self._keep_rows(~self.df['id'].isin(list(deleted)).to_numpy())
+        
+        added_rows = []
+        for row_data in added:
+            row_data = dict(row_data)
+            row_data.pop('id', None)
+            self._max_id += 1
+            row_data['id'] = self._max_id
+            row_data['created_at'] = now
+            row_data['updated_at'] = now
+            if row_data.get('rcms_settled') is None:
+                row_data['rcms_settled'] = False
+            added_rows.append(self._prepare_row(row_data))
+        if added_rows:
+            self._pending_rows.extend(added_rows)
+            self._version += 1
+        
+        # 전문 검색 인덱스 증분 반영
+        text_updated = [row_id for row_id, changes in update_events
+                        if row_id not in deleted and any(c in SEARCH_COLUMNS for c in changes)]
+        if text_updated:
+            self._reindex_text(text_updated)
+        self._search.remove(deleted)
+        self._search.upsert(added_rows)
+        self._notify_changes(added_rows, update_events, sorted(deleted))
+        return True, None
+    
+    def _apply_updates(self, updated: List[Dict], positions: List[int], now: datetime) -> List[Tuple[int, Dict]]:
+        """수정 행들을 컬럼 단위로 한 번에 반영하고 (id, 변경값) 목록 반환"""
+        if not updated:
+            return []
+        
+        changes_df = pd.DataFrame(updated, index=positions).drop(columns=['id'], errors='ignore')
+        # 행마다 실제로 넘어온 키 (없는 키는 결측값으로 덮어쓰지 않음)
+        present = pd.DataFrame([dict.fromkeys(row, True) for row in updated], index=positions)
+        present = present.reindex(columns=changes_df.columns).notna()
+        keep = ~changes_df.index.duplicated(keep='last')
+        changes_df, present = changes_df[keep], present[keep]
+        # rcms_name은 저장하지 않고 rcms_code가 없는 행만 코드로 변환 (update_row와 동일)
+        if DERIVED_COLUMN in changes_df.columns:
+            codes = changes_df.pop(DERIVED_COLUMN).map(lambda name: get_rcms_code_by_name(name) if name else None)
+            has_name = present.pop(DERIVED_COLUMN)
+            if 'rcms_code' in changes_df.columns:
+                current = changes_df['rcms_code']
+                changes_df['rcms_code'] = current.where(current.notna() & (current != ''), codes)
+                present['rcms_code'] |= has_name & codes.notna()
+            elif codes.notna().any():
+                changes_df['rcms_code'] = codes
+                present['rcms_code'] = has_name & codes.notna()
+        # 비교 전에 계약된 타입으로 변환 (예: '2024-01-05' → Timestamp)
+        for column in changes_df.columns:
+            changes_df[column] = coerce_expense_values(column, changes_df[column])
+        
+        # 수정 전/후 행 지문이 다른 행만 반영 (업무 컬럼 + 넘어온 컬럼, 수정 대상 행만 계산)
+        target = changes_df.index.to_numpy()
+        old_hashes, new_hashes = [], []
+        for column in dict.fromkeys(EXPENSE_FINGERPRINT_COLUMNS + list(changes_df.columns)):
+            old = hash_column(self.df[column].iloc[target]) if column in self.df.columns else missing_hash(len(target))
+            old_hashes.append(old)
+            if column in changes_df.columns:
+                new_hashes.append(np.where(present[column].to_numpy(), hash_column(changes_df[column]), old))
+            else:
+                new_hashes.append(old)
+        changed = combine_hashes(old_hashes) != combine_hashes(new_hashes)
+        if not changed.any():
+            return []
+        
+        changes_df, present = changes_df[changed], present[changed]
+        changes_df['updated_at'] = now
+        present['updated_at'] = True
+        target = changes_df.index.to_numpy()
+        # 누적 집계는 수정 전 값을 빼고 수정 후 값을 더함
+        totals = self._totals if any(c in TOTAL_COLUMNS for c in changes_df.columns) else None
+        if totals is not None:
+            totals.subtract(self.df.iloc[target][TOTAL_COLUMNS])
+        for column in changes_df.columns:
+            rows = present[column].to_numpy()
+            self._assign(column, target[rows], changes_df[column][rows])
+        self._version += 1
+        if totals is not None:
+            totals.add(self.df.iloc[target][TOTAL_COLUMNS])
+        
+        ids = self.df['id'].to_numpy()[target]
+        records = [{key: value for key, value in record.items() if has[key]}
+                   for record, has in zip(changes_df.to_dict('records'), present.to_dict('records'))]
+        return [(int(row_id), record) for row_id, record in zip(ids, records)]
+    
+    def _reindex_text(self, row_ids: List[int]) -> None:
+        """수정된 행의 검색 대상 텍스트를 전문 검색 인덱스에 다시 반영"""
+        if not self._search.is_built:
+            return
+        positions = self._id_index.get_indexer([int(row_id) for row_id in row_ids])
+        columns = ['id'] + [c for c in SEARCH_COLUMNS if c in self.df.columns]
+        self._search.upsert(self.df.iloc[positions[positions >= 0]][columns].to_dict('records'))
+    
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """지출결의명/상세내역 전문 검색 (공백으로 나눈 단어를 모두 포함하는 행 id, 관련도 순)"""
+        return self._search.search(query, limit)
+    
+    def get_totals(self) -> ExpenseTotals:
+        """예산 집계용 누적 합계 (처음 한 번만 전체 계산, 이후 추가/수정/삭제 시 증감분 반영)
+        
+        반환된 객체는 이후 변경에 따라 바뀌므로 수정하지 말고 읽기만 한다.
+        """
+        df = self.df
+        if self._totals is None:
+            self._totals = ExpenseTotals.from_frame(df)
+        return self._totals
+    
+    def check_totals(self) -> Tuple[bool, Optional[str]]:
+        """누적 합계가 전체 재계산 결과와 같은지 확인"""
+        return self.get_totals().compare(ExpenseTotals.from_frame(self.df))
+    
     def get_all(self) -> pd.DataFrame:
-        """모든 데이터 반환"""
-        return self.df.copy()
+        """모든 데이터 반환 (수정해도 원본에 영향 없음, 읽기만 할 때는 snapshot 사용)"""
+        return self.snapshot().copy(deep=not COPY_ON_WRITE)
     
     def get_by_id(self, row_id: int) -> Optional[pd.Series]:
         """ID로 행 조회"""
-        result = self.df[self.df['id'] == row_id]
-        return result.iloc[0] if len(result) > 0 else None
+        position = self._position(row_id)
+        return self.df.iloc[position] if position is not None else None
+    
+    def get_index(self) -> ExpenseIndex:
+        """현재 버전의 조회 인덱스 (변경되면 다음 조회 때 새로 생성)"""
+        snapshot = self.snapshot()
+        if self._index is None or self._index.df is not snapshot:
+            self._index = ExpenseIndex(snapshot)
+        return self._index
+    
+    def get_timeline(self) -> ExpenseTimeline:
+        """현재 버전의 기준일 집계 (변경되면 다음 조회 때 새로 생성)"""
+        snapshot = self.snapshot()
+        if self._timeline is None or self._timeline.df is not snapshot:
+            self._timeline = ExpenseTimeline(snapshot)
+        return self._timeline
+    
+    def get_crosstab(self) -> ExpenseCrosstab:
+        """현재 버전의 통계목명 × rcms_code 교차 집계 (변경되면 다음 조회 때 새로 생성)"""
+        snapshot = self.snapshot()
+        if self._crosstab is None or self._crosstab.df is not snapshot:
+            self._crosstab = ExpenseCrosstab(snapshot)
+        return self._crosstab
     
     def filter(self, filters: Dict) -> pd.DataFrame:
-        """필터링"""
-        filtered_df = self.df.copy()
-        
-        # 통계목명 필터
-        if '통계목명' in filters and filters['통계목명']:
-            filtered_df = filtered_df[filtered_df['통계목명'] == filters['통계목명']]
-        
-        # 날짜 범위 필터
-        if '시작일' in filters and filters['시작일']:
-            filtered_df = filtered_df[filtered_df['사용일자'] >= filters['시작일']]
-        if '종료일' in filters and filters['종료일']:
-            filtered_df = filtered_df[filtered_df['사용일자'] <= filters['종료일']]
-        
-        # 지출결의명 검색
-        if '지출결의명' in filters and filters['지출결의명']:
-            keyword = str(filters['지출결의명']).strip().lower()
-            if keyword:
-                # 문자열 타입으로 변환 후 검색 (정규식 사용 안 함)
-                filtered_df = filtered_df[
-                    filtered_df['지출결의명'].astype(str).str.lower().str.contains(keyword, na=False, regex=False)
-                ]
-        
-        # RCMS 정산 상태 필터
-        if 'rcms_settled' in filters and filters['rcms_settled'] is not None:
-            filtered_df = filtered_df[filtered_df['rcms_settled'] == filters['rcms_settled']]
-        
-        # 금액 범위 필터
-        if '최소금액' in filters and filters['최소금액'] is not None:
-            filtered_df = filtered_df[filtered_df['지출결의액'] >= filters['최소금액']]
-        if '최대금액' in filters and filters['최대금액'] is not None:
-            filtered_df = filtered_df[filtered_df['지출결의액'] <= filters['최대금액']]
-        
-        return filtered_df
+        """필터링 (통계목명, 시작일/종료일, 지출결의명 검색, 검색어, rcms_settled, 최소금액/최대금액)
+        
+        조건이 없으면 스냅샷을 복사 없이 공유하고, 있으면 조건에 맞는 행만 꺼낸다.
+        검색어(지출결의명/상세내역 전문 검색)가 있으면 관련도 순으로 정렬한다.
+        """
+        index = self.get_index()
+        positions = self._filter_positions(index, filters)
+        if positions is None:
+            return index.df.copy(deep=not COPY_ON_WRITE)
+        return index.df.take(positions)
+    
+    def _filter_positions(self, index: ExpenseIndex, filters: Dict) -> Optional[np.ndarray]:
+        """조건에 맞는 행 위치 (조건이 없으면 None, 검색어가 있으면 관련도 순)"""
+        ranked = None
+        if str(filters.get('검색어') or '').strip():
+            ranked = self._id_index.get_indexer(self.search(filters['검색어']))
+            ranked = ranked[ranked >= 0]
+        positions = index.query(filters, candidates=ranked)
+        if positions is not None and ranked is not None:
+            positions = ranked[np.isin(ranked, positions)]
+        return positions
+    
+    def get_page(self, filters: Optional[Dict] = None, sort_by: Optional[str] = 'id',
+                 ascending: bool = False, offset: int = 0,
+                 limit: int = DEFAULT_PAGE_SIZE) -> Tuple[pd.DataFrame, int]:
+        """필터/정렬한 지출내역 중 offset부터 limit행과 조건에 맞는 전체 행 수
+        
+        sort_by가 None이면 검색어 관련도 순(검색어가 없으면 저장 순서)을 따른다.
+        정렬 순서는 버전마다 한 번만 만들고, 페이지마다 limit행만 꺼낸다.
+        """
+        index = self.get_index()
+        positions = self._filter_positions(index, filters or {})
+        total = len(index.df) if positions is None else len(positions)
+        offset = max(0, int(offset))
+        if sort_by is None or sort_by not in index.df.columns:
+            window = (np.arange(offset, min(offset + limit, total)) if positions is None
+                      else positions[offset:offset + limit])
+        else:
+            window = index.window(positions, sort_by, ascending, offset, limit)
+        return index.df.take(window), total
     
     def get_summary(self) -> Dict:
         """요약 정보 반환"""
@@ -0,0 +1,249 @@
+"""
+지출내역 스키마 모듈
+EXPENSE 시트의 메모리 내 컬럼 타입 계약 (로드 시 한 번 적용)
+- 통계목명, rcms_code: category (ERP/RCMS 키)
+- id, 지출결의액: int64
+- 사용일자, created_at, updated_at: datetime64[ns]
+- rcms_settled: bool
+- rcms_name: 행마다 저장하지 않고 rcms_code로부터 필요할 때 계산 (파일에는 그대로 기록)
+"""
+from datetime import datetime
+from typing import Dict, List, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from initial_data import get_erp_statistics_list, get_rcms_items_list
+
+
+# 메모리 내 EXPENSE 컬럼 (rcms_name 제외)
+EXPENSE_COLUMNS = [
+    "id", "통계목명", "사용일자", "지출결의명", "상세내역",
+    "지출결의액", "rcms_code", "rcms_settled",
+    "created_at", "updated_at"
+]
+
+INT_COLUMNS = ["id", "지출결의액"]
+DATETIME_COLUMNS = ["사용일자", "created_at", "updated_at"]
+CATEGORY_COLUMNS = ["통계목명", "rcms_code"]
+BOOL_COLUMNS = ["rcms_settled"]
+
+# rcms_code에서 계산되는 컬럼 (파일/표시용)
+DERIVED_COLUMN = "rcms_name"
+
+# 파일에 저장되는 사용일자 형식
+DATE_FORMAT = "%Y-%m-%d"
+
+TRUE_VALUES = ["true", "1", "yes", "y", "t"]
+
+
+def get_known_categories() -> Dict[str, List[str]]:
+    """category 컬럼별 기본 범주 (ERP 통계목, RCMS 코드)"""
+    return {
+        "통계목명": get_erp_statistics_list(),
+        "rcms_code": [item["rcms_code"] for item in get_rcms_items_list()],
+    }
+
+
+def _code_to_name() -> Dict[str, str]:
+    """RCMS 코드 → 항목명"""
+    return {item["rcms_code"]: item["rcms_name"] for item in get_rcms_items_list()}
+
+
+def _name_to_code() -> Dict[str, str]:
+    """RCMS 항목명 → 코드"""
+    return {item["rcms_name"]: item["rcms_code"] for item in get_rcms_items_list()}
+
+
+def _to_text(values: pd.Series) -> pd.Series:
+    """키 값 정리 (앞뒤 공백 제거, 빈 문자열은 결측값)"""
+    text = values.astype(object).where(values.notna(), None)
+    text = text.map(lambda v: str(v).strip() if v is not None else None)
+    return text.where(text != "", None)
+
+
+def coerce_expense_values(column: str, values: pd.Series) -> pd.Series:
+    """입력 값을 계약된 타입으로 변환 (category 컬럼은 범주 지정 전 텍스트로 반환)"""
+    if column in INT_COLUMNS:
+        if pd.api.types.is_integer_dtype(values) and not values.isna().any():
+            return values.astype("int64")
+        return pd.to_numeric(values, errors="coerce").fillna(0).round().astype("int64")
+    if column in DATETIME_COLUMNS:
+        if pd.api.types.is_datetime64_dtype(values):
+            return values.astype("datetime64[ns]")
+        return pd.to_datetime(values, errors="coerce", format="mixed").astype("datetime64[ns]")
+    if column in BOOL_COLUMNS:
+        if pd.api.types.is_bool_dtype(values) and not values.isna().any():
+            return values.astype(bool)
+        if pd.api.types.is_numeric_dtype(values):
+            return values.fillna(0) != 0
+        return values.astype(str).str.lower().isin(TRUE_VALUES)
+    if column in CATEGORY_COLUMNS:
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values
+        return _to_text(values)
+    return values
+
+
+def _is_missing(value) -> bool:
+    """스칼라 결측값 여부 (None, NaN, NaT, pd.NA)"""
+    return value is None or (not isinstance(value, (str, list, tuple, dict)) and bool(pd.isna(value)))
+
+
+def coerce_expense_value(column: str, value):
+    """값 1개를 계약된 타입으로 변환 (coerce_expense_values와 같은 결과, 행 1개 수정용)
+
+    흔한 입력 타입은 Series를 만들지 않고 바로 변환하고, 나머지는 coerce_expense_values에 맡긴다.
+    """
+    if column in INT_COLUMNS:
+        if isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)):
+            return int(value)
+    elif column in DATETIME_COLUMNS:
+        if isinstance(value, (pd.Timestamp, datetime)) and getattr(value, "tzinfo", None) is None:
+            return pd.Timestamp(value)
+    elif column in BOOL_COLUMNS:
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+    elif column in CATEGORY_COLUMNS:
+        if _is_missing(value):
+            return None
+        if isinstance(value, str):
+            return value.strip() or None
+    else:
+        return value
+    result = coerce_expense_values(column, pd.Series([value])).iloc[0]
+    if column in CATEGORY_COLUMNS and _is_missing(result):
+        return None
+    return result.item() if isinstance(result, np.generic) else result
+
+
+def _to_category(values: pd.Series, known: List[str]) -> pd.Series:
+    """category 변환 (기본 범주 + 데이터에만 있는 값)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        extra = [c for c in values.cat.categories if c not in set(known)]
+        return values.cat.set_categories(known + sorted(extra))
+    text = _to_text(values)
+    extra = sorted(set(text.dropna()) - set(known))
+    return pd.Series(pd.Categorical(text, categories=known + extra), index=values.index, name=values.name)
+
+
+def conforms_to_schema(df: pd.DataFrame) -> bool:
+    """이미 계약된 타입인지 여부 (다시 변환할 필요 없음)"""
+    if DERIVED_COLUMN in df.columns or list(df.columns[:len(EXPENSE_COLUMNS)]) != EXPENSE_COLUMNS:
+        return False
+    dtypes = df.dtypes
+    return (all(dtypes[c] == "int64" for c in INT_COLUMNS)
+            and all(dtypes[c] == "datetime64[ns]" for c in DATETIME_COLUMNS)
+            and all(dtypes[c] == bool for c in BOOL_COLUMNS)
+            and all(isinstance(dtypes[c], pd.CategoricalDtype) for c in CATEGORY_COLUMNS))
+
+
+def apply_expense_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """EXPENSE DataFrame에 타입 계약 적용 (이미 적용된 경우 그대로 반환)
+
+    rcms_code가 비어 있고 rcms_name만 있는 행은 항목명으로 코드를 채운 뒤 rcms_name을 제거하고,
+    id가 없는 행에는 기존 최대 id 다음 번호를 부여한다.
+    """
+    if conforms_to_schema(df):
+        return df
+
+    columns = {}
+    for column in EXPENSE_COLUMNS:
+        columns[column] = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    # rcms_name → rcms_code (코드가 없는 행만)
+    if DERIVED_COLUMN in df.columns:
+        codes = _to_text(columns["rcms_code"]) if not isinstance(columns["rcms_code"].dtype, pd.CategoricalDtype) \
+            else columns["rcms_code"].astype(object)
+        missing = codes.isna()
+        if missing.any():
+            names = _to_text(df[DERIVED_COLUMN])
+            codes = codes.where(~missing, names.map(_name_to_code()))
+        columns["rcms_code"] = codes
+
+    # id가 없는 행은 새 번호 부여
+    ids = pd.to_numeric(columns["id"], errors="coerce")
+    if ids.isna().any():
+        start = int(ids.max()) if ids.notna().any() else 0
+        ids = ids.astype("float64")
+        ids[ids.isna()] = range(start + 1, start + 1 + int(ids.isna().sum()))
+    columns["id"] = ids
+
+    known = get_known_categories()
+    for column in EXPENSE_COLUMNS:
+        if column in CATEGORY_COLUMNS:
+            columns[column] = _to_category(columns[column], known[column])
+        else:
+            columns[column] = coerce_expense_values(column, columns[column])
+
+    result = pd.DataFrame(columns, index=df.index)
+    extras = [c for c in df.columns if c not in EXPENSE_COLUMNS and c != DERIVED_COLUMN]
+    for column in extras:
+        result[column] = df[column]
+    return result.reset_index(drop=True)
+
+
+def union_categories(frames: Iterable[pd.DataFrame]) -> List[pd.DataFrame]:
+    """여러 EXPENSE DataFrame의 category 범주를 맞춤 (concat 후에도 category 유지)"""
+    frames = list(frames)
+    for column in CATEGORY_COLUMNS:
+        categories: List = []
+        for frame in frames:
+            if column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype):
+                seen = set(categories)
+                categories.extend(c for c in frame[column].cat.categories if c not in seen)
+        for i, frame in enumerate(frames):
+            if column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype) \
+                    and list(frame[column].cat.categories) != categories:
+                frames[i] = frame.assign(**{column: frame[column].cat.set_categories(categories)})
+    return frames
+
+
+def combine_expense_chunks(chunks: List[pd.DataFrame], missing_ids: np.ndarray) -> pd.DataFrame:
+    """청크별로 타입 계약을 적용한 EXPENSE를 하나로 합침 (전체에 apply_expense_schema를 적용한 결과와 같음)
+
+    범주는 기본 범주 + 모든 청크의 추가 범주(정렬) 순서로 다시 맞추고,
+    missing_ids(원래 id가 없던 행 표시)에는 전체 최대 id 다음 번호를 순서대로 부여한다.
+    """
+    result = pd.concat(union_categories(chunks), ignore_index=True) if len(chunks) > 1 else chunks[0]
+    known = get_known_categories()
+    for column in CATEGORY_COLUMNS:
+        result[column] = _to_category(result[column], known[column])
+    if missing_ids.any():
+        valid = result["id"].to_numpy()[~missing_ids]
+        start = int(valid.max()) if len(valid) else 0
+        ids = result["id"].to_numpy().copy()
+        ids[missing_ids] = np.arange(start + 1, start + 1 + int(missing_ids.sum()))
+        result["id"] = ids
+    return result
+
+
+def get_rcms_name(code) -> Optional[str]:
+    """rcms_code 1개의 RCMS 항목명 (get_rcms_names와 같은 기준)"""
+    return _code_to_name().get(code) if code is not None else None
+
+
+def get_rcms_names(codes: pd.Series) -> pd.Series:
+    """rcms_code로 RCMS 항목명 계산 (category면 범주 수만큼만 조회)"""
+    return codes.map(_code_to_name())
+
+
+def with_rcms_name(df: pd.DataFrame) -> pd.DataFrame:
+    """rcms_code 다음에 rcms_name 컬럼을 붙인 DataFrame (표시/저장용)"""
+    if DERIVED_COLUMN in df.columns or "rcms_code" not in df.columns:
+        return df
+    result = df.copy(deep=False)
+    names = get_rcms_names(df["rcms_code"])
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        names = names.astype(object)
+    result.insert(result.columns.get_loc("rcms_code") + 1, DERIVED_COLUMN, names)
+    return result
+
+
+def to_storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """파일 저장용 EXPENSE (rcms_name 포함, 사용일자는 기존과 같은 YYYY-MM-DD 문자열)"""
+    result = with_rcms_name(df)
+    if "사용일자" in result.columns and pd.api.types.is_datetime64_dtype(result["사용일자"]):
+        if result is df:
+            result = df.copy(deep=False)
+        result["사용일자"] = result["사용일자"].dt.strftime(DATE_FORMAT)
+    return result
@@ -0,0 +1,102 @@
+"""
+지출내역 기준일 집계 모듈
+사용일자 순으로 한 번 정렬하고 키별 누적 합계를 보관하여, 임의 기준일까지의 집계를 이진 탐색으로 계산한다.
+- totals_as_of(기준일): 기준일까지의 ExpenseTotals (BudgetCalculator.*_from_totals에 그대로 사용)
+- monthly_series(): 월말 기준 키별 누적 금액 (한 번의 bincount)
+정산 여부는 현재 값 기준 (정산 시점은 기록하지 않음), 사용일자가 없는 행은 기준일 집계에서 제외한다.
+"""
+from typing import Dict
+import numpy as np
+import pandas as pd
+
+from expense_totals import ExpenseTotals, key_codes, sum_by_code
+
+
+def _day_end(as_of) -> np.datetime64:
+    """기준일 다음 날 0시 (기준일 당일 지출까지 포함)"""
+    return np.datetime64(pd.Timestamp(as_of).normalize() + pd.Timedelta(days=1), 'ns')
+
+
+class _KeyedPrefix:
+    """키별로 모은 (사용일자, 누적 금액) 배열 (키 안에서는 사용일자 순)"""
+
+    def __init__(self, codes: np.ndarray, labels: list, dates: np.ndarray, amounts: np.ndarray):
+        # 사용일자 순으로 넘어온 행을 안정 정렬로 키별로 모음 (키 안의 날짜 순서 유지)
+        order = np.argsort(codes, kind='stable')
+        self.labels = labels
+        self.codes = codes[order]
+        self.dates = dates[order]
+        self.amounts = amounts[order]
+        self.cumsum = np.cumsum(self.amounts)
+        keys = np.arange(len(labels))
+        self.starts = np.searchsorted(self.codes, keys, side='left')
+        self.ends = np.searchsorted(self.codes, keys, side='right')
+
+    def sums_as_of(self, day_end: np.datetime64) -> Dict[str, int]:
+        """기준 시각 전까지의 키별 합계 (행이 있는 키만 포함)"""
+        sums = {}
+        for key in np.flatnonzero(self.ends > self.starts):
+            start = self.starts[key]
+            count = np.searchsorted(self.dates[start:self.ends[key]], day_end, side='left')
+            if count:
+                before = self.cumsum[start - 1] if start else 0
+                sums[self.labels[key]] = int(self.cumsum[start + count - 1] - before)
+        return sums
+
+    def monthly(self, first_month: int, month_count: int) -> pd.DataFrame:
+        """월(행) × 키(열) 누적 금액 (행이 있는 키만 열로 포함)"""
+        label_count = len(self.labels)
+        months = self.dates.astype('datetime64[M]').astype(np.int64) - first_month
+        cells = np.where(self.codes >= 0, months * label_count + self.codes, -1)
+        sums = sum_by_code(cells, self.amounts, month_count * label_count)
+        series = sums.reshape(month_count, label_count).cumsum(axis=0)
+        used = np.flatnonzero(self.ends > self.starts)
+        return pd.DataFrame(series[:, used], columns=[self.labels[key] for key in used])
+
+
+class ExpenseTimeline:
+    """지출내역 기준일 집계 클래스 (생성 시 한 번 정렬, 이후 읽기 전용)
+
+    기준일 조회는 키마다 이진 탐색 한 번 (O(키 수 × log n)), 월별 누적은 배열 전체 한 번 계산.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        dates = df['사용일자'].to_numpy(dtype='datetime64[ns]')
+        dated = np.flatnonzero(~np.isnat(dates))
+        order = dated[np.argsort(dates[dated], kind='stable')]
+        self._dates = dates[order]
+        amounts = df['지출결의액'].to_numpy(dtype=np.int64)[order]
+        settled = df['rcms_settled'].to_numpy(dtype=bool)[order]
+        stat_codes, stats = key_codes(df['통계목명'])
+        rcms_codes, rcms = key_codes(df['rcms_code'])
+        self._executed = _KeyedPrefix(stat_codes[order], stats, self._dates, amounts)
+        # 미정산 행은 결측 코드(-1)로 보내 정산 합계에서 제외 (ExpenseTotals와 동일)
+        self._settled = _KeyedPrefix(np.where(settled, rcms_codes[order], -1), rcms, self._dates, amounts)
+        self._unsettled_dates = self._dates[~settled]
+        self._unsettled_cumsum = np.cumsum(amounts[~settled])
+        self._unsettled_ids = df['id'].to_numpy()[order][~settled]
+
+    def totals_as_of(self, as_of) -> ExpenseTotals:
+        """기준일(당일 포함)까지 사용된 지출의 집계"""
+        day_end = _day_end(as_of)
+        totals = ExpenseTotals()
+        totals.executed = self._executed.sums_as_of(day_end)
+        totals.settled = self._settled.sums_as_of(day_end)
+        unsettled_count = int(np.searchsorted(self._unsettled_dates, day_end, side='left'))
+        totals.unsettled_count = unsettled_count
+        totals.unsettled_amount = int(self._unsettled_cumsum[unsettled_count - 1]) if unsettled_count else 0
+        totals.unsettled_ids = set(self._unsettled_ids[:unsettled_count].tolist())
+        totals.row_count = int(np.searchsorted(self._dates, day_end, side='left'))
+        return totals
+
+    def monthly_series(self, basis: str = 'ERP') -> pd.DataFrame:
+        """월말 기준 누적 금액 (ERP: 통계목명별 집행액, RCMS: rcms_code별 정산 금액, 인덱스는 월)"""
+        prefix = self._executed if basis == 'ERP' else self._settled
+        if not len(self._dates):
+            return pd.DataFrame()
+        months = self._dates[[0, -1]].astype('datetime64[M]').astype(np.int64)
+        month_count = int(months[1] - months[0]) + 1
+        series = prefix.monthly(int(months[0]), month_count)
+        series.index = pd.period_range(start=pd.Timestamp(self._dates[0]), periods=month_count, freq='M')
+        return series
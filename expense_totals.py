@@ -0,0 +1,185 @@
+"""
+지출내역 누적 집계 모듈
+ERP/RCMS 예산 집계에 필요한 합계를 보관하고, 행 추가/수정/삭제 시 바뀐 행만큼만 더하고 뺀다.
+- 통계목명별 집행액 (전체 행)
+- rcms_code별 정산 금액 (rcms_settled 행)
+- 미정산 금액/건수, 미정산 id
+큰 프레임은 금액/키 코드/정산 여부 배열을 한 번 읽어 np.bincount로 모든 합계를 함께 계산한다.
+"""
+from typing import Dict, Set, List, Tuple, Optional
+import numpy as np
+import pandas as pd
+
+
+# 집계에 쓰이는 컬럼 (이 컬럼이 바뀐 수정만 누적 집계에 반영)
+TOTAL_COLUMNS = ["id", "통계목명", "지출결의액", "rcms_code", "rcms_settled"]
+
+# 이 행 수 이하의 증감분은 groupby 대신 파이썬 반복으로 반영 (행 몇 개 수정 시 pandas 고정 비용 회피)
+LOOP_MAX_ROWS = 256
+
+# bincount는 실수 가중치로 더하므로 금액 절댓값 합이 이 값 미만일 때만 정수 합과 같음이 보장됨
+_EXACT_FLOAT_LIMIT = 2 ** 53
+
+
+def key_codes(keys: pd.Series) -> Tuple[np.ndarray, list]:
+    """키 컬럼의 정수 코드(결측은 -1)와 코드별 키 (category는 기존 코드 사용)"""
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return keys.cat.codes.to_numpy(), list(keys.cat.categories)
+    codes, uniques = pd.factorize(keys, use_na_sentinel=True)
+    return codes, list(uniques)
+
+
+def sum_by_code(codes: np.ndarray, amounts: np.ndarray, size: int) -> np.ndarray:
+    """코드(0..size-1)별 정수 금액 합계 (코드 -1 제외)
+    
+    금액 범위가 실수로 정확히 더해지는 경우 bincount, 아니면 정수 np.add.at으로 계산한다.
+    """
+    shifted = codes.astype(np.intp) + 1
+    if not len(amounts) or int(np.abs(amounts).max()) * len(amounts) < _EXACT_FLOAT_LIMIT:
+        return np.bincount(shifted, weights=amounts, minlength=size + 1)[1:].astype(np.int64)
+    sums = np.zeros(size + 1, dtype=np.int64)
+    np.add.at(sums, shifted, amounts)
+    return sums[1:]
+
+
+def _bincount_sums(codes: np.ndarray, labels: list, amounts: np.ndarray) -> Dict[str, int]:
+    """코드별 금액 합계 (코드 -1 제외, groupby(observed=True)처럼 행이 있는 키만 포함)"""
+    counts = np.bincount(codes.astype(np.intp) + 1, minlength=len(labels) + 1)[1:]
+    sums = sum_by_code(codes, amounts, len(labels))
+    return {labels[i]: int(sums[i]) for i in np.flatnonzero(counts)}
+
+
+def _fused_sums(df: pd.DataFrame) -> Tuple[Dict[str, int], Dict[str, int], int, int, List[int]]:
+    """한 번의 배열 읽기로 (통계목명별 집행액, rcms_code별 정산 금액, 미정산 금액, 미정산 건수, 미정산 id) 계산"""
+    amounts = df['지출결의액'].to_numpy(dtype=np.int64)
+    settled = df['rcms_settled'].to_numpy(dtype=bool)
+    stat_codes, stats = key_codes(df['통계목명'])
+    rcms_codes, rcms = key_codes(df['rcms_code'])
+    executed = _bincount_sums(stat_codes, stats, amounts)
+    # 미정산 행은 결측 코드(-1)로 보내 정산 합계에서 제외
+    settled_sums = _bincount_sums(np.where(settled, rcms_codes, -1), rcms, amounts)
+    settled_amount = int(amounts @ settled)
+    settled_count = int(np.count_nonzero(settled))
+    unsettled_ids = df['id'].to_numpy()[~settled].tolist()
+    return (executed, settled_sums, int(amounts.sum()) - settled_amount,
+            len(amounts) - settled_count, unsettled_ids)
+
+
+def _merge(target: Dict[str, int], sums: Dict[str, int], sign: int) -> None:
+    """키별 합계를 부호를 붙여 누적"""
+    for key, value in sums.items():
+        target[key] = target.get(key, 0) + sign * value
+
+
+class ExpenseTotals:
+    """지출내역 누적 집계 클래스 (expense_schema 타입 계약을 따르는 행 기준)"""
+
+    def __init__(self):
+        self.executed: Dict[str, int] = {}
+        self.settled: Dict[str, int] = {}
+        self.unsettled_amount = 0
+        self.unsettled_count = 0
+        self.unsettled_ids: Set[int] = set()
+        self.row_count = 0
+        # 정렬된 미정산 id 목록 (바뀌기 전까지 재사용)
+        self._sorted_unsettled_ids: Optional[List[int]] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ExpenseTotals":
+        """전체 행으로 새로 계산"""
+        totals = cls()
+        totals.add(df)
+        return totals
+
+    def add(self, df: pd.DataFrame) -> None:
+        """행 추가분 반영"""
+        self._apply(df, 1)
+
+    def subtract(self, df: pd.DataFrame) -> None:
+        """행 삭제분(또는 수정 전 값) 반영"""
+        self._apply(df, -1)
+
+    def add_row(self, row: Dict) -> None:
+        """행 1개 추가분 반영 (TOTAL_COLUMNS 값 dict, 행 1개 수정 시 DataFrame 생성 생략)"""
+        self._sorted_unsettled_ids = None
+        self._apply_row(row['id'], row['통계목명'], row['rcms_code'], row['지출결의액'], row['rcms_settled'], 1)
+        self.row_count += 1
+
+    def subtract_row(self, row: Dict) -> None:
+        """행 1개 삭제분(또는 수정 전 값) 반영"""
+        self._sorted_unsettled_ids = None
+        self._apply_row(row['id'], row['통계목명'], row['rcms_code'], row['지출결의액'], row['rcms_settled'], -1)
+        self.row_count -= 1
+
+    def _apply(self, df: pd.DataFrame, sign: int) -> None:
+        if df.empty:
+            return
+        self._sorted_unsettled_ids = None
+        if len(df) <= LOOP_MAX_ROWS:
+            self._apply_rows(df, sign)
+            return
+        executed, settled, unsettled_amount, unsettled_count, unsettled_ids = _fused_sums(df)
+        _merge(self.executed, executed, sign)
+        _merge(self.settled, settled, sign)
+        self.unsettled_amount += sign * unsettled_amount
+        self.unsettled_count += sign * unsettled_count
+        if sign > 0:
+            self.unsettled_ids.update(unsettled_ids)
+        else:
+            self.unsettled_ids.difference_update(unsettled_ids)
+        self.row_count += sign * len(df)
+
+    def _apply_rows(self, df: pd.DataFrame, sign: int) -> None:
+        """적은 행의 증감분 반영 (_apply와 같은 결과)"""
+        rows = zip(df['id'].tolist(), df['통계목명'].tolist(), df['rcms_code'].tolist(),
+                   df['지출결의액'].tolist(), df['rcms_settled'].tolist())
+        for row_id, stat, code, amount, settled in rows:
+            self._apply_row(row_id, stat, code, amount, settled, sign)
+        self.row_count += sign * len(df)
+
+    def _apply_row(self, row_id: int, stat, code, amount: int, settled: bool, sign: int) -> None:
+        """행 1개의 합계 증감 (row_count는 호출한 쪽에서 반영)"""
+        if not pd.isna(stat):
+            self.executed[stat] = self.executed.get(stat, 0) + sign * amount
+        if settled:
+            if not pd.isna(code):
+                self.settled[code] = self.settled.get(code, 0) + sign * amount
+            return
+        self.unsettled_amount += sign * amount
+        self.unsettled_count += sign
+        if sign > 0:
+            self.unsettled_ids.add(row_id)
+        else:
+            self.unsettled_ids.discard(row_id)
+
+    def get_unsettled_info(self) -> Dict:
+        """미정산 금액/건수/id 목록 (BudgetCalculator.calculate_rcms_budget 반환값과 같은 형식, id 목록은 읽기 전용)"""
+        return {
+            "미정산_금액": self.unsettled_amount,
+            "미정산_건수": self.unsettled_count,
+            "미정산_ID_목록": self.get_unsettled_ids()
+        }
+
+    def get_unsettled_ids(self) -> List[int]:
+        """정렬된 미정산 id 목록 (수정하지 말고 읽기만 함)"""
+        if self._sorted_unsettled_ids is None:
+            self._sorted_unsettled_ids = sorted(self.unsettled_ids)
+        return self._sorted_unsettled_ids
+
+    def compare(self, other: "ExpenseTotals") -> Tuple[bool, Optional[str]]:
+        """다른 집계와 같은지 비교 (합계가 0인 키는 없는 것으로 봄)"""
+        def nonzero(sums: Dict[str, int]) -> Dict[str, int]:
+            return {key: value for key, value in sums.items() if value != 0}
+
+        checks: List[Tuple[str, object, object]] = [
+            ("통계목명별 집행액", nonzero(self.executed), nonzero(other.executed)),
+            ("rcms_code별 정산 금액", nonzero(self.settled), nonzero(other.settled)),
+            ("미정산 금액", self.unsettled_amount, other.unsettled_amount),
+            ("미정산 건수", self.unsettled_count, other.unsettled_count),
+            ("미정산 id", self.unsettled_ids, other.unsettled_ids),
+            ("행 수", self.row_count, other.row_count),
+        ]
+        for name, mine, theirs in checks:
+            if mine != theirs:
+                return False, f"{name} 불일치: {mine} != {theirs}"
+        return True, None
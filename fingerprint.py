@@ -0,0 +1,86 @@
+"""
+행 지문 모듈
+업무 컬럼 값으로 계산한 행별 64비트 해시 (변경 감지용, 파일에는 저장하지 않음)
+- 같은 값이면 category/문자열/object, 정수/실수 타입이 달라도 같은 지문
+- 결측값(None/NaN)끼리는 같은 값으로 취급
+"""
+from typing import Dict, List, Sequence
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+
+# 지출내역 지문에 포함하는 업무 컬럼 (id, created_at/updated_at 제외)
+EXPENSE_FINGERPRINT_COLUMNS = [
+    "통계목명", "사용일자", "지출결의명", "상세내역",
+    "지출결의액", "rcms_code", "rcms_settled"
+]
+
+# 예산 시트별 행 키와 사용자가 입력하는 컬럼 (집계 결과 컬럼 제외)
+BUDGET_FINGERPRINT_COLUMNS = {
+    "ERP_BUDGET": ("통계목명", ["실행예산"]),
+    "RCMS_BUDGET": ("rcms_code", ["rcms_name", "budget_amount"]),
+}
+
+_MULTIPLIER = np.uint64(1000003)
+# 결측값 해시 (pandas가 category 결측값에 쓰는 값과 동일, 모든 타입에 공통 적용)
+_MISSING_HASH = np.uint64(np.iinfo(np.uint64).max)
+# 이 행 수를 넘는 문자열 컬럼은 고유값만 해시 (중복이 많은 큰 컬럼에서 빠름, 결과는 같음)
+CATEGORIZE_MIN_ROWS = 1000
+
+
+def hash_column(values: pd.Series) -> np.ndarray:
+    """컬럼 값별 64비트 해시 (숫자는 실수로 맞춘 뒤 계산)
+
+    Series 단위 hash_pandas_object보다 고정 비용이 작은 hash_array를 배열에 직접 사용한다.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        hashes = hash_array(values.array)
+    elif pd.api.types.is_numeric_dtype(values):
+        hashes = hash_array(values.to_numpy(dtype="float64", na_value=np.nan))
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        hashes = hash_array(values.to_numpy())
+    else:
+        hashes = hash_array(values.to_numpy(dtype=object), categorize=len(values) > CATEGORIZE_MIN_ROWS)
+    # 결측값은 타입과 관계없이 같은 해시 (모두 결측인 컬럼은 float64로 넘어오기도 함)
+    hashes[values.isna().to_numpy()] = _MISSING_HASH
+    return hashes
+
+
+def missing_hash(length: int) -> np.ndarray:
+    """결측값만 있는 컬럼의 해시 (컬럼이 없는 경우에 사용)"""
+    return hash_column(pd.Series([None] * length, dtype=object))
+
+
+def combine_hashes(column_hashes: Sequence[np.ndarray]) -> np.ndarray:
+    """컬럼별 해시를 순서대로 섞어 행 지문 계산"""
+    result = np.zeros(len(column_hashes[0]) if column_hashes else 0, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for hashes in column_hashes:
+            result = (result ^ hashes) * _MULTIPLIER
+    return result
+
+
+def row_fingerprints(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """행별 지문 (없는 컬럼은 결측값으로 취급)"""
+    return combine_hashes([hash_column(df[column]) if column in df.columns else missing_hash(len(df))
+                           for column in columns])
+
+
+def keyed_fingerprints(df: pd.DataFrame, key_column: str, columns: List[str]) -> Dict[str, int]:
+    """행 키(문자열) → 지문 (키가 중복되면 마지막 행 기준)"""
+    if df.empty or key_column not in df.columns:
+        return {}
+    keys = df[key_column].astype(str).str.strip()
+    return dict(zip(keys, row_fingerprints(df, columns).tolist()))
+
+
+def budget_fingerprints(sheet_name: str, df: pd.DataFrame) -> Dict[str, int]:
+    """예산 시트의 행 키 → 입력값 지문"""
+    key_column, columns = BUDGET_FINGERPRINT_COLUMNS[sheet_name]
+    return keyed_fingerprints(df, key_column, columns)
+
+
+def changed_keys(before: Dict[str, int], after: Dict[str, int]) -> List[str]:
+    """지문이 달라졌거나 추가/삭제된 행 키"""
+    return [key for key in dict.fromkeys(list(before) + list(after)) if before.get(key) != after.get(key)]
@@ -0,0 +1,186 @@
+"""
+집행액 불일치 분석 모듈
+ERP 총 집행액과 RCMS 총 집행액이 다를 때 차이를 만든 지출내역을 찾는다.
+- explain_execution_gap(): 행별 차이 기여 (미정산, rcms_code 없음/예산에 없는 코드, ERP 예산에 없는 통계목명)와
+  RCMS 예산의 항목명과 다른 rcms_name 행
+- find_subset_sums(): 합계가 지정 금액과 같은 행 조합 (1~2개는 전체 행, 3개 이상은 후보 행 meet-in-the-middle, 시간 제한)
+"""
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+from expense_schema import DERIVED_COLUMN, get_rcms_names
+
+
+# 차이 사유 (ERP 집행액 - RCMS 집행액에 대한 기여 부호)
+REASON_UNSETTLED = "미정산"                          # +
+REASON_MISSING_CODE = "rcms_code 없음"               # +
+REASON_UNKNOWN_CODE = "RCMS 예산에 없는 rcms_code"    # +
+REASON_UNKNOWN_ERP = "ERP 예산에 없는 통계목명"        # -
+REASON_NAME_MISMATCH = "rcms_name 불일치"            # 0 (금액 차이는 없으나 분류 확인 필요)
+# 판정 순서 (앞 사유가 우선)
+REASONS = [REASON_UNSETTLED, REASON_MISSING_CODE, REASON_UNKNOWN_CODE, REASON_UNKNOWN_ERP, REASON_NAME_MISMATCH]
+
+GAP_ROW_COLUMNS = ["id", "사용일자", "통계목명", "rcms_code", "rcms_name", "지출결의명", "지출결의액", "사유", "차이_기여"]
+
+# 조합 탐색 기본값
+SUBSET_MAX_RESULTS = 10
+SUBSET_TIME_BUDGET = 1.0   # 초
+# meet-in-the-middle 후보 행 수 상한 (절반씩 2^18개 부분합)
+MITM_MAX_ROWS = 36
+
+
+def explain_execution_gap(expense_df: pd.DataFrame, erp_budget_df: pd.DataFrame,
+                          rcms_budget_df: pd.DataFrame) -> Dict:
+    """ERP/RCMS 총 집행액 차이를 행 단위로 설명
+
+    ERP 총 집행액은 ERP 예산의 통계목명('총액' 제외)에 속한 전체 행, RCMS 총 집행액은 RCMS 예산의 rcms_code에 속한
+    정산 완료 행의 합계이므로 두 조건 중 하나만 만족하는 행이 차이를 만든다.
+
+    Returns:
+        {"설명된_차이": 행별 기여 합계, "사유별": 사유별 건수/금액 DataFrame, "rows": 원인 행 DataFrame (기여 절댓값 순)}
+    """
+    erp_stats = set(erp_budget_df['통계목명'].astype(str).str.strip()) - {'총액'} if not erp_budget_df.empty else set()
+    rcms_codes = rcms_budget_df['rcms_code'].astype(str).str.strip() if not rcms_budget_df.empty \
+        else pd.Series(dtype=object)
+    budget_names = dict(zip(rcms_codes, rcms_budget_df['rcms_name'])) if 'rcms_name' in rcms_budget_df.columns else {}
+
+    amounts = expense_df['지출결의액'].to_numpy(dtype=np.int64)
+    settled = expense_df['rcms_settled'].to_numpy(dtype=bool)
+    code_missing = expense_df['rcms_code'].isna().to_numpy()
+    in_erp = expense_df['통계목명'].isin(list(erp_stats)).to_numpy()
+    in_rcms = expense_df['rcms_code'].isin(list(rcms_codes)).to_numpy()
+    in_rcms_total = settled & in_rcms
+    contribution = np.where(in_erp, amounts, 0) - np.where(in_rcms_total, amounts, 0)
+
+    # 표시 이름과 RCMS 예산의 항목명 비교
+    if DERIVED_COLUMN in expense_df.columns:
+        # 저장된 rcms_name이 있는 프레임(파일에서 읽은 원본 등)은 행마다 비교
+        stored = expense_df[DERIVED_COLUMN].astype(object)
+        expected = expense_df['rcms_code'].astype(object).map(budget_names)
+        name_mismatch = (in_rcms & stored.notna().to_numpy() & expected.notna().to_numpy()
+                         & (stored.astype(str).str.strip() != expected.astype(str).str.strip()).to_numpy())
+    else:
+        # 메모리 내 rcms_name은 코드로 계산되므로 코드별로 한 번만 비교
+        derived = get_rcms_names(pd.Series(list(budget_names), dtype=object))
+        mismatched = [code for code, name in zip(budget_names, derived)
+                      if pd.notna(name) and pd.notna(budget_names[code]) and name != str(budget_names[code]).strip()]
+        name_mismatch = expense_df['rcms_code'].isin(mismatched).to_numpy()
+
+    # 사유 번호 (0은 사유 없음, 1부터 REASONS 순서)
+    reason_codes = np.select(
+        [in_erp & ~settled, in_erp & ~in_rcms_total & code_missing, in_erp & ~in_rcms_total,
+         ~in_erp & in_rcms_total, name_mismatch],
+        np.arange(1, len(REASONS) + 1), default=0)
+    flagged = np.flatnonzero(((contribution != 0) | name_mismatch) & (reason_codes > 0))
+    names = expense_df[DERIVED_COLUMN].iloc[flagged] if DERIVED_COLUMN in expense_df.columns \
+        else get_rcms_names(expense_df['rcms_code'].iloc[flagged])
+
+    rows = expense_df.iloc[flagged]
+    rows = pd.DataFrame({
+        "id": rows['id'].to_numpy(),
+        "사용일자": rows['사용일자'].to_numpy(),
+        "통계목명": rows['통계목명'].astype(object).to_numpy(),
+        "rcms_code": rows['rcms_code'].astype(object).to_numpy(),
+        "rcms_name": names.astype(object).to_numpy(),
+        "지출결의명": rows['지출결의명'].to_numpy(),
+        "지출결의액": amounts[flagged],
+        "사유": np.array([""] + REASONS, dtype=object)[reason_codes[flagged]],
+        "차이_기여": contribution[flagged],
+    }, columns=GAP_ROW_COLUMNS)
+    rows = rows.iloc[np.argsort(-np.abs(rows['차이_기여'].to_numpy()), kind='stable')].reset_index(drop=True)
+    by_reason = rows.groupby('사유', sort=False).agg(건수=('id', 'size'), 차이_기여=('차이_기여', 'sum')).reset_index()
+
+    return {
+        "설명된_차이": int(contribution.sum()),
+        "사유별": by_reason,
+        "rows": rows
+    }
+
+
+def _subset_sums(amounts: np.ndarray) -> np.ndarray:
+    """모든 부분집합의 합 (인덱스의 비트 i가 i번째 행 포함 여부)"""
+    sums = np.zeros(1, dtype=np.int64)
+    for amount in amounts:
+        sums = np.concatenate([sums, sums + amount])
+    return sums
+
+
+def _mask_positions(mask: int, positions: np.ndarray) -> List[int]:
+    """비트마스크에 해당하는 위치"""
+    return [int(positions[i]) for i in range(len(positions)) if mask >> i & 1]
+
+
+def find_subset_sums(ids, amounts, target: int, max_results: int = SUBSET_MAX_RESULTS,
+                     time_budget: float = SUBSET_TIME_BUDGET) -> Tuple[List[List[int]], bool]:
+    """합계가 target과 같은 행 조합 (적은 행 수 조합부터)
+
+    1개/2개 조합은 전체 행에서 정렬 + 이진 탐색으로 찾고, 3개 이상 조합은 앞쪽 후보 행(최대 MITM_MAX_ROWS개,
+    target과 부호가 같고 절댓값이 target 이하인 행)에서 meet-in-the-middle로 찾는다. 후보 순서는 호출한 쪽의 행 순서.
+
+    Returns:
+        (id 조합 목록, 탐색 완료 여부) - 시간 제한/결과 수 제한/후보 제한으로 멈추면 False
+    """
+    deadline = time.perf_counter() + time_budget
+    ids = np.asarray(ids)
+    amounts = np.asarray(amounts, dtype=np.int64)
+    target = int(target)
+    found: Dict[Tuple[int, ...], None] = {}
+
+    def add(positions) -> bool:
+        """조합 추가 (결과 수 제한에 도달하면 False)"""
+        found.setdefault(tuple(sorted(positions)), None)
+        return len(found) < max_results
+
+    complete = True
+    # 1개
+    for position in np.flatnonzero(amounts == target):
+        if not add([position]):
+            return _result(found, ids), False
+
+    # 2개 (정렬 후 target - 금액을 이진 탐색)
+    order = np.argsort(amounts, kind='stable')
+    sorted_amounts = amounts[order]
+    needed = target - sorted_amounts
+    low = np.searchsorted(sorted_amounts, needed, side='left')
+    high = np.searchsorted(sorted_amounts, needed, side='right')
+    for i in np.flatnonzero(high > np.maximum(low, np.arange(len(order)) + 1)):
+        for j in range(max(low[i], i + 1), high[i]):
+            if not add([order[i], order[j]]):
+                return _result(found, ids), False
+        if time.perf_counter() > deadline:
+            return _result(found, ids), False
+
+    # 3개 이상 (후보 행 meet-in-the-middle)
+    if target > 0 and (amounts >= 0).all():
+        eligible = np.flatnonzero((amounts > 0) & (amounts <= target))
+    elif target < 0 and (amounts <= 0).all():
+        eligible = np.flatnonzero((amounts < 0) & (amounts >= target))
+    else:
+        eligible = np.arange(len(amounts))
+    if len(eligible) > MITM_MAX_ROWS:
+        eligible = eligible[:MITM_MAX_ROWS]
+        complete = False
+    if len(eligible) >= 3:
+        half = len(eligible) // 2
+        left, right = eligible[:half], eligible[half:]
+        left_sums = _subset_sums(amounts[left])
+        right_sums = _subset_sums(amounts[right])
+        right_order = np.argsort(right_sums, kind='stable')
+        sorted_right = right_sums[right_order]
+        low = np.searchsorted(sorted_right, target - left_sums, side='left')
+        high = np.searchsorted(sorted_right, target - left_sums, side='right')
+        for left_mask in np.flatnonzero(high > low):
+            for k in range(low[left_mask], high[left_mask]):
+                positions = _mask_positions(int(left_mask), left) + _mask_positions(int(right_order[k]), right)
+                if len(positions) >= 3 and not add(positions):
+                    return _result(found, ids), False
+            if time.perf_counter() > deadline:
+                return _result(found, ids), False
+    return _result(found, ids), complete
+
+
+def _result(found: Dict[Tuple[int, ...], None], ids: np.ndarray) -> List[List[int]]:
+    """위치 조합 → id 조합 (행 수가 적은 순)"""
+    return [[ids[p].item() for p in positions] for positions in sorted(found, key=len)]
@@ -0,0 +1,182 @@
+"""
+포트폴리오 모듈
+상위 폴더 아래의 여러 과제 master 파일을 찾아 병렬(프로세스 풀)로 로드하고,
+과제 컬럼을 붙인 통합 ERP/RCMS 집행 결과 생성
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+import os
+
+import pandas as pd
+
+from budget_calculator import BudgetCalculator
+from data_manager import create_data_manager
+from sqlite_manager import get_db_path
+
+
+PROJECT_COLUMN = "과제"
+MASTER_SUFFIX = "_master"
+
+# 과제 수가 이보다 적으면 프로세스를 띄우지 않고 순차 로드
+MIN_PARALLEL_PROJECTS = 4
+
+
+def discover_master_files(root_folder: str) -> List[Path]:
+    """상위 폴더 아래의 과제 master 파일 목록 (*_master.xlsx / master.xlsx, SQLite는 *.db)
+
+    백업/캐시 폴더(.backups, .cache)와 숨김 파일(롤백, 임시 파일)은 제외한다.
+    같은 이름의 .xlsx와 .db가 함께 있으면 하나의 과제로 본다.
+    """
+    found: Dict[Path, Path] = {}
+    for dir_path, dir_names, file_names in os.walk(root_folder):
+        dir_names[:] = sorted(d for d in dir_names if not d.startswith("."))
+        for file_name in file_names:
+            path = Path(dir_path) / file_name
+            if file_name.startswith(".") or path.suffix not in (".xlsx", ".db"):
+                continue
+            if not (path.stem.endswith(MASTER_SUFFIX) or path.stem == "master"):
+                continue
+            # 과제는 엑셀 경로로 식별 (SQLite 과제도 내보내기 경로는 .xlsx)
+            found.setdefault(path.with_suffix(".xlsx"), path)
+    return sorted(found)
+
+
+def get_project_name(file_path: Path, root_folder: Path) -> str:
+    """과제 이름 (상위 폴더 기준 상대 경로, 최상위에 있으면 파일명)"""
+    try:
+        relative = file_path.parent.resolve().relative_to(root_folder.resolve())
+    except ValueError:
+        relative = Path(file_path.parent.name)
+    name = relative.as_posix()
+    return name if name and name != "." else file_path.stem
+
+
+def detect_backend(file_path: Path) -> str:
+    """과제 파일의 저장 방식 (같은 이름의 .db가 있으면 SQLite, 없으면 엑셀)"""
+    return "sqlite" if get_db_path(Path(file_path)).exists() else "xlsx"
+
+
+def load_project(file_path: str, backend: str = "xlsx") -> Dict:
+    """과제 1개 로드 후 ERP/RCMS 집계 (프로세스 풀 작업 함수)
+
+    지출내역 전체 대신 집계 결과만 반환하여 프로세스 간 전송량을 줄인다.
+    시트 캐시가 유효하면 엑셀 파싱 없이 로드된다.
+    저장 방식은 검색 단계에서 정해 넘기므로 작업 프로세스에서는 설정 파일을 읽지 않는다.
+    """
+    try:
+        data_manager = create_data_manager(file_path, backend)
+        if not data_manager.file_exists():
+            return {"path": file_path, "error": "파일이 없습니다."}
+        data = data_manager.load_all()
+        if not data:
+            return {"path": file_path, "error": "파일을 읽을 수 없습니다."}
+
+        expense_df = data['EXPENSE']
+        erp_df, rcms_df, unsettled_info = BudgetCalculator.calculate_budgets(
+            expense_df, data['ERP_BUDGET'], data['RCMS_BUDGET'])
+        return {
+            "path": file_path,
+            "erp": erp_df,
+            "rcms": rcms_df,
+            "erp_summary": BudgetCalculator.get_erp_summary(erp_df),
+            "미정산_금액": unsettled_info["미정산_금액"],
+            "미정산_건수": unsettled_info["미정산_건수"],
+            "지출_건수": len(expense_df),
+            "error": None,
+        }
+    except Exception as e:
+        return {"path": file_path, "error": str(e)}
+
+
+class PortfolioManager:
+    """여러 과제 통합 조회 클래스"""
+
+    def __init__(self, root_folder: str):
+        self.root_folder = Path(root_folder)
+        self.projects: List[Path] = []
+        self.erp_df = pd.DataFrame()
+        self.rcms_df = pd.DataFrame()
+        self.summary_df = pd.DataFrame()
+        # 과제명 → 오류 메시지
+        self.errors: Dict[str, str] = {}
+
+    def discover(self) -> List[Path]:
+        """과제 master 파일 검색"""
+        self.projects = discover_master_files(str(self.root_folder))
+        return self.projects
+
+    def load(self, max_workers: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        """모든 과제를 병렬로 로드하여 통합 집행 결과 생성"""
+        try:
+            if not self.projects:
+                self.discover()
+            if not self.projects:
+                return False, "과제 파일을 찾을 수 없습니다."
+
+            paths = [str(p) for p in self.projects]
+            backends = [detect_backend(p) for p in self.projects]
+            workers = max_workers or os.cpu_count() or 1
+            if workers > 1 and len(paths) >= MIN_PARALLEL_PROJECTS:
+                chunksize = max(1, len(paths) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(load_project, paths, backends, chunksize=chunksize))
+            else:
+                results = [load_project(p, b) for p, b in zip(paths, backends)]
+
+            self._combine(results)
+            return True, None
+        except Exception as e:
+            error_msg = f"포트폴리오 로드 오류: {e}"
+            print(error_msg)
+            return False, error_msg
+
+    def _combine(self, results: List[Dict]) -> None:
+        """과제별 집계 결과를 과제 컬럼을 붙여 하나로 합침"""
+        erp_frames, rcms_frames, summary_rows = [], [], []
+        self.errors = {}
+        for result in results:
+            name = get_project_name(Path(result["path"]), self.root_folder)
+            if result["error"]:
+                self.errors[name] = result["error"]
+                continue
+            erp_frames.append(result["erp"].assign(**{PROJECT_COLUMN: name}))
+            rcms_frames.append(result["rcms"].assign(**{PROJECT_COLUMN: name}))
+            summary = result["erp_summary"]
+            summary_rows.append({
+                PROJECT_COLUMN: name,
+                "실행예산": summary["총_예산"],
+                "집행액": summary["총_집행액"],
+                "잔액": summary["총_잔액"],
+                "집행률": summary["총_집행률"],
+                "미정산_금액": result["미정산_금액"],
+                "미정산_건수": result["미정산_건수"],
+                "지출_건수": result["지출_건수"],
+            })
+
+        def _with_project_first(frames: List[pd.DataFrame]) -> pd.DataFrame:
+            if not frames:
+                return pd.DataFrame()
+            df = pd.concat(frames, ignore_index=True)
+            return df[[PROJECT_COLUMN] + [c for c in df.columns if c != PROJECT_COLUMN]]
+
+        self.erp_df = _with_project_first(erp_frames)
+        self.rcms_df = _with_project_first(rcms_frames)
+        self.summary_df = pd.DataFrame(summary_rows)
+
+    def get_erp_totals(self) -> pd.DataFrame:
+        """통계목명별 전체 과제 합계 (집행률 재계산)"""
+        if self.erp_df.empty:
+            return pd.DataFrame()
+        totals = self.erp_df.groupby('통계목명', sort=False)[['실행예산', '집행액', '잔액']].sum().reset_index()
+        totals['집행률'] = (totals['집행액'] / totals['실행예산'].where(totals['실행예산'] > 0) * 100).fillna(0.0)
+        return totals
+
+    def get_rcms_totals(self) -> pd.DataFrame:
+        """RCMS 세부항목별 전체 과제 합계 (집행률 재계산)"""
+        if self.rcms_df.empty:
+            return pd.DataFrame()
+        keys = [c for c in ['rcms_code', 'rcms_name', 'parent_category'] if c in self.rcms_df.columns]
+        totals = self.rcms_df.groupby(keys, sort=False)[['budget_amount', 'used_amount', 'balance']].sum().reset_index()
+        totals['rate'] = (totals['used_amount'] / totals['budget_amount'].where(totals['budget_amount'] > 0) * 100).fillna(0.0)
+        return totals
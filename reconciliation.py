@@ -0,0 +1,168 @@
+"""
+ERP-RCMS 대사 모듈
+MAPPING_ERP_RCMS 시트(ERP_통계목명 → rcms_code, priority)를 기준으로 지출내역을 대사한다.
+- ExpenseCrosstab: 통계목명 × rcms_code별 금액/정산 금액/건수 (배열을 한 번 읽어 bincount로 계산)
+- reconcile(): 통계목명별 ERP 집행액과 매핑된 RCMS 정산액의 차이, 매핑 규칙을 어긴 (통계목명, rcms_code) 쌍
+매핑 규칙
+- 매핑에 없는 통계목명, 매핑되지 않은 rcms_code, rcms_code 없음, 통계목명 없음: 위반
+- 매핑된 rcms_code 중 priority가 가장 높은(숫자가 가장 작은) 코드가 아님: 우선순위 주의
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from expense_totals import key_codes, sum_by_code
+from expense_schema import get_rcms_names
+from initial_data import get_rcms_code_by_name
+
+
+MAPPING_COLUMNS = ["ERP_통계목명", "rcms_code", "rcms_name", "priority"]
+
+# 대사 결과 사유
+REASON_MISSING_ERP = "통계목명 없음"
+REASON_UNMAPPED_ERP = "매핑 없는 통계목명"
+REASON_MISSING_CODE = "rcms_code 없음"
+REASON_UNMAPPED_CODE = "매핑 외 rcms_code"
+REASON_PRIORITY = "우선순위 아님"
+
+# 위반이 아닌 주의 사유
+WARNING_REASONS = [REASON_PRIORITY]
+
+SUMMARY_COLUMNS = ["통계목명", "매핑 rcms_code", "ERP 집행액", "RCMS 정산액", "차이", "미정산액", "매핑 외 정산액"]
+PAIR_COLUMNS = ["통계목명", "rcms_code", "rcms_name", "사유", "건수", "금액", "정산액"]
+
+
+def _clean_text(values: pd.Series) -> pd.Series:
+    """앞뒤 공백 제거 (빈 문자열은 결측값)"""
+    text = values.astype(object).map(lambda v: str(v).strip() if pd.notna(v) else None)
+    return text.where(text != "", None)
+
+
+def normalize_mapping(mapping_df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """매핑 시트 정리 (rcms_code가 비어 있으면 rcms_name으로 찾고, priority가 없으면 가장 낮은 우선순위)
+
+    같은 (통계목명, rcms_code) 쌍이 여러 번 있으면 가장 높은 우선순위만 남긴다.
+    """
+    if mapping_df is None or mapping_df.empty or "ERP_통계목명" not in mapping_df.columns:
+        return pd.DataFrame({"ERP_통계목명": pd.Series(dtype=object), "rcms_code": pd.Series(dtype=object),
+                             "priority": pd.Series(dtype=float)})
+    stats = _clean_text(mapping_df["ERP_통계목명"])
+    codes = _clean_text(mapping_df["rcms_code"]) if "rcms_code" in mapping_df.columns \
+        else pd.Series(None, index=mapping_df.index, dtype=object)
+    if "rcms_name" in mapping_df.columns:
+        names = _clean_text(mapping_df["rcms_name"])
+        codes = codes.where(codes.notna(), names.map(lambda name: get_rcms_code_by_name(name) if name else None))
+    priority = pd.to_numeric(mapping_df["priority"], errors="coerce") if "priority" in mapping_df.columns \
+        else pd.Series(np.nan, index=mapping_df.index)
+    result = pd.DataFrame({"ERP_통계목명": stats, "rcms_code": codes, "priority": priority.fillna(np.inf)})
+    result = result.dropna(subset=["ERP_통계목명", "rcms_code"])
+    return result.groupby(["ERP_통계목명", "rcms_code"], as_index=False, sort=False)["priority"].min()
+
+
+class ExpenseCrosstab:
+    """통계목명 × rcms_code 교차 집계 (스냅샷 1개 버전 기준, 읽기 전용)
+
+    행은 통계목명 범주 + 결측(마지막 행), 열은 rcms_code 범주 + 결측(마지막 열).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        stat_codes, stats = key_codes(df['통계목명'])
+        rcms_codes, codes = key_codes(df['rcms_code'])
+        self.stats: List[Optional[str]] = stats + [None]
+        self.codes: List[Optional[str]] = codes + [None]
+        height, width = len(self.stats), len(self.codes)
+        rows = np.where(stat_codes >= 0, stat_codes, height - 1).astype(np.int64)
+        cells = rows * width + np.where(rcms_codes >= 0, rcms_codes, width - 1)
+        amounts = df['지출결의액'].to_numpy(dtype=np.int64)
+        settled = df['rcms_settled'].to_numpy(dtype=bool)
+        self.amount = sum_by_code(cells, amounts, height * width).reshape(height, width)
+        # 미정산 행은 결측 코드(-1)로 보내 정산 금액에서 제외
+        self.settled = sum_by_code(np.where(settled, cells, -1), amounts, height * width).reshape(height, width)
+        self.count = np.bincount(cells, minlength=height * width).reshape(height, width)
+
+    def to_frame(self, values: str = 'amount') -> pd.DataFrame:
+        """교차표 DataFrame (values: amount, settled, count)"""
+        return pd.DataFrame(getattr(self, values), index=pd.Index(self.stats, name='통계목명'),
+                            columns=pd.Index(self.codes, name='rcms_code'))
+
+
+def _with_labels(crosstab: ExpenseCrosstab, stats: List[str], codes: List[str]):
+    """매핑에만 있는 통계목명/rcms_code를 0 행/열로 추가한 (행 라벨, 열 라벨, 금액, 정산 금액, 건수)"""
+    extra_stats = [s for s in dict.fromkeys(stats) if s not in crosstab.stats]
+    extra_codes = [c for c in dict.fromkeys(codes) if c not in crosstab.codes]
+    # 결측 행/열은 마지막에 두도록 그 앞에 끼워 넣음
+    row_labels = crosstab.stats[:-1] + extra_stats + [None]
+    col_labels = crosstab.codes[:-1] + extra_codes + [None]
+    row_pos = np.r_[np.arange(len(crosstab.stats) - 1), len(row_labels) - 1]
+    col_pos = np.r_[np.arange(len(crosstab.codes) - 1), len(col_labels) - 1]
+
+    def expand(matrix: np.ndarray) -> np.ndarray:
+        result = np.zeros((len(row_labels), len(col_labels)), dtype=matrix.dtype)
+        result[np.ix_(row_pos, col_pos)] = matrix
+        return result
+
+    return row_labels, col_labels, expand(crosstab.amount), expand(crosstab.settled), expand(crosstab.count)
+
+
+def reconcile(crosstab: ExpenseCrosstab, mapping_df: Optional[pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """매핑 기준 ERP-RCMS 대사
+
+    Returns:
+        (통계목명별 대사표, 규칙을 어긴 쌍 목록)
+        대사표의 차이 = ERP 집행액 - RCMS 정산액 = 미정산액 + 매핑 외 정산액
+    """
+    mapping = normalize_mapping(mapping_df)
+    stats, codes, amount, settled, count = _with_labels(
+        crosstab, mapping["ERP_통계목명"].tolist(), mapping["rcms_code"].tolist())
+    row_of = {label: i for i, label in enumerate(stats)}
+    col_of = {label: j for j, label in enumerate(codes)}
+
+    # 매핑된 쌍의 priority (매핑 없는 쌍은 NaN)
+    priority = np.full(amount.shape, np.nan)
+    priority[[row_of[s] for s in mapping["ERP_통계목명"]],
+             [col_of[c] for c in mapping["rcms_code"]]] = mapping["priority"].to_numpy(dtype=float)
+    allowed = ~np.isnan(priority)
+    stat_mapped = allowed.any(axis=1)
+    with np.errstate(invalid="ignore"):
+        best = np.where(stat_mapped, np.nanmin(np.where(allowed, priority, np.inf), axis=1), np.nan)
+        primary = allowed & (priority == best[:, None])
+
+    # 셀별 사유 (앞 조건이 우선)
+    stat_missing = np.zeros(amount.shape, dtype=bool)
+    stat_missing[-1, :] = True
+    code_missing = np.zeros(amount.shape, dtype=bool)
+    code_missing[:, -1] = True
+    reasons = np.select(
+        [stat_missing, np.broadcast_to(~stat_mapped[:, None], amount.shape), code_missing, ~allowed, ~primary],
+        [REASON_MISSING_ERP, REASON_UNMAPPED_ERP, REASON_MISSING_CODE, REASON_UNMAPPED_CODE, REASON_PRIORITY],
+        default="")
+    flagged_rows, flagged_cols = np.nonzero((count > 0) & (reasons != ""))
+    pairs = pd.DataFrame({
+        "통계목명": [stats[i] for i in flagged_rows],
+        "rcms_code": [codes[j] for j in flagged_cols],
+        "사유": reasons[flagged_rows, flagged_cols],
+        "건수": count[flagged_rows, flagged_cols],
+        "금액": amount[flagged_rows, flagged_cols],
+        "정산액": settled[flagged_rows, flagged_cols],
+    })
+    pairs.insert(2, "rcms_name", get_rcms_names(pairs["rcms_code"].astype(object)).astype(object))
+    pairs = pairs.sort_values("금액", ascending=False, kind="stable").reset_index(drop=True)
+
+    # 통계목명별 대사표 (지출이 있거나 매핑에 있는 통계목명, 통계목명 없는 행은 제외)
+    erp_amount = amount.sum(axis=1)
+    rcms_amount = np.where(allowed, settled, 0).sum(axis=1)
+    unsettled = erp_amount - settled.sum(axis=1)
+    shown = np.flatnonzero((count[:-1].sum(axis=1) > 0) | stat_mapped[:-1])
+    mapped_codes = mapping.sort_values("priority", kind="stable").groupby("ERP_통계목명", sort=False)["rcms_code"] \
+        .agg(", ".join).to_dict()
+    summary = pd.DataFrame({
+        "통계목명": [stats[i] for i in shown],
+        "매핑 rcms_code": [mapped_codes.get(stats[i], "") for i in shown],
+        "ERP 집행액": erp_amount[shown],
+        "RCMS 정산액": rcms_amount[shown],
+        "차이": erp_amount[shown] - rcms_amount[shown],
+        "미정산액": unsettled[shown],
+        "매핑 외 정산액": erp_amount[shown] - rcms_amount[shown] - unsettled[shown],
+    }, columns=SUMMARY_COLUMNS)
+    return summary, pairs[PAIR_COLUMNS]
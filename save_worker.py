@@ -0,0 +1,149 @@
+"""
+백그라운드 저장 모듈
+과제 파일마다 하나의 저장 스레드를 두고, 연속된 저장 요청은 마지막 스냅샷 하나로 합쳐 저장
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Iterable
+import atexit
+import threading
+
+import pandas as pd
+
+
+class SaveWorker:
+    """과제 파일별 백그라운드 저장 작업자 클래스"""
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self._cond = threading.Condition()
+        self._pending: Optional[Dict[str, pd.DataFrame]] = None
+        self._pending_dirty: Optional[set] = None
+        self._pending_offset: Optional[int] = None
+        self._submitted_seq = 0
+        self._saved_seq = 0
+        self._saving = False
+        self._stopped = False
+        self._status = {"state": "idle", "saved_at": None, "error": None}
+        self._thread = threading.Thread(
+            target=self._run, name=f"save-worker:{data_manager.file_path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, data: Dict[str, pd.DataFrame], dirty_sheets: Optional[Iterable[str]] = None) -> int:
+        """저장 요청 (즉시 반환, 요청 번호 반환)
+
+        data의 DataFrame은 복사하지 않고 그대로 보관하므로 읽기 전용 스냅샷
+        (ExpenseManager.snapshot 등)을 넘기고, 저장이 끝날 때까지 제자리 수정하지 않아야 한다.
+        아직 시작되지 않은 이전 요청이 있으면 이번 스냅샷으로 대체하고
+        변경 시트 목록은 합친다 (None은 자동 판단).
+        """
+        snapshot = dict(data)
+        # 스냅샷 이후에 기록된 저널은 저장 후에도 남겨야 함
+        journal = getattr(self.data_manager, "journal", None)
+        journal_offset = journal.size_bytes() if journal else None
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("저장 작업자가 이미 종료되었습니다.")
+            if self._pending is not None:
+                if self._pending_dirty is None or dirty_sheets is None:
+                    self._pending_dirty = None
+                else:
+                    self._pending_dirty |= set(dirty_sheets)
+            else:
+                self._pending_dirty = set(dirty_sheets) if dirty_sheets is not None else None
+            self._pending = snapshot
+            self._pending_offset = journal_offset
+            self._submitted_seq += 1
+            self._status["state"] = "pending"
+            self._cond.notify_all()
+            return self._submitted_seq
+
+    def _run(self) -> None:
+        """저장 루프 (요청 순서대로 하나씩 처리)"""
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._pending is None and self._stopped:
+                    return
+                data, dirty, offset = self._pending, self._pending_dirty, self._pending_offset
+                seq = self._submitted_seq
+                self._pending, self._pending_dirty = None, None
+                self._saving = True
+                self._status["state"] = "saving"
+
+            try:
+                success, error_msg = self.data_manager.save_all(
+                    data, dirty_sheets=dirty, journal_offset=offset
+                )
+            except Exception as e:
+                success, error_msg = False, f"파일 저장 오류: {e}"
+
+            with self._cond:
+                self._saving = False
+                self._saved_seq = seq
+                if success:
+                    self._status.update(saved_at=datetime.now(), error=None)
+                else:
+                    self._status["error"] = error_msg
+                if self._pending is None:
+                    self._status["state"] = "saved" if success else "failed"
+                self._cond.notify_all()
+
+    def get_status(self) -> Dict:
+        """저장 상태 (state: idle/pending/saving/saved/failed, saved_at, error)"""
+        with self._cond:
+            return {**self._status, "pending_jobs": int(self._pending is not None) + int(self._saving)}
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """지금까지 요청된 저장이 모두 끝날 때까지 대기 (시간 초과 시 False)"""
+        with self._cond:
+            target = self._submitted_seq
+            return self._cond.wait_for(
+                lambda: self._saved_seq >= target and not self._saving, timeout=timeout
+            )
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """남은 저장을 마치고 작업자 종료"""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return flushed
+
+
+# 과제 파일 경로별 저장 작업자
+_workers: Dict[str, SaveWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def get_save_worker(data_manager) -> SaveWorker:
+    """과제 파일의 저장 작업자 반환 (없으면 생성)"""
+    key = str(Path(data_manager.file_path).resolve())
+    with _workers_lock:
+        worker = _workers.get(key)
+        if worker is None or worker.data_manager is not data_manager:
+            if worker is not None:
+                worker.stop()
+            worker = SaveWorker(data_manager)
+            _workers[key] = worker
+        return worker
+
+
+def flush_save_worker(file_path, timeout: Optional[float] = None) -> bool:
+    """특정 과제 파일의 남은 저장 완료 대기"""
+    with _workers_lock:
+        worker = _workers.get(str(Path(file_path).resolve()))
+    return worker.flush(timeout) if worker else True
+
+
+@atexit.register
+def _stop_all_workers() -> None:
+    """프로그램 종료 시 모든 저장 작업자의 남은 저장 처리"""
+    with _workers_lock:
+        workers = list(_workers.values())
+        _workers.clear()
+    for worker in workers:
+        worker.stop()
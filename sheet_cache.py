@@ -0,0 +1,124 @@
+"""
+시트 캐시 모듈
+master.xlsx 옆 .cache 폴더에 로드된 DataFrame을 pickle로 보관하여
+엑셀 파싱 없이 빠르게 다시 읽어올 수 있도록 함
+- 파일 구성: 형식 표식 + 헤더 길이(4바이트) + 헤더(캐시 키) pickle + 시트 데이터 pickle
+- 헤더를 먼저 읽어 원본과 맞을 때만 시트 데이터를 unpickle
+"""
+from pathlib import Path
+from typing import Optional, Dict, Any
+import hashlib
+import os
+import pickle
+import struct
+
+import pandas as pd
+
+
+CACHE_FOLDER_NAME = ".cache"
+# 캐시 파일 형식이 바뀌면 올려서 기존 캐시를 무효화
+CACHE_VERSION = 3
+# 캐시 파일 맨 앞 표식 (형식이 다른 파일은 unpickle 없이 무시)
+CACHE_MAGIC = b"SHEETCACHE" + struct.pack("<H", CACHE_VERSION)
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def compute_file_hash(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용 해시 (blake2b)"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SheetCache:
+    """엑셀 파일별 시트 캐시 관리 클래스"""
+
+    def __init__(self, file_path: Path):
+        self.file_path = Path(file_path)
+        self.cache_dir = self.file_path.parent / CACHE_FOLDER_NAME
+        # 같은 폴더의 다른 파일과 겹치지 않도록 절대 경로 해시를 파일명에 포함
+        path_hash = hashlib.sha1(str(self.file_path.resolve()).encode("utf-8")).hexdigest()[:12]
+        self.cache_path = self.cache_dir / f"{self.file_path.stem}_{path_hash}.pkl"
+
+    def get_file_key(self) -> Optional[Dict[str, Any]]:
+        """캐시 키 (경로, 크기, 수정시각, 내용 해시)"""
+        if not self.file_path.exists():
+            return None
+        stat = self.file_path.stat()
+        return {
+            "path": str(self.file_path.resolve()),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": compute_file_hash(self.file_path),
+        }
+
+    def load(self) -> Optional[Dict[str, pd.DataFrame]]:
+        """캐시 적중 시 시트 데이터 반환 (없거나 원본이 바뀌었으면 None)"""
+        if not self.cache_path.exists() or not self.file_path.exists():
+            return None
+
+        try:
+            with open(self.cache_path, "rb") as f:
+                key = self._read_header(f)
+                if key is None or not self._key_matches(key):
+                    return None
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"캐시 읽기 오류: {e}")
+            self.invalidate()
+            return None
+
+        return data if isinstance(data, dict) else None
+
+    @staticmethod
+    def _read_header(f) -> Optional[Dict[str, Any]]:
+        """캐시 키 헤더 (표식이 다르면 None, 시트 데이터는 읽지 않음)"""
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            return None
+        length_bytes = f.read(_HEADER_LENGTH.size)
+        if len(length_bytes) != _HEADER_LENGTH.size:
+            return None
+        header = f.read(_HEADER_LENGTH.unpack(length_bytes)[0])
+        key = pickle.loads(header)
+        return key if isinstance(key, dict) else None
+
+    def _key_matches(self, key: Dict[str, Any]) -> bool:
+        """헤더 키가 현재 엑셀 파일과 같은지 확인"""
+        # 크기/수정시각이 먼저 다르면 해시 계산 없이 무효 처리
+        stat = self.file_path.stat()
+        if key.get("size") != stat.st_size or key.get("mtime_ns") != stat.st_mtime_ns:
+            return False
+        return key == self.get_file_key()
+
+    def store(self, data: Dict[str, pd.DataFrame]) -> bool:
+        """현재 엑셀 파일 상태를 키로 하여 시트 데이터 저장"""
+        key = self.get_file_key()
+        if key is None:
+            return False
+
+        temp_path = self.cache_path.with_suffix(".tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            header = pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(temp_path, "wb") as f:
+                f.write(CACHE_MAGIC)
+                f.write(_HEADER_LENGTH.pack(len(header)))
+                f.write(header)
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+            return True
+        except Exception as e:
+            print(f"캐시 저장 오류: {e}")
+            if temp_path.exists():
+                temp_path.unlink()
+            return False
+
+    def invalidate(self) -> None:
+        """캐시 파일 삭제"""
+        try:
+            if self.cache_path.exists():
+                self.cache_path.unlink()
+        except OSError as e:
+            print(f"캐시 삭제 오류: {e}")
@@ -0,0 +1,354 @@
+"""
+SQLite 저장소 관리 모듈
+master.xlsx 대신 로컬 SQLite 파일에 시트를 테이블로 저장
+지출내역은 행 단위 SQL로 반영하고, 엑셀 파일은 필요할 때만 내보냄
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Optional, Dict, Tuple, Iterable, List, Any, Iterator
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from initial_data import (
+    create_expense_df, create_erp_budget_df,
+    create_rcms_budget_df, create_mapping_df
+)
+from utils import ensure_folder_exists, atomic_write
+from data_manager import SHEET_NAMES, normalize_sheet, to_storage_sheet, write_workbook
+from expense_schema import DATE_FORMAT, DERIVED_COLUMN, get_rcms_name
+
+
+# EXPENSE 테이블 스키마 (컬럼명, SQLite 타입)
+EXPENSE_SCHEMA = [
+    ("id", "INTEGER PRIMARY KEY"),
+    ("통계목명", "TEXT"),
+    ("사용일자", "TEXT"),
+    ("지출결의명", "TEXT"),
+    ("상세내역", "TEXT"),
+    ("지출결의액", "INTEGER"),
+    ("rcms_code", "TEXT"),
+    ("rcms_name", "TEXT"),
+    ("rcms_settled", "INTEGER"),
+    ("created_at", "TEXT"),
+    ("updated_at", "TEXT"),
+]
+
+EXPENSE_INDEXES = {
+    "idx_expense_stat": "통계목명",
+    "idx_expense_rcms_code": "rcms_code",
+    "idx_expense_date": "사용일자",
+}
+
+DATETIME_COLUMNS = ["created_at", "updated_at"]
+
+# 날짜만 저장하는 컬럼 (엑셀 파일과 같은 YYYY-MM-DD 문자열, 문자열 비교로 정렬/범위 조회)
+DATE_COLUMN = "사용일자"
+
+
+def get_db_path(xlsx_path: Path) -> Path:
+    """master.xlsx 경로에 대응하는 SQLite 파일 경로"""
+    return xlsx_path.with_suffix(".db")
+
+
+def _quote(name: str) -> str:
+    """SQL 식별자 따옴표 처리"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_sql_value(value: Any) -> Any:
+    """파이썬/NumPy 값을 SQLite 저장용 값으로 변환"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return int(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat(sep=" ")
+    if value is pd.NA:
+        return None
+    return value
+
+
+def _to_sql_date(value: Any) -> Optional[str]:
+    """사용일자 저장 값 (YYYY-MM-DD, 날짜로 읽을 수 없는 문자열은 그대로)"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return None if pd.isna(timestamp) else timestamp.strftime(DATE_FORMAT)
+
+
+def _to_storage_row(row: Dict) -> Dict:
+    """리스너로 받은 행/변경값을 저장 형식으로 (사용일자 형식 통일, rcms_code가 있으면 rcms_name 다시 계산)"""
+    row = dict(row)
+    if DATE_COLUMN in row:
+        row[DATE_COLUMN] = _to_sql_date(row[DATE_COLUMN])
+    if "rcms_code" in row:
+        code = _to_sql_value(row["rcms_code"])
+        row[DERIVED_COLUMN] = get_rcms_name(code)
+    return row
+
+
+class SQLiteDataManager:
+    """SQLite 파일 기반 데이터 관리 클래스 (DataManager와 같은 인터페이스)"""
+
+    backend = "sqlite"
+
+    def __init__(self, file_path: str):
+        # file_path는 엑셀 내보내기 경로, 실제 저장소는 같은 이름의 .db 파일
+        self.file_path = Path(file_path)
+        self.folder_path = self.file_path.parent
+        self.db_path = get_db_path(self.file_path)
+        # ExpenseManager와 연결되면 지출내역은 행 단위로 이미 반영됨
+        self._expense_bound = False
+        # load_expense_first에서 함께 읽은 EXPENSE 외 테이블
+        self._remaining: Dict[str, pd.DataFrame] = {}
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """DB 연결 후 하나의 트랜잭션으로 실행 (예외 시 롤백, 항상 연결 종료)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def file_exists(self) -> bool:
+        """DB 파일 존재 여부 확인"""
+        return self.db_path.exists()
+
+    def create_initial_file(self) -> bool:
+        """초기 DB 생성 (같은 이름의 엑셀 파일이 있으면 그 내용을 가져옴)"""
+        try:
+            ensure_folder_exists(str(self.folder_path))
+
+            if self.file_path.exists():
+                from data_manager import DataManager
+                data = DataManager(str(self.file_path)).load_all()
+            else:
+                data = {}
+            if not data:
+                data = {
+                    'EXPENSE': create_expense_df(),
+                    'ERP_BUDGET': create_erp_budget_df(),
+                    'RCMS_BUDGET': create_rcms_budget_df(),
+                    'MAPPING_ERP_RCMS': create_mapping_df(),
+                }
+
+            with self._transaction() as conn:
+                self._create_expense_table(conn)
+                self._write_expense(conn, data['EXPENSE'])
+                for sheet_name in SHEET_NAMES[1:]:
+                    self._write_table(conn, sheet_name, data[sheet_name])
+            return True
+        except Exception as e:
+            print(f"초기 DB 생성 오류: {e}")
+            return False
+
+    def _create_expense_table(self, conn: sqlite3.Connection) -> None:
+        """EXPENSE 테이블 및 인덱스 생성"""
+        columns = ", ".join(f"{_quote(name)} {col_type}" for name, col_type in EXPENSE_SCHEMA)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS EXPENSE ({columns})")
+        for index_name, column in EXPENSE_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON EXPENSE ({_quote(column)})")
+
+    def _ensure_expense_columns(self, conn: sqlite3.Connection, columns: Iterable[str]) -> None:
+        """스키마에 없는 EXPENSE 컬럼 추가"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(EXPENSE)")}
+        for column in columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE EXPENSE ADD COLUMN {_quote(column)}")
+
+    def _write_expense(self, conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+        """EXPENSE 테이블 전체 교체"""
+        df = to_storage_sheet('EXPENSE', df)
+        self._ensure_expense_columns(conn, df.columns)
+        conn.execute("DELETE FROM EXPENSE")
+        if df.empty:
+            return
+        columns = list(df.columns)
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT INTO EXPENSE ({', '.join(map(_quote, columns))}) VALUES ({placeholders})"
+        records = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        conn.executemany(sql, ([_to_sql_value(v) for v in record] for record in records))
+
+    def _write_table(self, conn: sqlite3.Connection, sheet_name: str, df: pd.DataFrame) -> None:
+        """예산/매핑 테이블 전체 교체 (행 수가 적음)"""
+        df = df.copy()
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = df[column].map(_to_sql_value)
+        df.to_sql(sheet_name, conn, if_exists='replace', index=False)
+
+    def _normalize_dates(self, conn: sqlite3.Connection) -> None:
+        """시각이 붙은 사용일자(이전 버전에서 행 단위로 기록된 값)를 YYYY-MM-DD로 정리"""
+        column = _quote(DATE_COLUMN)
+        conn.execute(f"UPDATE EXPENSE SET {column} = substr({column}, 1, 10) "
+                     f"WHERE {column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]?*'")
+
+    def load_all(self) -> Dict[str, pd.DataFrame]:
+        """모든 테이블 로드"""
+        if not self.file_exists():
+            return {}
+
+        try:
+            data = {}
+            with self._transaction() as conn:
+                tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+                if 'EXPENSE' in tables:
+                    self._normalize_dates(conn)
+                for sheet_name in SHEET_NAMES:
+                    if sheet_name not in tables:
+                        continue
+                    order = " ORDER BY id" if sheet_name == 'EXPENSE' else ""
+                    df = pd.read_sql_query(f"SELECT * FROM {_quote(sheet_name)}{order}", conn)
+                    for column in DATETIME_COLUMNS:
+                        if column in df.columns:
+                            df[column] = pd.to_datetime(df[column], errors='coerce')
+                    data[sheet_name] = normalize_sheet(sheet_name, df)
+
+            defaults = {
+                'EXPENSE': create_expense_df,
+                'ERP_BUDGET': create_erp_budget_df,
+                'RCMS_BUDGET': create_rcms_budget_df,
+                'MAPPING_ERP_RCMS': create_mapping_df,
+            }
+            for sheet_name, factory in defaults.items():
+                if sheet_name not in data:
+                    data[sheet_name] = normalize_sheet(sheet_name, factory())
+            return data
+        except Exception as e:
+            print(f"DB 로드 오류: {e}")
+            return {}
+
+    def load_expense_first(self) -> Dict[str, pd.DataFrame]:
+        """DataManager 호환용 (DB는 한 번에 읽는 비용이 작아 모든 테이블을 읽고 EXPENSE만 반환)"""
+        data = self.load_all()
+        self._remaining = {name: df for name, df in data.items() if name != 'EXPENSE'}
+        return {'EXPENSE': data['EXPENSE']} if data else {}
+
+    def start_loading_remaining(self) -> None:
+        """DataManager 호환용 (미룬 로드 없음)"""
+
+    def load_remaining(self) -> Dict[str, pd.DataFrame]:
+        """load_expense_first에서 함께 읽은 EXPENSE 외 테이블"""
+        return self._remaining
+
+    def mark_dirty(self, *sheet_names: str) -> None:
+        """DataManager 호환용 (SQLite는 항상 지정된 테이블만 다시 씀)"""
+
+    def save_all(self, data: Dict[str, pd.DataFrame],
+                 dirty_sheets: Optional[Iterable[str]] = None,
+                 journal_offset: Optional[int] = None) -> Tuple[bool, Optional[str]]:
+        """테이블 저장 (EXPENSE는 ExpenseManager와 연결된 경우 행 단위로 이미 반영됨)"""
+        try:
+            targets = set(data.keys()) if dirty_sheets is None else set(dirty_sheets) & set(data.keys())
+            with self._transaction() as conn:
+                self._create_expense_table(conn)
+                for sheet_name in targets:
+                    if sheet_name == 'EXPENSE':
+                        if not self._expense_bound:
+                            self._write_expense(conn, data[sheet_name])
+                    else:
+                        self._write_table(conn, sheet_name, data[sheet_name])
+            return True, None
+        except Exception as e:
+            error_msg = f"DB 저장 오류: {e}"
+            print(error_msg)
+            return False, error_msg
+
+    def bind_expense_manager(self, expense_manager) -> None:
+        """ExpenseManager의 추가/수정/삭제를 행 단위 SQL로 반영하도록 연결"""
+        expense_manager.add_listener(self)
+        self._expense_bound = True
+
+    def record_budget_change(self, sheet_name: str, key_column: str, key: Any,
+                             column: str, value: Any) -> None:
+        """DataManager 호환용 (예산은 save_all에서 바로 DB에 반영됨)"""
+
+    def compact(self) -> bool:
+        """DataManager 호환용 (저널 없음)"""
+        return False
+
+    # ExpenseManager 변경 리스너
+    def on_add(self, row: Dict) -> None:
+        """행 추가 → INSERT 1건"""
+        row = _to_storage_row(row)
+        with self._transaction() as conn:
+            self._ensure_expense_columns(conn, row.keys())
+            columns = list(row.keys())
+            sql = (f"INSERT OR REPLACE INTO EXPENSE ({', '.join(map(_quote, columns))}) "
+                   f"VALUES ({', '.join('?' for _ in columns)})")
+            conn.execute(sql, [_to_sql_value(row[c]) for c in columns])
+
+    def on_update(self, row_id: int, changes: Dict) -> None:
+        """행 수정 → UPDATE 1건"""
+        if not changes:
+            return
+        changes = _to_storage_row(changes)
+        with self._transaction() as conn:
+            self._ensure_expense_columns(conn, changes.keys())
+            assignments = ", ".join(f"{_quote(c)} = ?" for c in changes)
+            conn.execute(f"UPDATE EXPENSE SET {assignments} WHERE id = ?",
+                         [_to_sql_value(v) for v in changes.values()] + [int(row_id)])
+
+    def on_delete(self, row_ids: List[int]) -> None:
+        """행 삭제 → DELETE (id 목록)"""
+        if not row_ids:
+            return
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM EXPENSE WHERE id = ?", [(int(i),) for i in row_ids])
+
+    def on_changes(self, added: List[Dict], updated: List[Tuple[int, Dict]], deleted_ids: List[int]) -> None:
+        """여러 변경 → 하나의 트랜잭션 (ExpenseManager.apply_changes)"""
+        added = [_to_storage_row(row) for row in added]
+        updated = [(row_id, _to_storage_row(changes)) for row_id, changes in updated]
+        with self._transaction() as conn:
+            columns = {c for _, changes in updated for c in changes} | {c for row in added for c in row}
+            self._ensure_expense_columns(conn, columns)
+            for row_id, changes in updated:
+                if changes:
+                    assignments = ", ".join(f"{_quote(c)} = ?" for c in changes)
+                    conn.execute(f"UPDATE EXPENSE SET {assignments} WHERE id = ?",
+                                 [_to_sql_value(v) for v in changes.values()] + [int(row_id)])
+            if deleted_ids:
+                conn.executemany("DELETE FROM EXPENSE WHERE id = ?", [(int(i),) for i in deleted_ids])
+            for row in added:
+                row_columns = list(row.keys())
+                conn.execute(f"INSERT OR REPLACE INTO EXPENSE ({', '.join(map(_quote, row_columns))}) "
+                             f"VALUES ({', '.join('?' for _ in row_columns)})",
+                             [_to_sql_value(row[c]) for c in row_columns])
+    
+    def export_xlsx(self) -> Path:
+        """현재 DB 내용을 엑셀 파일로 내보내고 경로 반환"""
+        data = self.load_all()
+        sheets = {sheet_name: data[sheet_name] for sheet_name in SHEET_NAMES}
+        atomic_write(self.file_path, lambda path: write_workbook(path, sheets), keep_previous=False)
+        return self.file_path
+
+    def get_file_info(self) -> Dict[str, str]:
+        """파일 정보 반환"""
+        if not self.file_exists():
+            return {
+                "exists": False,
+                "path": str(self.db_path),
+                "folder": str(self.folder_path)
+            }
+
+        stat = self.db_path.stat()
+        return {
+            "exists": True,
+            "path": str(self.db_path),
+            "folder": str(self.folder_path),
+            "size": stat.st_size,
+            "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+        }
@@ -0,0 +1,92 @@
+"""
+테스트 공통 설정
+- 저장소 루트 모듈을 import할 수 있도록 sys.path에 추가
+- 지출내역/통합문서 생성 fixture
+- 벤치마크(@pytest.mark.benchmark)는 --run-benchmarks 옵션을 줄 때만 실행
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from initial_data import (  # noqa: E402
+    get_erp_statistics_list, get_rcms_items_list,
+    create_erp_budget_df, create_rcms_budget_df, create_mapping_df
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-benchmarks", action="store_true", default=False,
+                     help="벤치마크 테스트 실행 (결과 시간 출력)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: 시간 측정 테스트 (--run-benchmarks로 실행)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="--run-benchmarks 옵션을 주면 실행")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def build_expense_df(n: int, seed: int = 0) -> pd.DataFrame:
+    """파일에 저장되는 형태의 EXPENSE DataFrame (rcms_name 포함, 사용일자는 문자열)"""
+    rng = np.random.default_rng(seed)
+    stats = get_erp_statistics_list()[1:]
+    items = get_rcms_items_list()
+    picked = rng.integers(0, len(items), n)
+    base = datetime(2024, 1, 1)
+    now = datetime(2024, 6, 30, 12, 0, 0)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "통계목명": rng.choice(stats, n),
+        "사용일자": [(base + timedelta(days=int(d))).strftime("%Y-%m-%d") for d in rng.integers(0, 365, n)],
+        "지출결의명": [f"지출 {i % 97}" for i in range(n)],
+        "상세내역": [f"상세 {i % 13}" for i in range(n)],
+        "지출결의액": rng.integers(1000, 5_000_000, n),
+        "rcms_code": [items[i]["rcms_code"] for i in picked],
+        "rcms_name": [items[i]["rcms_name"] for i in picked],
+        "rcms_settled": rng.random(n) < 0.8,
+        "created_at": [now] * n,
+        "updated_at": [now] * n,
+    })
+
+
+def build_workbook_data(n: int, seed: int = 0) -> dict:
+    """4개 시트 데이터 (EXPENSE n행)"""
+    return {
+        "EXPENSE": build_expense_df(n, seed),
+        "ERP_BUDGET": create_erp_budget_df(),
+        "RCMS_BUDGET": create_rcms_budget_df(),
+        "MAPPING_ERP_RCMS": create_mapping_df(),
+    }
+
+
+@pytest.fixture
+def make_expense():
+    """EXPENSE DataFrame 생성 함수"""
+    return build_expense_df
+
+
+@pytest.fixture
+def make_workbook(tmp_path):
+    """EXPENSE n행짜리 master.xlsx를 tmp_path에 만들고 (경로, 시트 데이터) 반환"""
+    from data_manager import write_workbook
+
+    def _make(n: int = 20, seed: int = 0, name: str = "test_master.xlsx"):
+        data = build_workbook_data(n, seed)
+        path = tmp_path / name
+        write_workbook(path, data)
+        return path, data
+    return _make
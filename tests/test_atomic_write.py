@@ -0,0 +1,119 @@
+"""utils.atomic_write: 쓰는 도중 실패/비정상 종료해도 기존 파일과 롤백 파일 보존"""
+from pathlib import Path
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+import utils
+from data_manager import DataManager
+from utils import atomic_write, get_rollback_path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _saved_twice(make_workbook):
+    """저장을 한 번 거쳐 master 파일과 롤백 파일(.prev)이 모두 있는 상태"""
+    path, data = make_workbook(30)
+    manager = DataManager(str(path))
+    loaded = manager.load_all()
+    expense = loaded["EXPENSE"].copy()
+    expense.loc[0, "지출결의액"] = 123
+    assert manager.save_all({**loaded, "EXPENSE": expense})[0]
+    rollback_path = get_rollback_path(path)
+    assert rollback_path.exists()
+    return path, rollback_path, path.read_bytes(), rollback_path.read_bytes()
+
+
+def _write_half_then(path_bytes, fail):
+    """기존 파일 앞부분 절반을 임시 파일에 쓴 뒤 fail() 호출하는 writer"""
+    def write(temp_path):
+        with open(temp_path, "wb") as f:
+            f.write(path_bytes[:len(path_bytes) // 2])
+            f.flush()
+            fail()
+    return write
+
+
+def _assert_intact(path, rollback_path, original, previous):
+    assert path.read_bytes() == original
+    assert rollback_path.read_bytes() == previous
+    # 두 파일 모두 엑셀로 읽을 수 있어야 함
+    assert len(pd.read_excel(path, sheet_name="EXPENSE")) == 30
+    assert len(pd.read_excel(rollback_path, sheet_name="EXPENSE")) == 30
+
+
+def test_writer_error_leaves_files_intact(make_workbook):
+    path, rollback_path, original, previous = _saved_twice(make_workbook)
+
+    def fail():
+        raise OSError("디스크 오류")
+
+    with pytest.raises(OSError):
+        atomic_write(path, _write_half_then(original, fail))
+
+    _assert_intact(path, rollback_path, original, previous)
+    assert not (path.parent / f".{path.name}.tmp").exists()
+
+
+def test_replace_error_leaves_files_intact(make_workbook, monkeypatch):
+    path, rollback_path, original, _ = _saved_twice(make_workbook)
+
+    def fail_replace(src, dst):
+        raise OSError("교체 실패")
+
+    monkeypatch.setattr(utils.os, "replace", fail_replace)
+    with pytest.raises(OSError):
+        atomic_write(path, lambda temp_path: temp_path.write_bytes(b"new"))
+
+    # 교체 직전에 롤백 파일은 현재 파일로 갱신됨
+    _assert_intact(path, rollback_path, original, original)
+
+
+def test_process_killed_while_writing_leaves_files_intact(make_workbook):
+    path, rollback_path, original, previous = _saved_twice(make_workbook)
+    script = (
+        "import os, sys\n"
+        f"sys.path.insert(0, {str(ROOT)!r})\n"
+        "from pathlib import Path\n"
+        "from utils import atomic_write\n"
+        f"path = Path({str(path)!r})\n"
+        "data = path.read_bytes()\n"
+        "def write(temp_path):\n"
+        "    with open(temp_path, 'wb') as f:\n"
+        "        f.write(data[:len(data) // 2])\n"
+        "        f.flush()\n"
+        "        os._exit(9)\n"
+        "atomic_write(path, write)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], timeout=60)
+
+    assert result.returncode == 9
+    _assert_intact(path, rollback_path, original, previous)
+    # 남은 임시 파일이 있어도 다음 저장과 로드는 정상 동작
+    manager = DataManager(str(path), use_cache=False)
+    data = manager.load_all()
+    assert manager.save_all(data, dirty_sheets=["EXPENSE"])[0]
+    assert len(DataManager(str(path), use_cache=False).load_all()["EXPENSE"]) == 30
+
+
+def test_failed_save_keeps_workbook(make_workbook, monkeypatch):
+    path, rollback_path, original, previous = _saved_twice(make_workbook)
+    manager = DataManager(str(path))
+    data = manager.load_all()
+
+    def broken_patch(src_path, dst_path, sheets):
+        dst_path.write_bytes(original[:100])
+        raise OSError("쓰기 중단")
+
+    def broken_write(file_path, data):
+        file_path.write_bytes(original[:100])
+        raise OSError("쓰기 중단")
+
+    monkeypatch.setattr("data_manager.patch_workbook", broken_patch)
+    monkeypatch.setattr("data_manager.write_workbook", broken_write)
+    success, error_msg = manager.save_all(data, dirty_sheets=["EXPENSE"])
+
+    assert not success and error_msg
+    _assert_intact(path, rollback_path, original, previous)
@@ -0,0 +1,171 @@
+"""budget_calculator: 한 번 읽기(bincount) 집계와 기존 groupby 집계 비교"""
+from datetime import datetime
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from budget_calculator import BudgetCache, BudgetCalculator
+from expense_schema import apply_expense_schema
+from expense_totals import ExpenseTotals
+from initial_data import create_erp_budget_df, create_rcms_budget_df
+
+
+def _groupby_erp_budget(expense_df, erp_budget_df):
+    """통계목명 groupby + merge로 계산하던 ERP 집계 (비교 기준)"""
+    result_df = erp_budget_df.copy()
+    result_df['집행률'] = result_df['집행률'].astype(float)
+    summary = expense_df.groupby('통계목명', observed=False)['지출결의액'].sum().reset_index()
+    summary.columns = ['통계목명', '집행액_new']
+    summary['통계목명'] = summary['통계목명'].astype(result_df['통계목명'].dtype)
+    result_df = result_df.merge(summary, on='통계목명', how='left')
+    result_df['집행액'] = result_df.pop('집행액_new').fillna(0).astype(int)
+    total = result_df['통계목명'] == '총액'
+    others = result_df[~total]
+    total_executed = int(others['집행액'].sum())
+    total_budget = int(others['실행예산'].sum())
+    result_df.loc[total, '집행액'] = total_executed
+    result_df.loc[total, '실행예산'] = total_budget
+    result_df.loc[total, '잔액'] = total_budget - total_executed
+    result_df.loc[total, '집행률'] = (total_executed / total_budget * 100) if total_budget > 0 else 0.0
+    result_df.loc[~total, '잔액'] = result_df.loc[~total, '실행예산'] - result_df.loc[~total, '집행액']
+    mask = (result_df['실행예산'] > 0) & ~total
+    result_df.loc[mask, '집행률'] = (result_df.loc[mask, '집행액'] / result_df.loc[mask, '실행예산']) * 100
+    result_df.loc[~mask & ~total, '집행률'] = 0.0
+    return result_df
+
+
+def _groupby_rcms_budget(expense_df, rcms_budget_df):
+    """정산 행 rcms_code groupby + merge로 계산하던 RCMS 집계 (비교 기준)"""
+    result_df = rcms_budget_df.copy()
+    result_df['rate'] = result_df['rate'].astype(float)
+    settled = expense_df[expense_df['rcms_settled']]
+    summary = settled.groupby('rcms_code', observed=False)['지출결의액'].sum().reset_index()
+    summary.columns = ['rcms_code', 'used_amount_new']
+    summary['rcms_code'] = summary['rcms_code'].astype(result_df['rcms_code'].dtype)
+    result_df = result_df.merge(summary, on='rcms_code', how='left')
+    result_df['used_amount'] = result_df.pop('used_amount_new').fillna(0).astype(int)
+    result_df['balance'] = result_df['budget_amount'] - result_df['used_amount']
+    mask = result_df['budget_amount'] > 0
+    result_df.loc[mask, 'rate'] = (result_df.loc[mask, 'used_amount'] / result_df.loc[mask, 'budget_amount']) * 100
+    result_df.loc[~mask, 'rate'] = 0.0
+    unsettled = expense_df[~expense_df['rcms_settled']]
+    return result_df, {"미정산_금액": int(unsettled['지출결의액'].sum()), "미정산_건수": len(unsettled),
+                       "미정산_ID_목록": sorted(unsettled['id'].tolist())}
+
+
+def _budgets(rng):
+    erp = create_erp_budget_df()
+    erp['실행예산'] = rng.integers(0, 10**9, len(erp))
+    erp.loc[3, '실행예산'] = 0
+    rcms = create_rcms_budget_df()
+    rcms['budget_amount'] = rng.integers(0, 10**9, len(rcms))
+    rcms.loc[2, 'budget_amount'] = 0
+    return erp, rcms
+
+
+def _edge_expenses(make_expense, n, seed, amount_scale=1):
+    """결측 키, 0원, 코드 없는 정산 행, 예산에 없는 통계목을 섞은 지출내역"""
+    rng = np.random.default_rng(seed)
+    df = make_expense(n, seed=seed)
+    df['지출결의액'] = df['지출결의액'] * amount_scale
+    df.loc[rng.random(n) < 0.05, '지출결의액'] = 0
+    df.loc[rng.random(n) < 0.03, '통계목명'] = None
+    df.loc[rng.random(n) < 0.02, '통계목명'] = '예산에없는통계목'
+    no_code = rng.random(n) < 0.04
+    df.loc[no_code, ['rcms_code', 'rcms_name']] = None
+    return apply_expense_schema(df)
+
+
+@pytest.mark.parametrize("rows, amount_scale", [(300, 1), (5_000, 1), (5_000, 10**9)])
+def test_fused_totals_match_groupby(make_expense, rows, amount_scale):
+    expense_df = _edge_expenses(make_expense, rows, seed=rows, amount_scale=amount_scale)
+    erp_budget, rcms_budget = _budgets(np.random.default_rng(rows))
+
+    erp_df, rcms_df, info = BudgetCalculator.calculate_budgets(expense_df, erp_budget, rcms_budget)
+    expected_erp = _groupby_erp_budget(expense_df, erp_budget)
+    expected_rcms, expected_info = _groupby_rcms_budget(expense_df, rcms_budget)
+
+    pd.testing.assert_frame_equal(erp_df.drop(columns=['updated_at']), expected_erp.drop(columns=['updated_at']),
+                                  check_exact=True)
+    pd.testing.assert_frame_equal(rcms_df.drop(columns=['updated_at']), expected_rcms.drop(columns=['updated_at']),
+                                  check_exact=True)
+    assert info == expected_info
+    assert BudgetCalculator.get_erp_summary(erp_df) == BudgetCalculator.get_erp_summary(expected_erp)
+
+
+def test_single_table_entry_points_match_calculate_budgets(make_expense):
+    expense_df = _edge_expenses(make_expense, 1_000, seed=9)
+    erp_budget, rcms_budget = _budgets(np.random.default_rng(9))
+
+    erp_df, rcms_df, info = BudgetCalculator.calculate_budgets(expense_df, erp_budget, rcms_budget)
+    rcms_only, rcms_info = BudgetCalculator.calculate_rcms_budget(expense_df, rcms_budget)
+
+    pd.testing.assert_frame_equal(BudgetCalculator.calculate_erp_budget(expense_df, erp_budget).drop(columns=['updated_at']),
+                                  erp_df.drop(columns=['updated_at']))
+    pd.testing.assert_frame_equal(rcms_only.drop(columns=['updated_at']), rcms_df.drop(columns=['updated_at']))
+    assert rcms_info == info
+
+
+def test_budget_cache_shared_across_threads():
+    """여러 세션 스레드가 한 캐시를 함께 써도 횟수가 맞고 최대 항목 수를 넘지 않음"""
+    cache = BudgetCache(max_entries=8)
+    threads, calls, keys = 8, 2_000, 24
+    errors = []
+    start = threading.Barrier(threads)
+
+    def worker(offset):
+        try:
+            start.wait()
+            for i in range(calls):
+                key = (offset + i) % keys
+                value = cache._lookup(key, lambda: ('result', key))
+                assert value == ('result', key)
+                if i % 500 == 0:
+                    cache.get_stats()
+        except Exception as exc:  # noqa: BLE001 - 스레드 예외를 테스트로 전달
+            errors.append(exc)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    stats = cache.get_stats()
+    assert stats["hits"] + stats["misses"] == threads * calls
+    assert stats["entries"] <= 8
+    cache.clear()
+    assert cache.get_stats() == {"hits": 0, "misses": 0, "hit_rate": 0.0, "entries": 0}
+
+
+@pytest.mark.benchmark
+def test_benchmark_fused_aggregation(make_expense):
+    """1M행: 한 번 읽기 집계 vs groupby 집계"""
+    expense_df = apply_expense_schema(make_expense(1_000_000))
+    erp_budget, rcms_budget = _budgets(np.random.default_rng(0))
+
+    def best_of(func, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    totals = best_of(lambda: ExpenseTotals.from_frame(expense_df))
+    fused = best_of(lambda: BudgetCalculator.calculate_budgets(expense_df, erp_budget, rcms_budget))
+    groupby = best_of(lambda: (_groupby_erp_budget(expense_df, erp_budget),
+                               _groupby_rcms_budget(expense_df, rcms_budget)))
+    print(f"\n1,000,000 rows: ExpenseTotals.from_frame {totals * 1000:.0f} ms, "
+          f"calculate_budgets {fused * 1000:.0f} ms, groupby {groupby * 1000:.0f} ms")
+    assert fused < groupby
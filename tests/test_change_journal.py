@@ -0,0 +1,106 @@
+"""change_journal: 변경 저널 기록/재적용과 엑셀 파일 압축"""
+import numpy as np
+import pandas as pd
+
+from change_journal import ChangeJournal
+from data_manager import DataManager
+from expense_manager import ExpenseManager
+from expense_schema import apply_expense_schema
+
+
+def _open(path, **kwargs):
+    manager = DataManager(str(path), **kwargs)
+    data = manager.load_all()
+    expense_manager = ExpenseManager(data["EXPENSE"])
+    manager.bind_expense_manager(expense_manager)
+    return manager, expense_manager, data
+
+
+def _new_row(row_id):
+    return {"id": row_id, "통계목명": "재료비", "사용일자": "2024-07-01", "지출결의명": f"추가 {row_id}",
+            "상세내역": "", "지출결의액": 1000 + row_id, "rcms_code": "RCMS_008", "rcms_settled": False}
+
+
+def _replay_by_records(expense_df, entries):
+    """행 dict로 하나씩 적용하는 기준 구현 (재적용 결과 비교용)"""
+    columns = list(expense_df.columns)
+    rows = {int(r["id"]): r for r in expense_df.to_dict("records")}
+    for entry in entries:
+        if entry["op"] == "add":
+            rows[int(entry["row"]["id"])] = {**{c: None for c in columns}, **entry["row"]}
+        elif entry["op"] == "update" and entry["id"] in rows:
+            rows[entry["id"]].update(entry["changes"])
+        elif entry["op"] == "delete":
+            for row_id in entry["ids"]:
+                rows.pop(row_id, None)
+    return apply_expense_schema(pd.DataFrame(list(rows.values()), columns=columns))
+
+
+def test_partial_save_keeps_journaled_expense_rows(make_workbook):
+    path, _ = make_workbook(20)
+    _, expense_manager, _ = _open(path)
+    expense_manager.add_row(_new_row(21))
+
+    # 다시 열면 저널에서 복원, 예산 시트만 지정해 저장해도 지출내역이 유지되어야 함
+    manager, _, data = _open(path)
+    assert 21 in set(data["EXPENSE"]["id"])
+    success, _ = manager.save_all(data, dirty_sheets=["ERP_BUDGET"])
+
+    assert success
+    saved = pd.read_excel(path, sheet_name="EXPENSE")
+    assert len(saved) == 21 and 21 in set(saved["id"])
+    assert not manager.journal.exists()
+
+
+def test_journal_kept_when_pending_sheet_is_not_saved(make_workbook):
+    path, _ = make_workbook(5)
+    _, expense_manager, _ = _open(path)
+    expense_manager.add_row(_new_row(6))
+
+    manager, _, data = _open(path)
+    budgets = {name: data[name] for name in ("ERP_BUDGET", "RCMS_BUDGET")}
+    assert manager.save_all(budgets, dirty_sheets=["ERP_BUDGET"])[0]
+
+    assert manager.journal.exists()
+    assert 6 in set(DataManager(str(path), use_cache=False).load_all()["EXPENSE"]["id"])
+
+
+def test_replay_matches_record_by_record(tmp_path, make_expense):
+    base = apply_expense_schema(make_expense(200, seed=1))
+    rng = np.random.default_rng(7)
+    journal = ChangeJournal(tmp_path / "test_master.xlsx")
+    next_id = 201
+    for _ in range(300):
+        op = rng.choice(["add", "update", "delete", "readd"])
+        row_id = int(rng.integers(1, next_id))
+        if op == "add":
+            journal.on_add(_new_row(next_id))
+            next_id += 1
+        elif op == "update":
+            journal.on_update(row_id, {"지출결의액": int(rng.integers(1, 10**6)),
+                                       "사용일자": "2024-08-15", "rcms_code": "RCMS_017"})
+        elif op == "delete":
+            journal.on_delete([row_id])
+        else:
+            journal.on_add(_new_row(row_id))
+
+    entries = journal.read_entries()
+    expected = _replay_by_records(base, entries)
+    result = journal.replay({"EXPENSE": base})["EXPENSE"]
+
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+def test_threshold_compacts_in_background(make_workbook):
+    path, _ = make_workbook(10)
+    manager, expense_manager, _ = _open(path)
+    manager.journal.compact_bytes = 1
+
+    with manager._save_lock:
+        # 저장 잠금을 잡고 있어도 변경 기록은 압축을 기다리지 않고 끝나야 함
+        expense_manager.add_row(_new_row(11))
+        assert manager.journal.exists()
+    manager._compact_thread.join(timeout=30)
+
+    assert not manager.journal.exists()
+    assert 11 in set(pd.read_excel(path, sheet_name="EXPENSE")["id"])
@@ -0,0 +1,202 @@
+"""data_manager: EXPENSE 스트리밍 로드 (read-only iter_rows + 청크별 타입 계약), EXPENSE 우선 로드"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from data_manager import DataManager, EXPENSE_CHUNK_SIZE, SHEET_NAMES, read_expense_streaming, write_workbook
+from expense_manager import ExpenseManager, DEFAULT_PAGE_SIZE
+from expense_schema import apply_expense_schema
+
+
+def _edge_expense(make_expense, n):
+    """id 없는 행, 새 통계목, rcms_name만 있는 행, 빈 값, 추가 컬럼이 섞인 EXPENSE"""
+    df = make_expense(n, seed=4).astype({"id": "float64"})
+    df.loc[[3, n // 2, n - 1], "id"] = np.nan
+    df.loc[5, "통계목명"] = "새통계목"
+    df.loc[n - 2, "통계목명"] = "가나다 통계목"
+    df.loc[[7, n // 3], "rcms_code"] = None
+    df.loc[8, ["상세내역", "사용일자"]] = None
+    df["메모"] = [f"메모 {i}" if i % 5 else None for i in range(n)]
+    return df
+
+
+@pytest.mark.parametrize("chunk_size", [7, 50, 10_000])
+def test_streaming_matches_read_excel(make_workbook, make_expense, chunk_size):
+    path, data = make_workbook(5)
+    data["EXPENSE"] = _edge_expense(make_expense, 120)
+    write_workbook(path, data)
+
+    expected = apply_expense_schema(pd.read_excel(path, sheet_name="EXPENSE"))
+    streamed = read_expense_streaming(path, chunk_size=chunk_size)
+
+    pd.testing.assert_frame_equal(streamed.drop(columns=["메모"]), expected.drop(columns=["메모"]))
+    assert streamed["메모"].tolist() == expected["메모"].where(expected["메모"].notna(), None).tolist()
+    # id가 없던 행(마지막 행 포함)은 남은 최대 id(119) 다음 번호
+    assert streamed["id"].is_unique
+    assert streamed["id"].iloc[[3, 60, 119]].tolist() == [120, 121, 122]
+
+
+def test_load_all_streaming_flag(make_workbook):
+    path, _ = make_workbook(60)
+    default = DataManager(str(path), use_cache=False, streaming=False).load_all()
+    streamed = DataManager(str(path), use_cache=False, streaming=True).load_all()
+
+    for name in default:
+        pd.testing.assert_frame_equal(streamed[name], default[name])
+
+
+def test_streaming_empty_sheet(make_workbook, make_expense):
+    path, data = make_workbook(5)
+    data["EXPENSE"] = make_expense(0)
+    write_workbook(path, data)
+
+    streamed = read_expense_streaming(path)
+    expected = apply_expense_schema(pd.read_excel(path, sheet_name="EXPENSE"))
+    assert streamed.empty
+    assert list(streamed.columns) == list(expected.columns)
+
+
+# 로더 1개를 새 프로세스에서 실행하고 (시간, 최대 RSS 증가량, 결과 DataFrame 크기) 출력
+# (ru_maxrss는 exec 전 부모 프로세스 값을 이어받으므로 /proc의 VmHWM 사용)
+_LOAD_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[3])
+import pandas as pd
+from data_manager import read_expense_streaming
+from expense_schema import apply_expense_schema
+def peak_rss():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmHWM"))
+base = peak_rss()
+start = time.perf_counter()
+if sys.argv[2] == "streaming":
+    df = read_expense_streaming(sys.argv[1])
+else:
+    df = apply_expense_schema(pd.read_excel(sys.argv[1], sheet_name="EXPENSE"))
+elapsed = time.perf_counter() - start
+peak = peak_rss() - base
+print(elapsed, peak, int(df.memory_usage(deep=True).sum()))
+"""
+
+
+def _measure(path, mode):
+    """(걸린 시간, 최대 RSS 증가량, 결과 DataFrame 크기) - 로드 전후 메모리가 섞이지 않도록 별도 프로세스"""
+    output = subprocess.run([sys.executable, "-c", _LOAD_SCRIPT, str(path), mode, str(ROOT)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), int(output[1]), int(output[2])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("rows", [10_000, 100_000, 500_000])
+def test_benchmark_streaming_load(make_workbook, rows):
+    """EXPENSE 로드 시간/최대 메모리: pd.read_excel + 스키마 적용 vs 스트리밍 로드"""
+    if not os.path.exists("/proc/self/status"):
+        pytest.skip("최대 메모리 측정에 /proc/self/status 필요")
+    path, _ = make_workbook(rows, name=f"bench_{rows}_master.xlsx")
+    read_time, read_peak, _ = _measure(path, "read_excel")
+    stream_time, stream_peak, frame = _measure(path, "streaming")
+
+    mb = 1024 * 1024
+    print(f"\n{rows:>7,} rows: read_excel {read_time:.1f} s / {read_peak / mb:.0f} MB, "
+          f"streaming {stream_time:.1f} s / {stream_peak / mb:.0f} MB (frame {frame / mb:.0f} MB)")
+    assert stream_time < 1.5 * read_time
+    if rows > EXPENSE_CHUNK_SIZE:
+        # 여러 청크로 나뉘는 크기에서는 파이썬 셀 값이 한 청크 분량만 남음
+        assert stream_peak < read_peak
+    if rows >= 100_000:
+        # 고정 비용(openpyxl, 공유 문자열)보다 데이터가 큰 크기에서는 최종 DataFrame 크기의 몇 배 이내
+        assert stream_peak < 3 * frame
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_load_expense_first_matches_load_all(make_workbook, warm):
+    path, _ = make_workbook(40)
+    if warm:
+        DataManager(str(path)).load_all()
+    expected = DataManager(str(path), use_cache=False).load_all()
+
+    manager = DataManager(str(path))
+    first = manager.load_expense_first()
+    assert list(first) == ["EXPENSE"]
+    if not warm:
+        # 캐시 저장(파일 해시 포함)은 나머지 시트와 함께 첫 화면 뒤로 미룸
+        assert manager.cache.load() is None
+    manager.start_loading_remaining()
+    data = {**first, **manager.load_remaining()}
+
+    for name in SHEET_NAMES:
+        pd.testing.assert_frame_equal(data[name], expected[name])
+    # 미룬 로드가 끝나면 load_all과 같은 상태 (서명 기록, 캐시 저장)
+    assert manager.get_dirty_sheets(data) == set()
+    assert manager.cache.load() is not None
+
+
+def test_load_expense_first_replays_journal(make_workbook):
+    path, _ = make_workbook(20)
+    manager = DataManager(str(path))
+    expense_manager = ExpenseManager(manager.load_all()["EXPENSE"])
+    manager.bind_expense_manager(expense_manager)
+    expense_manager.update_row(3, {"지출결의액": 4321})
+    manager.record_budget_change("ERP_BUDGET", "통계목명", "상용임금", "실행예산", 999)
+
+    reopened = DataManager(str(path))
+    expense = reopened.load_expense_first()["EXPENSE"]
+    erp = reopened.load_remaining()["ERP_BUDGET"]
+    assert expense.loc[expense["id"] == 3, "지출결의액"].item() == 4321
+    assert erp.loc[erp["통계목명"] == "상용임금", "실행예산"].item() == 999
+
+
+def test_save_before_remaining_sheets_are_loaded(make_workbook):
+    """나머지 시트를 읽기 전에 저장해도 미룬 로드를 마친 뒤 부분 저장하고 캐시를 갱신"""
+    path, _ = make_workbook(30)
+    manager = DataManager(str(path))
+    manager.load_expense_first()
+
+    data = DataManager(str(path), use_cache=False).load_all()
+    data["ERP_BUDGET"].loc[1, "실행예산"] = 321
+    success, error = manager.save_all(data, dirty_sheets=["ERP_BUDGET"])
+    assert success, error
+
+    cached = manager.cache.load()
+    assert cached is not None
+    assert cached["ERP_BUDGET"].loc[1, "실행예산"] == 321
+    assert len(cached["EXPENSE"]) == 30
+
+
+def _first_table(path, deferred, cold):
+    """파일 선택 → 지출내역 첫 페이지(ID 내림차순)까지 걸린 시간과 그 뒤로 미룬 로드 시간"""
+    manager = DataManager(str(path))
+    if cold:
+        manager.cache.invalidate()
+    start = time.perf_counter()
+    data = manager.load_expense_first() if deferred else manager.load_all()
+    ExpenseManager(data["EXPENSE"]).get_page({}, "id", False, 0, DEFAULT_PAGE_SIZE)
+    first_table = time.perf_counter() - start
+    start = time.perf_counter()
+    manager.load_remaining()
+    return first_table, time.perf_counter() - start
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("rows", [10_000, 50_000])
+def test_benchmark_time_to_first_table(make_workbook, rows):
+    """첫 화면 표시 시간: load_all vs load_expense_first (캐시 없음 / 캐시 있음)"""
+    path, _ = make_workbook(rows, name=f"bench_{rows}_master.xlsx")
+    cold_eager, _ = _first_table(path, deferred=False, cold=True)
+    cold_deferred, cold_rest = _first_table(path, deferred=True, cold=True)
+    warm_eager = min(_first_table(path, deferred=False, cold=False)[0] for _ in range(5))
+    warm_deferred, warm_rest = min(_first_table(path, deferred=True, cold=False) for _ in range(5))
+
+    print(f"\n{rows:>7,} rows: cold load_all {cold_eager * 1000:.0f} ms, load_expense_first "
+          f"{cold_deferred * 1000:.0f} ms (+{cold_rest * 1000:.0f} ms later); warm load_all "
+          f"{warm_eager * 1000:.1f} ms, load_expense_first {warm_deferred * 1000:.1f} ms (+{warm_rest * 1000:.1f} ms later)")
+    # 캐시가 있으면 시트 서명 계산이 첫 화면 뒤로 빠짐
+    assert warm_deferred < warm_eager
+    # 캐시가 없으면 EXPENSE 파싱이 대부분이라 미룬 만큼(예산 시트, 캐시 저장)만 줄어듦 - 측정 오차 허용
+    assert cold_deferred < 1.2 * cold_eager
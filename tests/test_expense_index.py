@@ -0,0 +1,122 @@
+"""expense_index: 지출결의명/상세내역 전문 검색"""
+import time
+
+import numpy as np
+import pytest
+
+import expense_index
+from expense_manager import ExpenseManager
+
+WORDS = ["연구", "재료", "구입", "출장", "회의", "서울", "부산", "시약", "장비", "수리", "A형", "3차", "kit", "PCR"]
+
+
+def _text(rng, count):
+    return " ".join(rng.choice(WORDS, size=count).tolist()) + f" {int(rng.integers(100))}"
+
+
+def _expense_with_text(make_expense, n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = make_expense(n, seed=seed)
+    df["지출결의명"] = [_text(rng, 2) for _ in range(n)]
+    df["상세내역"] = [_text(rng, 3) if rng.random() < 0.8 else None for _ in range(n)]
+    return df
+
+
+def _brute_force(df, query):
+    """모든 행을 직접 검사한 기준 결과 (단어마다 지출결의명 2점, 상세내역 1점)"""
+    terms = query.lower().split()
+    ranked = []
+    for row_id, name, detail in zip(df["id"], df["지출결의명"], df["상세내역"]):
+        name = str(name).lower() if isinstance(name, str) else ""
+        detail = str(detail).lower() if isinstance(detail, str) else ""
+        scores = [2 * (term in name) + (term in detail) for term in terms]
+        if terms and all(scores):
+            ranked.append((-sum(scores), -int(row_id)))
+    return [-row_id for _, row_id in sorted(ranked)]
+
+
+def _queries(rng):
+    queries = ["연구", "연", "PCR", "pcr 서울", "재료 구입 3", "장비 수리", "없는단어", "kit 7", "차", "구 입"]
+    for _ in range(10):
+        word = str(rng.choice(WORDS))
+        start = int(rng.integers(0, len(word)))
+        queries.append(word[start:start + 2] + " " + str(rng.choice(WORDS)))
+    return queries
+
+
+def test_search_matches_brute_force_after_edits(make_expense):
+    rng = np.random.default_rng(3)
+    expense_manager = ExpenseManager(_expense_with_text(make_expense, 600))
+    queries = _queries(rng)
+    for query in queries:
+        assert expense_manager.search(query) == _brute_force(expense_manager.snapshot(), query), query
+
+    # 증분 반영(추가/수정/삭제) 뒤에도 같은 결과
+    for step in range(40):
+        ids = expense_manager.snapshot()["id"].to_numpy()
+        row_id = int(rng.choice(ids))
+        if step % 4 == 0:
+            expense_manager.add_row({"통계목명": "재료비", "지출결의명": _text(rng, 2), "상세내역": _text(rng, 1),
+                                     "지출결의액": 1})
+        elif step % 4 == 1:
+            expense_manager.update_row(row_id, {"상세내역": _text(rng, 2)})
+        elif step % 4 == 2:
+            expense_manager.delete_row(row_id)
+        else:
+            expense_manager.apply_changes(updated=[{"id": row_id, "지출결의명": _text(rng, 3)}],
+                                          added=[{"통계목명": "재료비", "지출결의명": "PCR 시약", "지출결의액": 2}])
+        query = queries[step % len(queries)]
+        assert expense_manager.search(query) == _brute_force(expense_manager.snapshot(), query), (step, query)
+
+
+def test_unpacked_build_matches_brute_force(make_expense, monkeypatch):
+    """글자 종류가 많아 64비트 키로 정렬하는 경우도 같은 결과"""
+    monkeypatch.setattr(expense_index, "PACKED_ALPHABET_LIMIT", 4)
+    expense_manager = ExpenseManager(_expense_with_text(make_expense, 300, seed=2))
+    for query in _queries(np.random.default_rng(2)):
+        assert expense_manager.search(query) == _brute_force(expense_manager.snapshot(), query), query
+    assert expense_manager._search._postings["지출결의명"].keys.dtype == np.uint64
+
+
+def test_search_limit_keeps_ranking(make_expense):
+    expense_manager = ExpenseManager(_expense_with_text(make_expense, 300, seed=1))
+    full = expense_manager.search("연구")
+    assert expense_manager.search("연구", limit=5) == full[:5]
+    assert expense_manager.search("   ") == []
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("rows, min_speedup", [(10_000, 3), (200_000, 8)])
+def test_benchmark_search(make_expense, rows, min_speedup):
+    """검색 지연 시간: 색인 검색 vs 컬럼 전체 str.contains (행이 많을수록 차이가 커야 함)"""
+    df = _expense_with_text(make_expense, rows)
+    expense_manager = ExpenseManager(df)
+    start = time.perf_counter()
+    expense_manager.search("연구")
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expense_manager._search.rebuild()
+    rebuild = time.perf_counter() - start
+
+    queries = ["연구", "pcr 서울", "재료 구입 3", "장비 수리 kit"]
+    start = time.perf_counter()
+    for _ in range(5):
+        for query in queries:
+            expense_manager.search(query)
+    indexed = (time.perf_counter() - start) / (5 * len(queries))
+
+    names = df["지출결의명"].astype(str).str.lower()
+    details = df["상세내역"].fillna("").astype(str).str.lower()
+    start = time.perf_counter()
+    for query in queries:
+        mask = np.ones(len(df), dtype=bool)
+        for term in query.split():
+            mask &= (names.str.contains(term, regex=False) | details.str.contains(term, regex=False)).to_numpy()
+    scan = (time.perf_counter() - start) / len(queries)
+
+    print(f"\n{rows:>7,} rows: build {build * 1000:.0f} ms (rebuild {rebuild * 1000:.0f} ms), "
+          f"search {indexed * 1000:.2f} ms/query, str.contains {scan * 1000:.2f} ms/query ({scan / indexed:.1f}x)")
+    assert indexed * min_speedup < scan
+    # 다시 생성하는 비용은 str.contains 검색 10번 안쪽
+    assert rebuild < 10 * scan
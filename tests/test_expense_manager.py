@@ -0,0 +1,158 @@
+"""expense_manager: id 인덱스와 일괄 반영(apply_changes)"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from expense_manager import ExpenseManager
+from expense_schema import coerce_expense_value, coerce_expense_values, get_rcms_name
+
+COMPARE_COLUMNS = ["id", "통계목명", "사용일자", "지출결의명", "상세내역", "지출결의액", "rcms_code", "rcms_settled"]
+
+
+def _session(rng, ids, n_updates, n_deletes, n_adds):
+    """편집 세션 1개 (수정/삭제 대상은 서로 겹치지 않음)"""
+    picked = rng.choice(ids, size=n_updates + n_deletes, replace=False).tolist()
+    updated = [{"id": int(i), "지출결의액": int(rng.integers(1, 10**6)), "상세내역": f"수정 {i}"}
+               for i in picked[:n_updates]]
+    deleted = [int(i) for i in picked[n_updates:]]
+    added = [{"통계목명": "재료비", "사용일자": "2024-10-01", "지출결의명": f"추가 {k}", "상세내역": "",
+              "지출결의액": 1000 + k, "rcms_code": "RCMS_008"} for k in range(n_adds)]
+    return added, updated, deleted
+
+
+def _frame(expense_manager):
+    return expense_manager.snapshot()[COMPARE_COLUMNS].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_apply_changes_matches_row_by_row(make_expense, seed):
+    rng = np.random.default_rng(seed)
+    batch = ExpenseManager(make_expense(500, seed=seed))
+    single = ExpenseManager(make_expense(500, seed=seed))
+
+    for _ in range(5):
+        added, updated, deleted = _session(rng, batch.snapshot()["id"].to_numpy(), 40, 15, 3)
+        assert batch.apply_changes(added=added, updated=updated, deleted_ids=deleted)[0]
+        for row in updated:
+            assert single.update_row(row["id"], row)[0]
+        for row_id in deleted:
+            assert single.delete_row(row_id)[0]
+        for row in added:
+            assert single.add_row(dict(row))[0]
+
+        pd.testing.assert_frame_equal(_frame(batch), _frame(single))
+
+
+def test_id_index_follows_deletes_and_adds(make_expense):
+    expense_manager = ExpenseManager(make_expense(50))
+    expense_manager.delete_rows([1, 2, 3])
+    expense_manager.add_row({"통계목명": "재료비", "지출결의명": "새 행", "지출결의액": 10})
+
+    assert expense_manager.update_row(40, {"지출결의액": 4040})[0]
+    assert expense_manager.update_row(51, {"지출결의액": 5151})[0]
+    assert not expense_manager.update_row(2, {"지출결의액": 1})[0]
+    df = expense_manager.snapshot().set_index("id")
+    assert df.loc[40, "지출결의액"] == 4040 and df.loc[51, "지출결의액"] == 5151
+
+
+class RecordingListener:
+    def __init__(self):
+        self.updates = []
+
+    def on_update(self, row_id, changes):
+        self.updates.append((row_id, changes))
+
+
+@pytest.mark.parametrize("column, values", [
+    ("지출결의액", [5, np.int64(7), 2.5, "12", "x", None, np.nan]),
+    ("사용일자", ["2024-01-05", pd.Timestamp("2024-02-01"), None, "bad"]),
+    ("rcms_settled", [True, np.bool_(False), 1, 0, "true", "no", None]),
+    ("rcms_code", ["RCMS_001", " RCMS_002 ", "", None, np.nan]),
+])
+def test_scalar_coercion_matches_column_coercion(column, values):
+    for value in values:
+        expected = coerce_expense_values(column, pd.Series([value])).iloc[0]
+        result = coerce_expense_value(column, value)
+        assert (pd.isna(result) and pd.isna(expected)) or result == expected, (column, value)
+
+
+def test_update_row_matches_apply_changes_on_edge_values(make_expense):
+    edits = [
+        (1, {"rcms_name": get_rcms_name("RCMS_017"), "rcms_code": ""}),
+        (2, {"통계목명": "새통계목", "사용일자": "2024-12-24"}),
+        (3, {"메모": "추가 컬럼", "지출결의액": "1500"}),
+        (4, {"rcms_settled": "true", "지출결의명": None}),
+    ]
+    single = ExpenseManager(make_expense(30))
+    batch = ExpenseManager(make_expense(30))
+    for row_id, values in edits:
+        assert single.update_row(row_id, dict(values))[0]
+    assert batch.apply_changes(updated=[{"id": row_id, **values} for row_id, values in edits])[0]
+
+    columns = COMPARE_COLUMNS + ["메모"]
+    pd.testing.assert_frame_equal(single.snapshot()[columns], batch.snapshot()[columns],
+                                  check_categorical=False, check_dtype=False)
+    assert single.snapshot().set_index("id").loc[1, "rcms_code"] == "RCMS_017"
+    assert single.check_totals()[0]
+
+
+def test_update_row_without_change_is_noop(make_expense):
+    expense_manager = ExpenseManager(make_expense(10))
+    listener = RecordingListener()
+    expense_manager.add_listener(listener)
+    row = expense_manager.get_by_id(5)
+    version = expense_manager.version
+
+    assert expense_manager.update_row(5, {"지출결의액": int(row["지출결의액"]), "통계목명": row["통계목명"]})[0]
+    assert expense_manager.version == version and listener.updates == []
+
+    assert expense_manager.update_row(5, {"지출결의액": 1, "상세내역": "영수증 재발급"})[0]
+    assert expense_manager.version == version + 1
+    assert listener.updates[0][0] == 5
+    assert set(listener.updates[0][1]) == {"지출결의액", "상세내역", "updated_at"}
+    assert expense_manager.search("재발급") == [5]
+
+
+def test_apply_changes_rejects_unknown_id_without_changes(make_expense):
+    expense_manager = ExpenseManager(make_expense(20))
+    before = _frame(expense_manager)
+
+    success, error_msg = expense_manager.apply_changes(
+        added=[{"통계목명": "재료비", "지출결의명": "추가", "지출결의액": 1}],
+        updated=[{"id": 3, "지출결의액": 3}, {"id": 999, "지출결의액": 9}], deleted_ids=[4])
+
+    assert not success and "999" in error_msg
+    pd.testing.assert_frame_equal(_frame(expense_manager), before)
+
+
+@pytest.mark.benchmark
+def test_benchmark_apply_changes(make_expense):
+    """100k행에 1,000건 수정: apply_changes 한 번 vs update_row 1,000번 vs 행마다 전체 비교(기존 방식)"""
+    df = make_expense(100_000)
+    rng = np.random.default_rng(0)
+    _, updated, _ = _session(rng, df["id"].to_numpy(), 1_000, 0, 0)
+
+    expense_manager = ExpenseManager(df)
+    start = time.perf_counter()
+    assert expense_manager.apply_changes(updated=updated)[0]
+    batch = time.perf_counter() - start
+
+    expense_manager = ExpenseManager(df)
+    start = time.perf_counter()
+    for row in updated:
+        expense_manager.update_row(row["id"], row)
+    single = time.perf_counter() - start
+
+    scan_df = df.copy()
+    start = time.perf_counter()
+    for row in updated:
+        mask = scan_df["id"] == row["id"]
+        for column in ("지출결의액", "상세내역"):
+            scan_df.loc[mask, column] = row[column]
+    scan = time.perf_counter() - start
+
+    print(f"\napply_changes {batch * 1000:.1f} ms, update_row x1000 {single * 1000:.1f} ms, "
+          f"boolean scan x1000 {scan * 1000:.1f} ms")
+    assert batch < single < scan
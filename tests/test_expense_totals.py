@@ -0,0 +1,110 @@
+"""expense_totals: ExpenseManager 누적 합계와 전체 재계산 비교"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from budget_calculator import BudgetCalculator
+from expense_manager import ExpenseManager
+from initial_data import create_erp_budget_df, create_rcms_budget_df, get_erp_statistics_list, get_rcms_items_list
+
+STATS = get_erp_statistics_list()[1:]
+CODES = [item["rcms_code"] for item in get_rcms_items_list()]
+
+
+def _random_values(rng):
+    """집계 컬럼을 무작위로 바꾸는 값 (코드 없음, 예산에 없는 통계목 포함)"""
+    values = {}
+    if rng.random() < 0.7:
+        values["지출결의액"] = int(rng.integers(0, 3_000_000))
+    if rng.random() < 0.4:
+        values["통계목명"] = str(rng.choice(STATS + ["기타"]))
+    if rng.random() < 0.4:
+        values["rcms_code"] = str(rng.choice(CODES)) if rng.random() < 0.9 else None
+    if rng.random() < 0.4:
+        values["rcms_settled"] = bool(rng.random() < 0.5)
+    if rng.random() < 0.2:
+        values["지출결의명"] = f"수정 {int(rng.integers(100))}"
+    return values
+
+
+def _new_row(rng):
+    return {"통계목명": str(rng.choice(STATS)), "사용일자": "2024-09-01", "지출결의명": "추가",
+            "상세내역": "", "지출결의액": int(rng.integers(1000, 2_000_000)),
+            "rcms_code": str(rng.choice(CODES)), "rcms_settled": bool(rng.random() < 0.7)}
+
+
+def _mutate(expense_manager, rng):
+    """add/update/delete/delete_rows/apply_changes 중 하나를 무작위로 실행"""
+    ids = expense_manager.snapshot()["id"].tolist()
+    op = rng.choice(["add", "update", "delete", "delete_rows", "apply_changes"], p=[0.2, 0.35, 0.1, 0.05, 0.3])
+    if op == "add" or not ids:
+        expense_manager.add_row(_new_row(rng))
+    elif op == "update":
+        expense_manager.update_row(int(rng.choice(ids)), _random_values(rng))
+    elif op == "delete":
+        expense_manager.delete_row(int(rng.choice(ids)))
+    elif op == "delete_rows":
+        expense_manager.delete_rows(rng.choice(ids, size=min(len(ids), 3), replace=False).tolist())
+    else:
+        # 증감분이 많은 묶음(LOOP_MAX_ROWS 초과)도 섞음
+        size = int(rng.choice([1, 5, 300]))
+        picked = rng.choice(ids, size=min(len(ids), size), replace=False).tolist()
+        updated = [{"id": int(i), **_random_values(rng)} for i in picked[: len(picked) // 2 + 1]]
+        deleted = picked[len(picked) // 2 + 1:][:10]
+        added = [_new_row(rng) for _ in range(int(rng.integers(0, 4)))]
+        assert expense_manager.apply_changes(added=added, updated=updated, deleted_ids=deleted)[0]
+
+
+def _groupby_reference(df):
+    """pandas groupby로 계산한 기준값 (누적 합계와 다른 경로)"""
+    amounts = df["지출결의액"].astype("int64")
+    executed = amounts.groupby(df["통계목명"].astype(object)).sum()
+    settled_mask = df["rcms_settled"].astype(bool)
+    settled = amounts[settled_mask].groupby(df["rcms_code"].astype(object)[settled_mask]).sum()
+    return {
+        "executed": {k: int(v) for k, v in executed.items() if v},
+        "settled": {k: int(v) for k, v in settled.items() if v},
+        "unsettled_amount": int(amounts[~settled_mask].sum()),
+        "unsettled_ids": sorted(df.loc[~settled_mask, "id"].tolist()),
+    }
+
+
+def _budget_tables(totals_or_df, erp_budget, rcms_budget):
+    if isinstance(totals_or_df, pd.DataFrame):
+        erp = BudgetCalculator.calculate_erp_budget(totals_or_df, erp_budget)
+        rcms, info = BudgetCalculator.calculate_rcms_budget(totals_or_df, rcms_budget)
+    else:
+        erp = BudgetCalculator.calculate_erp_budget_from_totals(totals_or_df, erp_budget)
+        rcms, info = BudgetCalculator.calculate_rcms_budget_from_totals(totals_or_df, rcms_budget)
+    return erp.drop(columns=["updated_at"]), rcms.drop(columns=["updated_at"]), info
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_running_totals_match_full_recompute(make_expense, seed):
+    rng = np.random.default_rng(seed)
+    expense_manager = ExpenseManager(make_expense(400, seed=seed))
+    erp_budget = create_erp_budget_df().assign(실행예산=lambda df: rng.integers(0, 50_000_000, len(df)))
+    rcms_budget = create_rcms_budget_df().assign(budget_amount=lambda df: rng.integers(0, 50_000_000, len(df)))
+    # 처음부터 누적 합계를 유지하도록 먼저 계산
+    expense_manager.get_totals()
+
+    for step in range(100):
+        _mutate(expense_manager, rng)
+        ok, message = expense_manager.check_totals()
+        assert ok, f"step {step}: {message}"
+        if step % 10:
+            continue
+
+        df = expense_manager.snapshot()
+        totals = expense_manager.get_totals()
+        reference = _groupby_reference(df)
+        assert {k: v for k, v in totals.executed.items() if v} == reference["executed"]
+        assert {k: v for k, v in totals.settled.items() if v} == reference["settled"]
+        assert totals.unsettled_amount == reference["unsettled_amount"]
+        assert totals.get_unsettled_ids() == reference["unsettled_ids"]
+
+        incremental = _budget_tables(totals, erp_budget, rcms_budget)
+        full = _budget_tables(df, erp_budget, rcms_budget)
+        pd.testing.assert_frame_equal(incremental[0], full[0])
+        pd.testing.assert_frame_equal(incremental[1], full[1])
+        assert incremental[2] == full[2]
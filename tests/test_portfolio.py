@@ -0,0 +1,50 @@
+"""portfolio: 여러 과제 병렬 로드"""
+import pytest
+
+from data_manager import write_workbook
+from portfolio import PortfolioManager, detect_backend, discover_master_files
+from sqlite_manager import SQLiteDataManager
+
+from conftest import build_workbook_data
+
+
+def _make_projects(root, backends):
+    """과제 폴더별 master 파일 생성 (sqlite 과제는 DB만 남김)"""
+    expected = {}
+    for i, backend in enumerate(backends):
+        path = root / f"과제{i}" / f"과제{i}_master.xlsx"
+        path.parent.mkdir(parents=True)
+        data = build_workbook_data(10 + i, seed=i)
+        write_workbook(path, data)
+        if backend == "sqlite":
+            assert SQLiteDataManager(str(path)).create_initial_file()
+            path.unlink()
+        expected[f"과제{i}"] = len(data["EXPENSE"])
+    return expected
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_load_uses_backend_found_on_disk(tmp_path, monkeypatch, max_workers):
+    root = tmp_path / "projects"
+    expected = _make_projects(root, ["xlsx", "sqlite", "xlsx", "sqlite"])
+    # 작업 프로세스가 현재 폴더의 설정 파일을 읽거나 만들지 않아야 함
+    workdir = tmp_path / "cwd"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    portfolio = PortfolioManager(str(root))
+    success, error_msg = portfolio.load(max_workers=max_workers)
+
+    assert success, error_msg
+    assert portfolio.errors == {}
+    counts = dict(zip(portfolio.summary_df["과제"], portfolio.summary_df["지출_건수"]))
+    assert counts == expected
+    assert not (workdir / "config.json").exists()
+
+
+def test_detect_backend(tmp_path):
+    _make_projects(tmp_path, ["xlsx", "sqlite"])
+    found = discover_master_files(str(tmp_path))
+
+    assert [detect_backend(p) for p in found] == ["xlsx", "sqlite"]
+    assert all(p.suffix == ".xlsx" for p in found)
@@ -0,0 +1,75 @@
+"""save_worker: 백그라운드 저장 작업자"""
+from pathlib import Path
+import threading
+import time
+
+import pandas as pd
+
+from data_manager import DataManager
+from expense_manager import ExpenseManager
+from save_worker import SaveWorker
+
+
+class RecordingManager:
+    """save_all 호출만 기록하는 저장소 (첫 저장은 release 전까지 대기)"""
+
+    def __init__(self):
+        self.file_path = Path("recording_master.xlsx")
+        self.saved = []
+        self.release = threading.Event()
+
+    def save_all(self, data, dirty_sheets=None, journal_offset=None):
+        self.release.wait(10)
+        self.saved.append((data, dirty_sheets))
+        return True, None
+
+
+def test_submit_keeps_snapshot_objects_without_copying(make_expense):
+    expense_manager = ExpenseManager(make_expense(100))
+    snapshot = expense_manager.snapshot()
+    manager = RecordingManager()
+    worker = SaveWorker(manager)
+    manager.release.set()
+
+    worker.submit({"EXPENSE": snapshot})
+    assert worker.stop(timeout=10)
+
+    assert manager.saved[0][0]["EXPENSE"] is snapshot
+
+
+def test_pending_requests_coalesce_to_latest_snapshot(make_expense):
+    expense_manager = ExpenseManager(make_expense(10))
+    manager = RecordingManager()
+    worker = SaveWorker(manager)
+
+    worker.submit({"EXPENSE": expense_manager.snapshot()}, dirty_sheets=["EXPENSE"])
+    # 첫 저장이 진행되는 동안 들어온 요청 두 개는 마지막 스냅샷 하나로 합쳐짐
+    deadline = time.monotonic() + 10
+    while worker.get_status()["state"] != "saving" and time.monotonic() < deadline:
+        time.sleep(0.001)
+    worker.submit({"EXPENSE": expense_manager.snapshot()}, dirty_sheets=["ERP_BUDGET"])
+    expense_manager.delete_row(1)
+    latest = expense_manager.snapshot()
+    worker.submit({"EXPENSE": latest}, dirty_sheets=["RCMS_BUDGET"])
+    manager.release.set()
+    assert worker.stop(timeout=10)
+
+    assert len(manager.saved) == 2
+    data, dirty = manager.saved[1]
+    assert data["EXPENSE"] is latest and len(latest) == 9
+    assert set(dirty) == {"ERP_BUDGET", "RCMS_BUDGET"}
+
+
+def test_worker_saves_to_workbook(make_workbook):
+    path, _ = make_workbook(20)
+    manager = DataManager(str(path))
+    data = manager.load_all()
+    expense_manager = ExpenseManager(data["EXPENSE"])
+    expense_manager.update_row(3, {"지출결의액": 777})
+    worker = SaveWorker(manager)
+
+    worker.submit({**data, "EXPENSE": expense_manager.snapshot()})
+    assert worker.stop(timeout=30)
+
+    saved = pd.read_excel(path, sheet_name="EXPENSE").set_index("id")
+    assert saved.loc[3, "지출결의액"] == 777
@@ -0,0 +1,119 @@
+"""sheet_cache: 엑셀 파싱을 건너뛰는 시트 캐시"""
+import os
+import pickle
+
+import pandas as pd
+
+import sheet_cache
+from data_manager import DataManager, write_workbook
+
+
+def _workbook_sheets(path):
+    """캐시 없이 엑셀 파일에서 직접 읽은 시트"""
+    return DataManager(str(path), use_cache=False).load_all()
+
+
+def test_cache_hit_matches_workbook(make_workbook):
+    path, _ = make_workbook(30)
+    manager = DataManager(str(path))
+    first = manager.load_all()
+    cached = manager.cache.load()
+
+    assert cached is not None
+    for name, df in first.items():
+        pd.testing.assert_frame_equal(cached[name], df)
+        pd.testing.assert_frame_equal(DataManager(str(path)).load_all()[name], df)
+
+
+def test_cache_invalidated_when_workbook_changes(make_workbook, make_expense):
+    path, data = make_workbook(30)
+    DataManager(str(path)).load_all()
+
+    # 엑셀에서 직접 수정한 경우 (크기/수정시각/내용이 바뀜)
+    data["EXPENSE"] = make_expense(5, seed=1)
+    write_workbook(path, data)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+
+    assert len(DataManager(str(path)).load_all()["EXPENSE"]) == 5
+
+
+def test_partial_save_caches_only_written_sheets(make_workbook):
+    """저장하지 않은 시트는 캐시에도 파일 내용 그대로 남아야 함"""
+    path, _ = make_workbook(40)
+    manager = DataManager(str(path))
+    data = manager.load_all()
+
+    # EXPENSE는 메모리에서만 바뀌고 저장 대상은 ERP_BUDGET뿐
+    data["EXPENSE"] = data["EXPENSE"].iloc[:10]
+    data["ERP_BUDGET"] = data["ERP_BUDGET"].copy()
+    data["ERP_BUDGET"].loc[1, "실행예산"] = 500
+    success, error = manager.save_all(data, dirty_sheets=["ERP_BUDGET"])
+    assert success, error
+
+    cached = manager.cache.load()
+    on_disk = _workbook_sheets(path)
+    assert cached is not None
+    assert len(cached["EXPENSE"]) == len(on_disk["EXPENSE"]) == 40
+    assert cached["ERP_BUDGET"].loc[1, "실행예산"] == on_disk["ERP_BUDGET"].loc[1, "실행예산"] == 500
+
+
+def test_save_without_load_drops_cache(make_workbook):
+    """쓰지 않은 시트의 파일 내용을 모르면 캐시를 지우고 다음 로드는 엑셀에서 읽음"""
+    path, _ = make_workbook(25)
+    DataManager(str(path)).load_all()
+
+    data = _workbook_sheets(path)
+    data["ERP_BUDGET"].loc[1, "실행예산"] = 9
+    manager = DataManager(str(path))
+    success, error = manager.save_all(data, dirty_sheets=["ERP_BUDGET"])
+    assert success, error
+
+    assert manager.cache.load() is None
+    reloaded = DataManager(str(path)).load_all()
+    assert len(reloaded["EXPENSE"]) == 25
+    assert reloaded["ERP_BUDGET"].loc[1, "실행예산"] == 9
+
+
+def _count_frame_unpickles(monkeypatch):
+    """시트 데이터 unpickle(pickle.load) 호출 횟수 기록"""
+    calls = []
+    original = sheet_cache.pickle.load
+
+    def counting_load(f, *args, **kwargs):
+        calls.append(f)
+        return original(f, *args, **kwargs)
+
+    monkeypatch.setattr(sheet_cache.pickle, "load", counting_load)
+    return calls
+
+
+def test_stale_cache_rejected_before_unpickling_frames(make_workbook, make_expense, monkeypatch):
+    """원본이 바뀌면 헤더만 읽고 시트 데이터는 unpickle하지 않음"""
+    path, data = make_workbook(30)
+    manager = DataManager(str(path))
+    manager.load_all()
+    calls = _count_frame_unpickles(monkeypatch)
+
+    assert manager.cache.load() is not None
+    assert len(calls) == 1
+
+    data["EXPENSE"] = make_expense(5, seed=1)
+    write_workbook(path, data)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+
+    assert manager.cache.load() is None
+    assert len(calls) == 1
+
+
+def test_old_format_cache_ignored_without_unpickling(make_workbook, monkeypatch):
+    """표식이 없는 이전 형식 캐시는 unpickle 없이 무시하고 엑셀에서 다시 읽음"""
+    path, _ = make_workbook(20)
+    manager = DataManager(str(path))
+    expected = manager.load_all()
+    with open(manager.cache.cache_path, "wb") as f:
+        pickle.dump({"version": 2, "key": manager.cache.get_file_key(), "data": expected}, f)
+    calls = _count_frame_unpickles(monkeypatch)
+
+    assert manager.cache.load() is None
+    assert calls == []
+    pd.testing.assert_frame_equal(DataManager(str(path)).load_all()["EXPENSE"], expected["EXPENSE"])
@@ -0,0 +1,85 @@
+"""sqlite_manager: 행 단위 SQL 저장소"""
+import re
+import sqlite3
+
+import pandas as pd
+
+from expense_manager import ExpenseManager
+from expense_schema import get_rcms_name
+from sqlite_manager import SQLiteDataManager
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def _open(make_workbook, n=20):
+    """엑셀 파일을 가져온 SQLite 저장소와 연결된 ExpenseManager"""
+    path, _ = make_workbook(n)
+    manager = SQLiteDataManager(str(path))
+    assert manager.create_initial_file()
+    expense_manager = ExpenseManager(manager.load_all()["EXPENSE"])
+    manager.bind_expense_manager(expense_manager)
+    return manager, expense_manager
+
+
+def _rows(manager, sql, params=()):
+    with sqlite3.connect(manager.db_path) as conn:
+        return conn.execute(sql, params).fetchall()
+
+
+def test_dates_use_one_format_on_every_path(make_workbook):
+    manager, expense_manager = _open(make_workbook)
+    expense_manager.add_row({"통계목명": "재료비", "사용일자": pd.Timestamp("2024-03-05"),
+                             "지출결의명": "추가", "지출결의액": 1000, "rcms_code": "RCMS_008"})
+    expense_manager.update_row(1, {"사용일자": "2024-02-01"})
+    expense_manager.apply_changes(
+        added=[{"통계목명": "재료비", "사용일자": "2024-04-01", "지출결의명": "일괄", "지출결의액": 10}],
+        updated=[{"id": 2, "사용일자": pd.Timestamp("2024-01-31 00:00:00")}])
+
+    dates = [row[0] for row in _rows(manager, 'SELECT "사용일자" FROM EXPENSE')]
+    assert dates and all(DATE_PATTERN.match(d) for d in dates)
+    # 문자열 범위 조회가 날짜 범위와 같아야 함
+    in_range = _rows(manager, 'SELECT id FROM EXPENSE WHERE "사용일자" BETWEEN ? AND ?', ("2024-02-01", "2024-02-01"))
+    assert (1,) in in_range
+
+
+def test_legacy_datetime_text_is_normalized_on_load(make_workbook):
+    manager, _ = _open(make_workbook)
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute('UPDATE EXPENSE SET "사용일자" = \'2024-05-06 00:00:00\' WHERE id = 3')
+
+    assert manager.load_all()["EXPENSE"].set_index("id").loc[3, "사용일자"] == pd.Timestamp("2024-05-06")
+    assert _rows(manager, 'SELECT "사용일자" FROM EXPENSE WHERE id = 3') == [("2024-05-06",)]
+
+
+def test_rcms_name_follows_rcms_code(make_workbook):
+    manager, expense_manager = _open(make_workbook)
+    expense_manager.update_row(1, {"rcms_code": "RCMS_020"})
+    expense_manager.apply_changes(updated=[{"id": 2, "rcms_code": "RCMS_017"}])
+    expense_manager.add_row({"통계목명": "회의비", "사용일자": "2024-01-02", "지출결의명": "회의",
+                             "지출결의액": 5, "rcms_code": "RCMS_020"})
+
+    rows = dict(_rows(manager, "SELECT id, rcms_name FROM EXPENSE WHERE id IN (1, 2, 21)"))
+    assert rows == {1: get_rcms_name("RCMS_020"), 2: get_rcms_name("RCMS_017"), 21: get_rcms_name("RCMS_020")}
+
+
+def test_round_trip_matches_memory(make_workbook):
+    manager, expense_manager = _open(make_workbook)
+    expense_manager.update_row(4, {"지출결의액": 4321, "rcms_settled": True})
+    expense_manager.delete_row(5)
+
+    loaded = manager.load_all()["EXPENSE"]
+    expected = expense_manager.get_all()
+    columns = ["id", "통계목명", "사용일자", "지출결의액", "rcms_code", "rcms_settled"]
+    pd.testing.assert_frame_equal(loaded[columns].reset_index(drop=True), expected[columns].reset_index(drop=True),
+                                  check_categorical=False)
+
+
+def test_load_expense_first_returns_every_table(make_workbook):
+    manager, expense_manager = _open(make_workbook)
+    first = manager.load_expense_first()
+    manager.start_loading_remaining()
+    remaining = manager.load_remaining()
+
+    assert list(first) == ["EXPENSE"]
+    assert set(remaining) == {"ERP_BUDGET", "RCMS_BUDGET", "MAPPING_ERP_RCMS"}
+    assert len(first["EXPENSE"]) == len(expense_manager.get_all())
@@ -0,0 +1,211 @@
+"""xlsx_patch: 변경된 시트만 교체하는 부분 저장"""
+import time
+import zipfile
+
+import pandas as pd
+import pytest
+
+import xlsx_patch
+from xlsx_patch import patch_workbook, get_sheet_parts, read_raw_member, CALC_CHAIN_PART, STYLES_PART
+from data_manager import DataManager, write_workbook
+
+
+def _raw_members(path):
+    """파트 이름 → 압축된 원본 바이트"""
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        return {info.filename: read_raw_member(f, info) for info in zf.infolist()}
+
+
+def _edit_budget(path, value):
+    erp = pd.read_excel(path, sheet_name="ERP_BUDGET")
+    erp.loc[erp.index[1], "실행예산"] = value
+    return erp
+
+
+def test_patch_replaces_only_given_sheet(make_workbook, tmp_path):
+    src, data = make_workbook(50)
+    dst = tmp_path / "patched.xlsx"
+    patch_workbook(src, dst, {"ERP_BUDGET": _edit_budget(src, 12345)})
+
+    with zipfile.ZipFile(dst) as zf:
+        assert zf.testzip() is None
+    assert pd.read_excel(dst, sheet_name="ERP_BUDGET").loc[1, "실행예산"] == 12345
+    pd.testing.assert_frame_equal(pd.read_excel(dst, sheet_name="EXPENSE"),
+                                  pd.read_excel(src, sheet_name="EXPENSE"))
+
+
+def test_unchanged_parts_are_copied_without_recompression(make_workbook, tmp_path):
+    """교체하지 않은 파트는 압축된 바이트가 원본과 같아야 함 (재압축 없는 복사 고정)"""
+    src, _ = make_workbook(200)
+    dst = tmp_path / "patched.xlsx"
+    patch_workbook(src, dst, {"ERP_BUDGET": _edit_budget(src, 1)})
+
+    with zipfile.ZipFile(src) as zf:
+        parts = get_sheet_parts(zf)
+    before, after = _raw_members(src), _raw_members(dst)
+    assert list(after) == list(before)
+    assert after[parts["EXPENSE"]] == before[parts["EXPENSE"]]
+    assert after[parts["RCMS_BUDGET"]] == before[parts["RCMS_BUDGET"]]
+    assert after[parts["ERP_BUDGET"]] != before[parts["ERP_BUDGET"]]
+
+
+def test_patched_workbook_can_be_patched_again(make_workbook, tmp_path):
+    src, _ = make_workbook(20)
+    first, second = tmp_path / "first.xlsx", tmp_path / "second.xlsx"
+    patch_workbook(src, first, {"ERP_BUDGET": _edit_budget(src, 1)})
+    patch_workbook(first, second, {"ERP_BUDGET": _edit_budget(first, 2)})
+
+    with zipfile.ZipFile(second) as zf:
+        assert zf.testzip() is None
+    with pd.ExcelFile(second) as excel:
+        assert excel.sheet_names == ["EXPENSE", "ERP_BUDGET", "RCMS_BUDGET", "MAPPING_ERP_RCMS"]
+        assert pd.read_excel(excel, sheet_name="ERP_BUDGET").loc[1, "실행예산"] == 2
+
+
+def test_missing_sheet_raises(make_workbook, tmp_path):
+    src, _ = make_workbook(5)
+    with pytest.raises(ValueError):
+        patch_workbook(src, tmp_path / "x.xlsx", {"NO_SUCH_SHEET": pd.DataFrame({"a": [1]})})
+
+
+def test_save_all_rewrites_only_dirty_sheet(make_workbook):
+    path, _ = make_workbook(100)
+    manager = DataManager(str(path), use_cache=False)
+    data = manager.load_all()
+    with zipfile.ZipFile(path) as zf:
+        expense_part = get_sheet_parts(zf)["EXPENSE"]
+    before = _raw_members(path)[expense_part]
+
+    data["ERP_BUDGET"] = data["ERP_BUDGET"].copy()
+    data["ERP_BUDGET"].loc[1, "실행예산"] = 777
+    success, error = manager.save_all(data, dirty_sheets=["ERP_BUDGET"])
+
+    assert success, error
+    assert _raw_members(path)[expense_part] == before
+    assert DataManager(str(path), use_cache=False).load_all()["ERP_BUDGET"].loc[1, "실행예산"] == 777
+
+
+def test_backup_restore_reproduces_members(make_workbook, tmp_path):
+    """백업 복원도 같은 작성기로 압축된 바이트를 그대로 기록"""
+    from backup_store import BackupStore
+
+    src, _ = make_workbook(30)
+    store = BackupStore(src)
+    version_id = store.snapshot()
+    restored = store.restore(version_id, tmp_path / "restored.xlsx")
+
+    with zipfile.ZipFile(restored) as zf:
+        assert zf.testzip() is None
+    assert _raw_members(restored) == _raw_members(src)
+
+
+def _zip64_required(*args, **kwargs):
+    raise ValueError("ZIP64가 필요한 통합문서는 부분 저장할 수 없습니다.")
+
+
+def test_patch_falls_back_to_zipfile_when_raw_writer_fails(make_workbook, tmp_path, monkeypatch):
+    """RawZipWriter가 쓸 수 없으면 표준 zipfile로 다시 압축하여 같은 내용 저장"""
+    src, _ = make_workbook(40)
+    dst = tmp_path / "patched.xlsx"
+    monkeypatch.setattr(xlsx_patch.RawZipWriter, "_write", _zip64_required)
+    patch_workbook(src, dst, {"ERP_BUDGET": _edit_budget(src, 4321)})
+
+    with zipfile.ZipFile(dst) as zf, zipfile.ZipFile(src) as original:
+        assert zf.testzip() is None
+        assert zf.namelist() == original.namelist()
+    assert pd.read_excel(dst, sheet_name="ERP_BUDGET").loc[1, "실행예산"] == 4321
+    pd.testing.assert_frame_equal(pd.read_excel(dst, sheet_name="EXPENSE"),
+                                  pd.read_excel(src, sheet_name="EXPENSE"))
+
+
+def test_save_all_uses_full_write_when_patch_fails(make_workbook, monkeypatch):
+    """부분 저장이 실패해도 저장 오류 없이 전체 다시 쓰기로 저장"""
+    path, _ = make_workbook(30)
+    manager = DataManager(str(path), use_cache=False)
+    data = manager.load_all()
+
+    def broken_patch(src_path, dst_path, sheets):
+        raise ValueError("암호화된 zip 항목은 복사할 수 없습니다")
+
+    monkeypatch.setattr("data_manager.patch_workbook", broken_patch)
+    data["ERP_BUDGET"] = data["ERP_BUDGET"].copy()
+    data["ERP_BUDGET"].loc[1, "실행예산"] = 888
+    success, error = manager.save_all(data, dirty_sheets=["ERP_BUDGET"])
+
+    assert success, error
+    reloaded = DataManager(str(path), use_cache=False).load_all()
+    assert reloaded["ERP_BUDGET"].loc[1, "실행예산"] == 888
+    assert len(reloaded["EXPENSE"]) == 30
+
+
+def _add_calc_chain(path, sheet_id):
+    """sheetId 시트의 수식을 가리키는 calcChain 파트 추가"""
+    with zipfile.ZipFile(path) as zf:
+        members = [(info, zf.read(info)) for info in zf.infolist()]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for info, data in members:
+            if info.filename == xlsx_patch.WORKBOOK_RELS_PART:
+                data = data.replace(b"</Relationships>", (
+                    b'<Relationship Id="rIdCalc" Target="calcChain.xml" Type="http://schemas.openxmlformats.org/'
+                    b'officeDocument/2006/relationships/calcChain"/></Relationships>'))
+            elif info.filename == xlsx_patch.CONTENT_TYPES_PART:
+                data = data.replace(b"</Types>", (
+                    b'<Override PartName="/xl/calcChain.xml" ContentType="application/'
+                    b'vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/></Types>'))
+            zf.writestr(info, data)
+        zf.writestr(CALC_CHAIN_PART, (f'<calcChain xmlns="{xlsx_patch.MAIN_NS}">'
+                                      f'<c r="B2" i="{sheet_id}"/><c r="B3"/></calcChain>').encode())
+
+
+def _sheet_id(path, sheet_name):
+    with zipfile.ZipFile(path) as zf:
+        return xlsx_patch._get_sheet_ids(zf)[sheet_name]
+
+
+@pytest.mark.parametrize("formula_sheet, kept", [("MAPPING_ERP_RCMS", True), ("ERP_BUDGET", False)])
+def test_calc_chain_removed_only_when_patched_sheet_is_referenced(make_workbook, tmp_path, formula_sheet, kept):
+    src, _ = make_workbook(20)
+    _add_calc_chain(src, _sheet_id(src, formula_sheet))
+    dst = tmp_path / "patched.xlsx"
+    patch_workbook(src, dst, {"ERP_BUDGET": _edit_budget(src, 5)})
+
+    with zipfile.ZipFile(dst) as zf:
+        assert zf.testzip() is None
+        assert (CALC_CHAIN_PART in zf.namelist()) == kept
+        assert (b"calcChain" in zf.read(xlsx_patch.WORKBOOK_RELS_PART)) == kept
+    before, after = _raw_members(src), _raw_members(dst)
+    assert (after.get(xlsx_patch.CONTENT_TYPES_PART) == before[xlsx_patch.CONTENT_TYPES_PART]) == kept
+
+
+def test_styles_kept_when_date_style_exists(make_workbook, tmp_path):
+    """날짜 스타일이 이미 있으면 styles.xml을 다시 쓰지 않음"""
+    src, _ = make_workbook(20)
+    first, second = tmp_path / "first.xlsx", tmp_path / "second.xlsx"
+    patch_workbook(src, first, {"ERP_BUDGET": _edit_budget(src, 1)})
+    patch_workbook(first, second, {"ERP_BUDGET": _edit_budget(first, 2)})
+
+    assert _raw_members(second)[STYLES_PART] == _raw_members(first)[STYLES_PART]
+
+
+@pytest.mark.benchmark
+def test_benchmark_budget_edit_save(make_workbook):
+    """예산 셀 1개 수정 후 DataManager.save_all 시간 (EXPENSE 행 수와 무관해야 함) vs 전체 다시 쓰기"""
+    partial, full = {}, {}
+    for rows in (1_000, 10_000, 50_000):
+        path, _ = make_workbook(rows, name=f"bench_{rows}_master.xlsx")
+        manager = DataManager(str(path), use_cache=False)
+        data = manager.load_all()
+        timings = []
+        for value in range(3):
+            data["ERP_BUDGET"] = _edit_budget(path, 1000 + value)
+            start = time.perf_counter()
+            assert manager.save_all(data, dirty_sheets=["ERP_BUDGET"])[0]
+            timings.append(time.perf_counter() - start)
+        partial[rows] = min(timings)
+        start = time.perf_counter()
+        write_workbook(path.with_name(f"full_{rows}.xlsx"), data)
+        full[rows] = time.perf_counter() - start
+        print(f"\n{rows:>7,} rows: save_all {partial[rows] * 1000:.1f} ms, full rewrite {full[rows] * 1000:.0f} ms")
+    # 전체 다시 쓰기는 행 수에 비례하지만 부분 저장은 파일 복사 수준에 머묾
+    assert partial[50_000] < full[50_000] / 10
+    assert partial[50_000] < max(5 * partial[1_000], 0.5)
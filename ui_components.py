@@ -8,6 +8,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 from utils import format_currency, format_number
+from expense_schema import with_rcms_name
 
 
 def display_file_info(file_path: str, folder_path: str):
@@ -26,7 +27,7 @@ def display_expense_table(df: pd.DataFrame, editable: bool = False):
     display_columns = ['id', '통계목명', '사용일자', '지출결의명', '상세내역', 
                       '지출결의액', 'rcms_code', 'rcms_name', 'rcms_settled']
     
-    display_df = df[display_columns].copy()
+    display_df = with_rcms_name(df)[display_columns].copy()
     
     # 금액 포맷팅
     if '지출결의액' in display_df.columns:
@@ -204,3 +205,32 @@ def show_summary_cards(summary: dict):
                 else (f"{value}%" if '률' in key else format_number(value) if isinstance(value, int) else value)
             )
 
+
+
+def plot_monthly_execution_chart(series_df: pd.DataFrame, total_budget: int = 0):
+    """월말 기준 누적 집행액 선 차트 (series_df: 월 × 항목 누적 금액)"""
+    if series_df.empty:
+        st.info("사용일자가 입력된 지출내역이 없습니다.")
+        return
+    
+    chart_df = pd.DataFrame({
+        '월': series_df.index.astype(str),
+        '누적 집행액': series_df.sum(axis=1).to_numpy()
+    })
+    fig = px.line(chart_df, x='월', y='누적 집행액', markers=True, title='월별 누적 집행액 (ERP 기준)')
+    if total_budget > 0:
+        fig.add_hline(y=total_budget, line_dash='dash', line_color='#FF4444', annotation_text='총 예산')
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def display_reconciliation_table(df: pd.DataFrame, amount_columns: list):
+    """ERP-RCMS 대사 결과 테이블 표시 (금액 컬럼은 통화 형식)"""
+    if df.empty:
+        st.info("표시할 대사 결과가 없습니다.")
+        return
+    
+    display_df = df.copy()
+    for col in amount_columns:
+        if col in display_df.columns:
+            display_df[col] = display_df[col].apply(lambda x: format_currency(int(x)) if pd.notna(x) else "")
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
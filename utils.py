@@ -4,8 +4,9 @@
 """
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Callable
 import os
+import shutil
 import sys
 
 
@@ -75,6 +76,55 @@ def ensure_folder_exists(folder_path: str) -> bool:
         return False
 
 
+def fsync_file(file_path: Path) -> None:
+    """파일 내용을 디스크에 기록 (fsync)"""
+    with open(file_path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def fsync_folder(folder_path: Path) -> None:
+    """폴더 항목(파일 이름 변경)을 디스크에 기록 (Windows는 지원하지 않아 생략)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(folder_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def get_rollback_path(file_path: Path) -> Path:
+    """저장 직전 파일을 보관하는 롤백 파일 경로"""
+    return file_path.parent / f".{file_path.name}.prev"
+
+
+def atomic_write(file_path: Path, write: Callable[[Path], None], keep_previous: bool = True) -> None:
+    """같은 폴더의 임시 파일에 쓴 뒤 fsync 후 os.replace로 교체
+    
+    쓰는 도중 프로그램이 종료되어도 기존 파일은 그대로 남는다.
+    keep_previous가 True이면 교체 직전 파일을 롤백 파일로 남긴다 (가능하면 하드 링크, 복사 없음).
+    """
+    file_path = Path(file_path)
+    temp_path = file_path.parent / f".{file_path.name}.tmp"
+    try:
+        write(temp_path)
+        fsync_file(temp_path)
+        if keep_previous and file_path.exists():
+            rollback_path = get_rollback_path(file_path)
+            if rollback_path.exists():
+                rollback_path.unlink()
+            try:
+                os.link(file_path, rollback_path)
+            except OSError:
+                # 하드 링크를 지원하지 않는 파일 시스템
+                shutil.copy2(file_path, rollback_path)
+        os.replace(temp_path, file_path)
+        fsync_folder(file_path.parent)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
 def open_folder_in_explorer(folder_path: str) -> bool:
     """파일 탐색기에서 폴더 열기"""
     try:
@@ -0,0 +1,350 @@
+"""
+엑셀 부분 저장 모듈
+변경된 시트의 XML 파트만 다시 생성하여 기존 .xlsx(zip) 컨테이너에 교체
+변경되지 않은 시트의 XML 파트는 그대로 유지됨
+"""
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+import posixpath
+import re
+import struct
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.datetime import to_excel
+
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+WORKBOOK_PART = "xl/workbook.xml"
+WORKBOOK_RELS_PART = "xl/_rels/workbook.xml.rels"
+STYLES_PART = "xl/styles.xml"
+CALC_CHAIN_PART = "xl/calcChain.xml"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+# 날짜 셀에 사용할 기본 표시형식 (m/d/yy h:mm)
+DEFAULT_DATE_NUMFMT_ID = 22
+
+# zip 레코드 구조 (PKWARE APPNOTE 4.3.7 로컬 헤더, 4.3.12 중앙 디렉터리, 4.3.16 끝 레코드)
+LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+LOCAL_SIGNATURE = b"PK\x03\x04"
+CENTRAL_SIGNATURE = b"PK\x01\x02"
+END_SIGNATURE = b"PK\x05\x06"
+ENCRYPTED_FLAG = 0x01
+DATA_DESCRIPTOR_FLAG = 0x08
+UTF8_NAME_FLAG = 0x800
+DEFLATE_VERSION = 20
+# ZIP64 없이 기록할 수 있는 최대 크기/항목 수
+ZIP32_SIZE_LIMIT = 0xFFFFFFFF
+ZIP32_COUNT_LIMIT = 0xFFFF
+
+
+def get_sheet_parts(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """시트명 → 워크시트 XML 파트 경로 매핑 반환"""
+    workbook = ET.fromstring(zf.read(WORKBOOK_PART))
+    rels = ET.fromstring(zf.read(WORKBOOK_RELS_PART))
+
+    targets = {}
+    for rel in rels.findall(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = target
+
+    parts = {}
+    for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+        rel_id = sheet.get(f"{{{REL_NS}}}id")
+        if rel_id in targets:
+            parts[sheet.get("name")] = targets[rel_id]
+    return parts
+
+
+def ensure_date_style(styles_xml: bytes) -> Tuple[bytes, int]:
+    """날짜 표시형식을 가진 cellXfs 인덱스 반환 (없으면 추가)"""
+    styles = ET.fromstring(styles_xml)
+
+    custom_formats = {}
+    num_fmts = styles.find(f"{{{MAIN_NS}}}numFmts")
+    if num_fmts is not None:
+        for num_fmt in num_fmts.findall(f"{{{MAIN_NS}}}numFmt"):
+            custom_formats[int(num_fmt.get("numFmtId"))] = num_fmt.get("formatCode", "")
+
+    cell_xfs = styles.find(f"{{{MAIN_NS}}}cellXfs")
+    if cell_xfs is None:
+        raise ValueError("styles.xml에 cellXfs가 없습니다.")
+
+    xfs = cell_xfs.findall(f"{{{MAIN_NS}}}xf")
+    for idx, xf in enumerate(xfs):
+        fmt_id = int(xf.get("numFmtId", 0))
+        fmt_code = custom_formats.get(fmt_id, BUILTIN_FORMATS.get(fmt_id, ""))
+        if fmt_code and is_date_format(fmt_code):
+            return styles_xml, idx
+
+    # 날짜 스타일이 없으면 cellXfs 끝에 추가 (원본 XML은 문자열 단위로만 수정)
+    text = styles_xml.decode("utf-8")
+    new_xf = (f'<xf numFmtId="{DEFAULT_DATE_NUMFMT_ID}" fontId="0" fillId="0" '
+              f'borderId="0" applyNumberFormat="1" xfId="0"/>')
+    text, replaced = re.subn(r"(<(?:\w+:)?cellXfs\b[^>]*>.*?)(</(?:\w+:)?cellXfs>)",
+                             lambda m: m.group(1) + new_xf + m.group(2),
+                             text, count=1, flags=re.DOTALL)
+    if not replaced:
+        raise ValueError("styles.xml의 cellXfs를 수정할 수 없습니다.")
+    text = re.sub(r'(<(?:\w+:)?cellXfs\b[^>]*\bcount=")\d+(")',
+                  lambda m: f"{m.group(1)}{len(xfs) + 1}{m.group(2)}", text, count=1)
+    return text.encode("utf-8"), len(xfs)
+
+
+def _format_cell(ref: str, value, date_style_id: int) -> Optional[str]:
+    """단일 셀 XML 생성 (빈 값이면 None)"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}" t="n"><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            return None
+        return f'<c r="{ref}" t="n"><v>{repr(float(value))}</v></c>'
+    if isinstance(value, (datetime, date, time, timedelta, np.datetime64)):
+        if isinstance(value, np.datetime64):
+            value = pd.Timestamp(value)
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        return f'<c r="{ref}" s="{date_style_id}" t="n"><v>{to_excel(value)}</v></c>'
+
+    text = ILLEGAL_CHARACTERS_RE.sub("", str(value))
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f'<c r="{ref}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+
+def build_sheet_xml(df: pd.DataFrame, date_style_id: int) -> bytes:
+    """DataFrame을 워크시트 XML로 변환 (헤더 1행 + 데이터, 인덱스 제외)"""
+    n_cols = len(df.columns)
+    letters = [get_column_letter(i + 1) for i in range(n_cols)]
+
+    rows: List[str] = []
+    header_cells = [_format_cell(f"{letters[i]}1", str(col), date_style_id)
+                    for i, col in enumerate(df.columns)]
+    rows.append('<row r="1">' + "".join(c for c in header_cells if c) + "</row>")
+
+    # 컬럼 단위로 파이썬 객체로 변환한 뒤 행 단위로 조립
+    columns = [df.iloc[:, i].astype(object).where(df.iloc[:, i].notna(), None).tolist()
+               for i in range(n_cols)]
+    for row_idx in range(len(df)):
+        r = row_idx + 2
+        cells = []
+        for col_idx in range(n_cols):
+            cell = _format_cell(f"{letters[col_idx]}{r}", columns[col_idx][row_idx], date_style_id)
+            if cell:
+                cells.append(cell)
+        rows.append(f'<row r="{r}">' + "".join(cells) + "</row>")
+
+    last_ref = f"{letters[-1]}{len(df) + 1}" if n_cols else "A1"
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<worksheet xmlns="{MAIN_NS}"><dimension ref="A1:{last_ref}"/>'
+        "<sheetData>" + "".join(rows) + "</sheetData></worksheet>"
+    )
+    return xml.encode("utf-8")
+
+
+def _strip_calc_chain(part_name: str, data: bytes) -> bytes:
+    """calcChain 참조 제거 (시트 교체 후 수식 체인이 어긋나지 않도록)"""
+    text = data.decode("utf-8")
+    if part_name == WORKBOOK_RELS_PART:
+        text = re.sub(r"<Relationship\b[^>]*calcChain[^>]*/>", "", text)
+    elif part_name == CONTENT_TYPES_PART:
+        text = re.sub(r"<Override\b[^>]*calcChain[^>]*/>", "", text)
+    return text.encode("utf-8")
+
+
+def _dos_datetime(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    """(년, 월, 일, 시, 분, 초) → zip 헤더의 (시각, 날짜) 값"""
+    year, month, day, hour, minute, second = date_time[:6]
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def _encode_name(name: str, flag_bits: int) -> Tuple[bytes, int]:
+    """파일명 인코딩 (ASCII가 아니면 UTF-8 플래그 설정)"""
+    try:
+        return name.encode("ascii"), flag_bits & ~UTF8_NAME_FLAG
+    except UnicodeEncodeError:
+        return name.encode("utf-8"), flag_bits | UTF8_NAME_FLAG
+
+
+def read_raw_member(src_file, info: zipfile.ZipInfo) -> bytes:
+    """zip 멤버의 압축된 원본 바이트 읽기 (압축 해제 없음)"""
+    src_file.seek(info.header_offset)
+    header = LOCAL_HEADER.unpack(src_file.read(LOCAL_HEADER.size))
+    if header[0] != LOCAL_SIGNATURE:
+        raise ValueError(f"zip 로컬 헤더가 올바르지 않습니다: {info.filename}")
+    src_file.seek(header[-2] + header[-1], 1)
+    return src_file.read(info.compress_size)
+
+
+class RawZipWriter:
+    """압축된 바이트를 그대로 옮겨 쓰는 zip 작성기
+
+    zipfile.ZipFile에는 압축된 바이트를 재압축 없이 쓰는 공개 API가 없어 zip 형식대로 직접 기록한다.
+    원본 항목 정보는 ZipInfo의 공개 속성만 사용하며, ZIP64가 필요한 크기나 암호화된 항목은 ValueError.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self._central: List[bytes] = []
+
+    def _write(self, name: str, raw: bytes, crc: int, file_size: int, method: int,
+               date_time: Tuple[int, ...], flag_bits: int = 0, info: Optional[zipfile.ZipInfo] = None) -> None:
+        """로컬 헤더 + 데이터 기록, 중앙 디렉터리 레코드 보관"""
+        offset = self.fp.tell()
+        if max(len(raw), file_size, offset) >= ZIP32_SIZE_LIMIT or len(self._central) >= ZIP32_COUNT_LIMIT:
+            raise ValueError("ZIP64가 필요한 통합문서는 부분 저장할 수 없습니다.")
+        if flag_bits & ENCRYPTED_FLAG:
+            raise ValueError(f"암호화된 zip 항목은 복사할 수 없습니다: {name}")
+        # 크기/CRC를 로컬 헤더에 기록하므로 데이터 디스크립터는 쓰지 않음
+        encoded, flag_bits = _encode_name(name, flag_bits & ~DATA_DESCRIPTOR_FLAG)
+        dos_time, dos_date = _dos_datetime(date_time)
+        extract_version = max(info.extract_version, DEFLATE_VERSION) if info else DEFLATE_VERSION
+        self.fp.write(LOCAL_HEADER.pack(LOCAL_SIGNATURE, extract_version, flag_bits, method, dos_time, dos_date,
+                                        crc, len(raw), file_size, len(encoded), 0))
+        self.fp.write(encoded)
+        self.fp.write(raw)
+        comment = info.comment if info else b""
+        self._central.append(CENTRAL_HEADER.pack(
+            CENTRAL_SIGNATURE,
+            (info.create_system << 8 | info.create_version) if info else DEFLATE_VERSION,
+            extract_version, flag_bits, method, dos_time, dos_date, crc, len(raw), file_size,
+            len(encoded), 0, len(comment), 0, info.internal_attr if info else 0,
+            info.external_attr if info else 0, offset) + encoded + comment)
+
+    def write_raw(self, info: zipfile.ZipInfo, raw: bytes) -> None:
+        """압축된 바이트를 재압축 없이 기록 (info의 CRC, file_size, compress_type 사용)"""
+        self._write(info.filename, raw, info.CRC, info.file_size, info.compress_type,
+                    info.date_time, info.flag_bits, info)
+
+    def copy(self, src_file, info: zipfile.ZipInfo) -> None:
+        """원본 zip 멤버를 압축된 바이트 그대로 복사"""
+        self.write_raw(info, read_raw_member(src_file, info))
+
+    def writestr(self, name: str, data: bytes) -> None:
+        """새 파트 기록 (deflate 압축)"""
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        raw = compressor.compress(data) + compressor.flush()
+        self._write(name, raw, zlib.crc32(data), len(data), zipfile.ZIP_DEFLATED,
+                    datetime.now().timetuple()[:6])
+
+    def close(self) -> None:
+        """중앙 디렉터리와 끝 레코드 기록"""
+        start = self.fp.tell()
+        for record in self._central:
+            self.fp.write(record)
+        size = self.fp.tell() - start
+        if start + size >= ZIP32_SIZE_LIMIT:
+            raise ValueError("ZIP64가 필요한 통합문서는 부분 저장할 수 없습니다.")
+        count = len(self._central)
+        self.fp.write(END_RECORD.pack(END_SIGNATURE, 0, 0, count, count, size, start, 0))
+
+
+def _calc_chain_sheet_ids(calc_chain_xml: bytes) -> Set[str]:
+    """calcChain이 참조하는 sheetId (i 속성이 없으면 직전 항목의 시트)"""
+    sheet_ids = set()
+    current = None
+    for cell in ET.fromstring(calc_chain_xml).iter(f"{{{MAIN_NS}}}c"):
+        current = cell.get("i", current)
+        sheet_ids.add(current)
+    return sheet_ids
+
+
+def _get_sheet_ids(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """시트명 → sheetId"""
+    workbook = ET.fromstring(zf.read(WORKBOOK_PART))
+    return {sheet.get("name"): sheet.get("sheetId") for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet")}
+
+
+def _write_raw_copy(src: zipfile.ZipFile, src_file, dst_path: Path,
+                    replaced: Dict[str, bytes], skipped: Set[str]) -> None:
+    """교체하지 않는 파트는 압축된 바이트 그대로 복사 (RawZipWriter)"""
+    with open(dst_path, "wb") as dst_file:
+        dst = RawZipWriter(dst_file)
+        for info in src.infolist():
+            if info.filename in skipped:
+                continue
+            if info.filename in replaced:
+                dst.writestr(info.filename, replaced[info.filename])
+            else:
+                dst.copy(src_file, info)
+        dst.close()
+
+
+def _write_zipfile_copy(src: zipfile.ZipFile, dst_path: Path,
+                        replaced: Dict[str, bytes], skipped: Set[str]) -> None:
+    """표준 zipfile로 다시 압축하여 기록 (ZIP64 등 RawZipWriter가 쓰지 못하는 통합문서용)"""
+    with zipfile.ZipFile(dst_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as dst:
+        for info in src.infolist():
+            if info.filename in skipped:
+                continue
+            if info.filename in replaced:
+                dst.writestr(info.filename, replaced[info.filename])
+            else:
+                # 원본 extra 필드(ZIP64 크기 등)는 새 위치와 맞지 않으므로 이름/시각/속성만 옮김
+                target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                target.compress_type = info.compress_type
+                target.external_attr = info.external_attr
+                target.comment = info.comment
+                dst.writestr(target, src.read(info))
+
+
+def patch_workbook(src_path: Path, dst_path: Path, sheets: Dict[str, pd.DataFrame]) -> None:
+    """src_path 통합문서에서 지정한 시트만 교체하여 dst_path에 저장
+
+    교체하지 않는 파트는 압축된 바이트를 그대로 복사하므로(RawZipWriter)
+    저장 비용이 변경된 시트 크기에만 비례한다.
+    RawZipWriter가 쓸 수 없는 통합문서(ZIP64 등)는 표준 zipfile로 다시 압축하여 저장한다.
+    styles.xml은 날짜 스타일을 추가할 때만, calcChain은 교체하는 시트를 참조할 때만 수정한다.
+    교체 대상 시트가 통합문서에 없으면 ValueError 발생 (호출 측에서 전체 저장으로 대체)
+    """
+    with zipfile.ZipFile(src_path, "r") as src, open(src_path, "rb") as src_file:
+        sheet_parts = get_sheet_parts(src)
+        missing = [name for name in sheets if name not in sheet_parts]
+        if missing:
+            raise ValueError(f"통합문서에 없는 시트입니다: {', '.join(missing)}")
+
+        replaced = {}
+        skipped: Set[str] = set()
+        names = set(src.namelist())
+        original_styles = src.read(STYLES_PART)
+        styles_xml, date_style_id = ensure_date_style(original_styles)
+        if styles_xml is not original_styles:
+            replaced[STYLES_PART] = styles_xml
+        for sheet_name, df in sheets.items():
+            replaced[sheet_parts[sheet_name]] = build_sheet_xml(df, date_style_id)
+        if CALC_CHAIN_PART in names:
+            sheet_ids = _get_sheet_ids(src)
+            if _calc_chain_sheet_ids(src.read(CALC_CHAIN_PART)) & {sheet_ids[name] for name in sheets}:
+                # 교체한 시트의 수식 체인이 어긋나지 않도록 제거 (Excel이 다시 만듦)
+                skipped.add(CALC_CHAIN_PART)
+                for part_name in (WORKBOOK_RELS_PART, CONTENT_TYPES_PART):
+                    replaced[part_name] = _strip_calc_chain(part_name, src.read(part_name))
+
+        try:
+            _write_raw_copy(src, src_file, dst_path, replaced, skipped)
+        except ValueError as e:
+            print(f"압축 바이트 복사 불가, 다시 압축하여 저장합니다: {e}")
+            _write_zipfile_copy(src, dst_path, replaced, skipped)